@@ -1,7 +1,17 @@
+import asyncio
+import copy
 import json
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from config import Config
+from deadline import Deadline, DeadlineExceeded
+from hedging import LatencyTracker
 from llmClient import LLMClient
+from jsonStream import IncrementalJSONFields
+from logPipeline import payload
 from memory import Memory
+from promptBudget import PromptBudget, estimate_tokens, shared_prefix
+from telemetry import call_context
 from prompt import *
 
 
@@ -22,12 +32,43 @@ class Agent:
         id: int,    
         execute_prompt: str = "",
         memory_capacity: Optional[int] = None,
+        stream: bool = Config.STREAM_STEPS,
+        budget: Optional[PromptBudget] = None,
     ):
         self.llm = llm_client
         self.id = id
         self.memory = Memory(long_term_capacity=memory_capacity)
         self.status = "ongoing"  # Status of the agent
         self.execute_prompt = execute_prompt
+        self.stream = stream
+        if budget is None and Config.PROMPT_BUDGET_ENABLED:
+            budget = PromptBudget.for_model(llm_client.model)
+        self.budget = budget
+        # Called as callback(agent_id, (kind, key, value)) for every streamed step event
+        self.subscribers: List[Callable[[int, Tuple[str, str, Any]], None]] = []
+        # Seconds from request start to first byte / first new_content / status / full response
+        self.last_timings: Dict[str, float] = {}
+        # Recent step latencies, and rounds in which this agent was cut off as a straggler
+        self.step_latency = LatencyTracker()
+        self.step_cutoffs = 0
+
+    def subscribe(self, callback: Callable[[int, Tuple[str, str, Any]], None]) -> None:
+        """
+        Receive step events while streaming: ("field", key, value) once a top-level
+        field is complete and ("chunk", "new_content", text) as content arrives.
+        """
+        self.subscribers.append(callback)
+
+    def clone(self) -> "Agent":
+        """
+        A copy of this agent for running a subtask alongside others: same id, LLM
+        client, budget and latency stats, with its own copy-on-write fork of the memory.
+        """
+        twin = copy.copy(self)
+        twin.memory = self.memory.fork()
+        twin.subscribers = list(self.subscribers)
+        twin.last_timings = {}
+        return twin
 
     def setNewTask(self, task: str) -> None:
         """
@@ -38,86 +79,248 @@ class Agent:
         self.status = "ongoing"
 
 
-    async def validate_async(self, overall: str, task: str, fragment: str) -> bool:
+    def _factor_shared(self, texts: List[str], overhead: str, label: str = "", fit: bool = True) -> Tuple[str, List[str], int]:
+        """
+        Split candidates into the leading lines they all share, sent once as shared
+        context, and the divergent part of each, then (with `fit`) fit both to the
+        prompt budget. Returns (shared, suffixes, estimated input tokens saved by not
+        repeating it).
+        """
+        shared = ""
+        if Config.PROMPT_SHARED_PREFIX_ENABLED:
+            shared, texts = shared_prefix(texts, Config.PROMPT_SHARED_PREFIX_MIN_CHARS)
+        saved = estimate_tokens(shared) * (len(texts) - 1)
+        if saved:
+            logger.info(f"{label}shared context sent once for {len(texts)} candidates, ~{saved} input tokens saved")
+        if fit and self.budget is not None:
+            fitted = self.budget.fit_texts([shared] + texts, overhead, label=label)
+            shared, texts = fitted[0], fitted[1:]
+        return shared, texts, saved
+
+    def _fit_for_review(self, review: str, overall: str, task: str, system_prompt: str, label: str) -> Optional[Tuple[str, str]]:
+        """
+        (overall, task) trimmed so that the prompt fits the budget with `review`, the
+        text a validator judges, left whole: an elided fragment would be judged
+        incomplete. None when `review` alone is over the budget, in which case
+        callers send it unbudgeted rather than fail it without asking a validator.
+        """
+        if self.budget is None:
+            return overall, task
+        fitted = self.budget.fit_around(review, [overall, task], system_prompt, label=label)
+        if fitted is None:
+            logger.warning(
+                f"{label}~{estimate_tokens(review)} tokens to review exceed the {self.budget.limit}-token "
+                f"prompt budget of {self.budget.model}"
+            )
+            return None
+        return fitted[0], fitted[1]
+
+    async def validate_async(self, overall: str, task: str, fragment: str, deadline: Optional[Deadline] = None) -> bool:
 
+        label = f"[Agent {self.id}] validate: "
+        fitted = self._fit_for_review(fragment, overall, task, OBJECTIVE_VALIDATOR_PROMPT, label)
+        if fitted is None:
+            # Nothing left to trim: send the prompt as it is and let the API accept or refuse it
+            logger.warning(f"{label}sending the prompt without budgeting")
+        else:
+            overall, task = fitted
         user_content = f"# overall objective:\n{overall}\n\n---\n\n# current task:\n{task}\n\n---\n\n# generated output fragment so far:\n{fragment}\n"
-        logger.info(f"[DEBUG] validation input [Agent {self.id}]: {user_content}")
+        logger.info("[DEBUG] validation input [Agent %s]: %s", self.id, user_content, extra=payload(agent_id=self.id))
         prompt = [
             {"role": "system", "content": OBJECTIVE_VALIDATOR_PROMPT},
             {"role": "user", "content": user_content}
         ]
         try:
-            data = json.loads(await self.llm.a_chat_completion(prompt))
+            with call_context(agent_id=self.id, phase="validate"):
+                raw = await self.llm.a_chat_completion(prompt, cacheable=True, deadline=deadline)
+            data = json.loads(raw)
             result = (data.get("result", "")).lower()
-            logger.info(f"[Agent {self.id}] Validation result: {data}")
+            logger.info("[Agent %s] Validation result: %s", self.id, data, extra=payload(agent_id=self.id))
             
             return "true" in result
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.info(f"[error][Agent {self.id}] Validation failed: {e}")
             return False
 
-    async def step_async(self, overall: str, task: str) -> Dict[str, Any]:
+    async def validate_batch_async(
+        self, overall: str, task: str, fragments: List[str], deadline: Optional[Deadline] = None
+    ) -> List[bool]:
+        """
+        Validate several candidate fragments in one call (BATCH_VALIDATOR_PROMPT).
+        Returns one verdict per fragment; candidates the model gave no verdict
+        for, or every candidate if the call fails, count as False. When the
+        candidates together do not fit the prompt budget they are validated one
+        call each, so none of them is judged in elided form.
+        """
+        label = f"[Agent {self.id}] batch validate: "
+        shared, suffixes, saved = self._factor_shared(fragments, BATCH_VALIDATOR_PROMPT + overall + task, label=label, fit=False)
+        fitted = self._fit_for_review(shared + "".join(suffixes), overall, task, BATCH_VALIDATOR_PROMPT, label)
+        if fitted is None:
+            logger.info(f"{label}validating {len(fragments)} candidates one call each")
+            return list(await asyncio.gather(*(self.validate_async(overall, task, f, deadline) for f in fragments)))
+        overall, task = fitted
+        candidates_block = "\n\n".join(
+            f"## Candidate {i}\n{suffix or '(nothing beyond the shared context)'}\n --- \n"
+            for i, suffix in enumerate(suffixes)
+        )
+        shared_block = (
+            f"# shared context (every candidate begins with this text, followed by its own part below):\n{shared}\n\n---\n\n"
+            if shared else ""
+        )
+        user_content = f"# overall objective:\n{overall}\n\n---\n\n# current task:\n{task}\n\n---\n\n{shared_block}# candidates:\n{candidates_block}\n"
+        logger.info("[DEBUG] batch validation input [Agent %s]: %s", self.id, user_content, extra=payload(agent_id=self.id))
+        prompt = [
+            {"role": "system", "content": BATCH_VALIDATOR_PROMPT},
+            {"role": "user", "content": user_content}
+        ]
+        try:
+            with call_context(agent_id=self.id, phase="validate", factored_tokens=saved):
+                raw = await self.llm.a_chat_completion(prompt, cacheable=True, deadline=deadline)
+            data = json.loads(raw)
+            results = data.get("results", [])
+            logger.info("[Agent %s] Batch validation result: %s", self.id, data, extra=payload(agent_id=self.id))
+            if len(results) != len(fragments):
+                logger.info(f"[error][Agent {self.id}] Batch validation returned {len(results)} verdicts for {len(fragments)} candidates")
+            verdicts = [str(r).lower() == "true" for r in results[:len(fragments)]]
+            return verdicts + [False] * (len(fragments) - len(verdicts))
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.info(f"[error][Agent {self.id}] Batch validation failed: {e}")
+            return [False] * len(fragments)
+
+    async def step_async(
+        self, overall: str, task: str, deadline: Optional[Deadline] = None, apply: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Generate the next segment of `task` and, with `apply`, record it (see
+        apply_step). With apply=False neither the status nor the memory of the
+        agent is touched, failures included, so a step that may finish after its
+        memory was replaced can be applied or discarded by the caller.
+        """
+        # Memory's incrementally joined text, trimmed into a copy only when it does not fit
         prior = self.memory.get_all()
         jf = self.memory.get_short_justify_str()
+        overhead = TASK_EXECUTION_PROMPT + overall + task
+        if self.budget is not None and not self.budget.fits([prior, jf], overhead):
+            prior, jf = self.budget.fit_memory(
+                self.memory.long_term,
+                self.memory.short_term["segments"],
+                jf,
+                overhead=overhead,
+                label=f"[Agent {self.id}] step: ",
+            )
         user_content = f"# overall objective:\n{overall}\n\n---\n\n# current task:\n{task}\n\n---\n\n# previously generated justifications: \n{jf}\n\n---\n\n# previous all generated segments:\n{prior}\n"
-        logger.info(f"[DEBUG] step input [Agent {self.id}]: {user_content}")
+        logger.info("[DEBUG] step input [Agent %s]: %s", self.id, user_content, extra=payload(agent_id=self.id))
 
         prompt = [
             {"role": "system", "content": TASK_EXECUTION_PROMPT},
             {"role": "user", "content": user_content}
         ]
         try:
-            raw_response = await self.llm.a_chat_completion(prompt)
-  
-      
-            data = json.loads(raw_response)
-            justify = data.get("justify", "")
-            new_content = data.get("new_content", "")
-            status = data.get("status", "").lower()
-            mode = data.get("mode", "").lower()
-
-            logger.info(f"[DEBUG][Agent {self.id}] Generated content preview: \n\n---\n\n jf: {justify} \n\n---\n\n new content \n {new_content}\n Step status: {status} \n\n---\n\n mode: {mode}\n")
-
-            if "complete" in status:
-                self.status = "complete"
+            if self.stream:
+                with call_context(agent_id=self.id, phase="step"):
+                    data = await self._stream_step(prompt, deadline)
             else:
-                self.status = "ongoing"
-
-            if "override" in mode:
-                self.memory.replace_all(new_content,justify)
-            else:                
-                self.memory.add_short(new_content,justify)
-            logger.info(f"[DEBUG][Agent {self.id}] Added new content to memory.")
+                start = time.perf_counter()
+                with call_context(agent_id=self.id, phase="step"):
+                    raw_response = await self.llm.a_chat_completion(prompt, deadline=deadline)
+                self.last_timings = {"total": time.perf_counter() - start}
+                data = json.loads(raw_response)
+            self.step_latency.record(self.last_timings["total"])
+            logger.info(
+                "[DEBUG][Agent %s] Generated content preview: \n\n---\n\n jf: %s \n\n---\n\n new content \n %s\n Step status: %s \n\n---\n\n mode: %s\n",
+                self.id, data.get("justify", ""), data.get("new_content", ""), data.get("status", ""),
+                data.get("mode", ""), extra=payload(agent_id=self.id)
+            )
+            if apply:
+                self.apply_step(data)
             return data
 
         except json.JSONDecodeError as e:
             logger.info(f"[error][Agent {self.id}] JSON decoding failed: {e}")
-            self.status = "fail"
+            if apply:
+                self.status = "fail"
             raise RuntimeError(f"Agent {self.id} failed to parse LLM response as JSON.")
 
+        except DeadlineExceeded:
+            logger.info(f"[Agent {self.id}] step cut off by run deadline.")
+            raise
+
         except Exception as e:
             logger.info(f"[error][Agent {self.id}] Unexpected error during step_async: {e}")
-            self.status = "fail"
+            if apply:
+                self.status = "fail"
             raise RuntimeError(f"Agent {self.id} encountered an error: {e}")
 
+    def apply_step(self, data: Dict[str, Any]) -> None:
+        """Record a step answer: set the status and add (or, in override mode, replace with) its segment."""
+        justify = data.get("justify", "")
+        new_content = data.get("new_content", "")
+        status = data.get("status", "").lower()
+        mode = data.get("mode", "").lower()
+
+        if "complete" in status:
+            self.status = "complete"
+        else:
+            self.status = "ongoing"
+
+        if "override" in mode:
+            self.memory.replace_all(new_content,justify)
+        else:                
+            self.memory.add_short(new_content,justify)
+        logger.info(f"[DEBUG][Agent {self.id}] Added new content to memory.")
 
-    async def vote_async(self, overall: str, task: str, versions: List[str]) -> List[int]:
+
+    async def _stream_step(self, prompt: List[Dict[str, str]], deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Run a step prompt in streaming mode, publishing fields to subscribers as they parse."""
+        parser = IncrementalJSONFields(stream_keys={"new_content"})
+        raw: List[str] = []
+        start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        async for piece in self.llm.a_chat_completion_stream(prompt, deadline=deadline):
+            now = time.perf_counter() - start
+            timings.setdefault("first_byte", now)
+            raw.append(piece)
+            for event in parser.feed(piece):
+                kind, key, _ = event
+                if kind == "chunk":
+                    timings.setdefault("first_content", now)
+                elif key in ("status", "mode"):
+                    timings.setdefault(key, now)
+                for callback in self.subscribers:
+                    callback(self.id, event)
+        timings["total"] = time.perf_counter() - start
+        self.last_timings = timings
+        # Anything the incremental parser could not finish goes through the strict parser
+        return parser.fields if parser.done else json.loads("".join(raw))
+
+    async def vote_async(self, overall: str, task: str, versions: List[str], deadline: Optional[Deadline] = None) -> List[int]:
+
+        shared, suffixes, saved = self._factor_shared(versions, VOTING_PROMPT + overall + task, label=f"[Agent {self.id}] vote: ")
 
         versions_block = "\n\n".join(   
-            f"## Version {i}\n{v} \n --- \n"
-            for i, v in enumerate(versions)
+            f"## Version {i}\n{v or '(nothing beyond the shared context)'} \n --- \n"
+            for i, v in enumerate(suffixes)
+        )
+        shared_block = (
+            f"# Shared context (every version begins with this text, followed by its own part below):\n{shared}\n\n---\n\n"
+            if shared else ""
         )
-        user_content = f"# Overall objective:\n{overall}\n\n---\n\n# current task:\n{task}\n\n---\n\n# Different versions of answers for current task: \n{versions_block}\n\n---\n\n"
+        user_content = f"# Overall objective:\n{overall}\n\n---\n\n# current task:\n{task}\n\n---\n\n{shared_block}# Different versions of answers for current task: \n{versions_block}\n\n---\n\n"
        
-        logger.info(f"[DEBUG] vote input [Agent {self.id}]: {user_content}")
+        logger.info("[DEBUG] vote input [Agent %s]: %s", self.id, user_content, extra=payload(agent_id=self.id))
         prompt = [
             {"role": "system", "content": VOTING_PROMPT},
             {"role": "user", "content": user_content}
         ]
-        raw = await self.llm.a_chat_completion(prompt)
+        with call_context(agent_id=self.id, phase="vote", factored_tokens=saved):
+            raw = await self.llm.a_chat_completion(prompt, cacheable=True, deadline=deadline)
 
         data = json.loads(raw)
         votes = data.get("votes", [])
 
-        logger.info(f"[DEBUG][Agent {self.id}] Voting result: {votes}")
+        logger.info("[DEBUG][Agent %s] Voting result: %s", self.id, votes, extra=payload(agent_id=self.id))
         return votes
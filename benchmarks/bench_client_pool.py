@@ -0,0 +1,74 @@
+"""
+Compare per-instance OpenAI clients against the shared ClientPool.
+
+Run from the repository root:
+    python -m benchmarks.bench_client_pool --requests 400 --concurrency 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from openai import AsyncOpenAI
+
+from clientPool import aclose_clients
+from llmClient import LLMClient
+from mockServer import start_mock_server
+
+MESSAGES = [{"role": "user", "content": "ping"}]
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def fresh_client_call(base_url: str) -> float:
+    # What LLMClient.__init__ used to do: a new client (and pool) per instance
+    start = time.perf_counter()
+    client = AsyncOpenAI(api_key="sk-mock", base_url=base_url)
+    try:
+        await client.chat.completions.create(model="mock", messages=MESSAGES)
+    finally:
+        await client.close()
+    return time.perf_counter() - start
+
+
+async def pooled_client_call(base_url: str) -> float:
+    start = time.perf_counter()
+    client = LLMClient(provider="openai", api_key="sk-mock", model="mock", base_url=base_url)
+    await client.a_chat_completion(MESSAGES)
+    return time.perf_counter() - start
+
+
+async def run(call, base_url: str, requests: int, concurrency: int) -> List[float]:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            return await call(base_url)
+
+    return await asyncio.gather(*(one() for _ in range(requests)))
+
+
+async def main(args):
+    for name, call in (("fresh client per call", fresh_client_call), ("shared pool", pooled_client_call)):
+        server = start_mock_server(latency=args.latency)
+        latencies = await run(call, server.base_url, args.requests, args.concurrency)
+        print(
+            f"{name:>22}: requests={server.requests} connections={server.connections} "
+            f"p50={percentile(latencies, 50) * 1000:.1f}ms p99={percentile(latencies, 99) * 1000:.1f}ms "
+            f"mean={statistics.mean(latencies) * 1000:.1f}ms"
+        )
+        server.shutdown()
+    await aclose_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.005, help="mock server latency in seconds")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,70 @@
+"""
+Compare rebuilding Memory's string views on every read (as get_all and
+get_long_str used to) with the cached, incrementally extended joins of
+segmentStore.CowList, as the number of segments grows into the thousands.
+
+Simulates one agent's memory through a long run: a segment is added per step
+and every --archive-every steps the task is archived into long-term memory.
+After each write the full memory is read --reads times (the agent's own step
+plus validators and voters). Both paths must produce identical text.
+
+Run from the repository root:
+    python -m benchmarks.bench_joins --segments 1000 5000 10000 --reads 8
+"""
+import argparse
+import time
+from typing import Callable
+
+from memory import Memory
+
+MODES = ("rebuild", "cached")
+
+
+def rebuild_all(memory: Memory) -> str:
+    """get_all as it was: join every long-term result and every segment again."""
+    long_str = "\n".join(str(entry.get("result", "")) for entry in memory.long_term)
+    return long_str + "\n" + "\n".join(memory.short_term.get("segments", []))
+
+
+def run(read: Callable[[Memory], str], segments: int, chars: int, archive_every: int, reads: int):
+    line = "generated line\n"
+    text = (line * (chars // len(line) + 1))[:chars]
+    memory = Memory()
+    memory.set_task("task 0")
+    read_time = 0.0
+    start = time.perf_counter()
+    for i in range(segments):
+        memory.add_short(f"{i}:{text}", f"justification {i}")
+        if (i + 1) % archive_every == 0:
+            memory.archive_task()
+            memory.set_task(f"task {i + 1}")
+        began = time.perf_counter()
+        for _ in range(reads):
+            out = read(memory)
+        read_time += time.perf_counter() - began
+    return time.perf_counter() - start, read_time, out
+
+
+def main(args) -> None:
+    print(f"chars={args.chars} archive_every={args.archive_every} reads={args.reads}")
+    print(f"{'segments':>9} {'mode':<8} {'total s':>9} {'reads s':>9} {'per read us':>12}")
+    for segments in args.segments:
+        results = {}
+        for mode, read in (("rebuild", rebuild_all), ("cached", Memory.get_all)):
+            results[mode] = run(read, segments, args.chars, args.archive_every, args.reads)
+            total, read_time, _ = results[mode]
+            print(
+                f"{segments:>9} {mode:<8} {total:>9.3f} {read_time:>9.3f} "
+                f"{read_time / (segments * args.reads) * 1e6:>12.1f}"
+            )
+        assert results["rebuild"][2] == results["cached"][2], "cached get_all differs from a full rebuild"
+        print(f"{'':>9} read speedup: {results['rebuild'][1] / max(results['cached'][1], 1e-9):.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--chars", type=int, default=200, help="Characters per segment")
+    parser.add_argument("--archive-every", type=int, default=50, help="Steps between archive_task calls")
+    parser.add_argument("--reads", type=int, default=8, help="Full-memory reads after every write")
+    main(parser.parse_args())
@@ -0,0 +1,121 @@
+"""
+Compare handing the winner's memory to every agent by deepcopy (what
+select_best, cros_model_val and replace_fail used to do) with the shared
+copy-on-write snapshots of segmentStore.py, as the generated artifact grows.
+
+For each artifact size one round is simulated, in both modes:
+- broadcast: the winner's long-term memory goes to every agent
+- restore: the winner's short-term segments go to every failed agent (half of them)
+- write: every agent then appends one segment, which is what forces the
+  copy-on-write lists to take a private copy
+
+Reports time per phase and the memory the agents hold on to afterwards (tracemalloc).
+No LLM calls are made.
+
+Run from the repository root:
+    python -m benchmarks.bench_memory --agents 8 --entries 10 100 1000 5000
+"""
+import argparse
+import copy
+import gc
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from memory import Memory
+
+MODES = ("deepcopy", "shared")
+
+
+def build_memory(entries: int, chars: int, segments: int) -> Memory:
+    line = "generated artifact line\n"
+    text = (line * (chars // len(line) + 1))[:chars]
+    memory = Memory()
+    for i in range(entries):
+        memory.record_long({"task": f"subtask {i}", "result": f"{i}:{text}"})
+    memory.set_task("current subtask")
+    for i in range(segments):
+        memory.add_short(f"{i}:{text}", f"justification {i}")
+    return memory
+
+
+def measure(fn: Callable[[], None]) -> Tuple[float, int]:
+    """Seconds taken by `fn` and bytes it left allocated."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return elapsed, retained
+
+
+def run_round(mode: str, winner: Memory, agents: int) -> Dict[str, float]:
+    memories = [Memory() for _ in range(agents)]
+    failed = memories[::2]
+
+    if mode == "deepcopy":
+        def broadcast():
+            winner_mem = copy.deepcopy(list(winner.long_term))
+            for memory in memories:
+                memory.long_term = copy.deepcopy(winner_mem)
+
+        def restore():
+            winner_mem = {k: copy.deepcopy(list(v)) if k != "task" else v for k, v in winner.short_term.items()}
+            for memory in failed:
+                memory.short_term = copy.deepcopy(winner_mem)
+    else:
+        def broadcast():
+            winner_mem = winner.share_long()
+            for memory in memories:
+                memory.adopt_long(winner_mem)
+
+        def restore():
+            winner_mem = winner.share_short()
+            for memory in failed:
+                memory.restore_short(winner_mem)
+
+    def write():
+        for memory in memories:
+            memory.add_short("new segment", "")
+            memory.long_term.append({"task": "next", "result": "new entry"})
+
+    results = {}
+    for phase, fn in (("broadcast", broadcast), ("restore", restore), ("write", write)):
+        elapsed, retained = measure(fn)
+        results[f"{phase}_s"] = elapsed
+        results[f"{phase}_bytes"] = retained
+    return results
+
+
+def main(args) -> None:
+    print(f"agents={args.agents} entry_chars={args.chars} segments={args.segments}")
+    header = f"{'entries':>8} {'mode':<9} {'broadcast ms':>13} {'restore ms':>11} {'write ms':>9} {'held KiB':>9}"
+    print(header)
+    for entries in args.entries:
+        winner = build_memory(entries, args.chars, args.segments)
+        rows: Dict[str, Dict[str, float]] = {}
+        for mode in MODES:
+            runs: List[Dict[str, float]] = [run_round(mode, winner, args.agents) for _ in range(args.repeat)]
+            rows[mode] = {key: min(r[key] for r in runs) for key in runs[0]}
+            r = rows[mode]
+            held = r["broadcast_bytes"] + r["restore_bytes"] + r["write_bytes"]
+            print(
+                f"{entries:>8} {mode:<9} {r['broadcast_s'] * 1e3:>13.3f} {r['restore_s'] * 1e3:>11.3f} "
+                f"{r['write_s'] * 1e3:>9.3f} {held / 1024:>9.1f}"
+            )
+        old = rows["deepcopy"]["broadcast_s"] + rows["deepcopy"]["restore_s"]
+        new = rows["shared"]["broadcast_s"] + rows["shared"]["restore_s"]
+        print(f"{'':>8} broadcast+restore speedup: {old / max(new, 1e-9):.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=8)
+    parser.add_argument("--entries", type=int, nargs="+", default=[10, 100, 1000, 5000], help="Long-term entries in the artifact")
+    parser.add_argument("--segments", type=int, default=50, help="Short-term segments of the winner")
+    parser.add_argument("--chars", type=int, default=2000, help="Characters per entry and segment")
+    parser.add_argument("--repeat", type=int, default=3)
+    main(parser.parse_args())
@@ -0,0 +1,66 @@
+"""
+Load test of LLMClient against a stand-in server that injects 429s.
+
+Fires a burst of concurrent validator-style calls (like cros_model_val with a
+large agent pool) with and without the rate limiter and reports failures,
+429s served and wall-clock time.
+
+Run from the repository root:
+    python -m benchmarks.bench_rate_limit --requests 300 --max-in-flight 16
+"""
+import argparse
+import asyncio
+import time
+
+from clientPool import aclose_clients
+from llmClient import LLMClient
+from mockServer import start_mock_server
+from rateLimiter import reset_rate_limiters
+
+MESSAGES = [{"role": "user", "content": "validate this fragment"}]
+
+
+async def burst(client: LLMClient, requests: int):
+    results = await asyncio.gather(
+        *(client.a_chat_completion(MESSAGES) for _ in range(requests)),
+        return_exceptions=True,
+    )
+    return sum(1 for r in results if isinstance(r, Exception))
+
+
+async def main(args):
+    for rate_limit in (False, True):
+        reset_rate_limiters()
+        server = start_mock_server(
+            latency=args.latency,
+            rate_limit_rate=args.rate_limit_rate,
+            max_in_flight=args.max_in_flight,
+            retry_after=args.retry_after,
+            seed=0,
+        )
+        client = LLMClient(
+            provider="openai", api_key="sk-mock", model="mock",
+            base_url=server.base_url, rate_limit=rate_limit,
+        )
+        start = time.perf_counter()
+        failures = await burst(client, args.requests)
+        elapsed = time.perf_counter() - start
+        line = (
+            f"rate_limit={str(rate_limit):5}: failed={failures}/{args.requests} "
+            f"429s served={server.rate_limited} wall={elapsed:.2f}s"
+        )
+        if client.rate_limiter is not None:
+            line += f" final concurrency={client.rate_limiter.concurrency} stats={client.rate_limiter.stats}"
+        print(line)
+        server.shutdown()
+    await aclose_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.02)
+    parser.add_argument("--max-in-flight", type=int, default=16)
+    parser.add_argument("--retry-after", type=float, default=0.5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,139 @@
+"""
+Compare lockstep rounds (every round waits for the slowest agent) with the
+pipelined per-agent rounds of TaskExecuter and with quorum rounds (stragglers
+cancelled or carried into the next round) on the stand-in server, with one
+model much slower than the others.
+
+Each mode runs the same objectives one after another with fresh agents and the
+same server seed. By default agents never finish early and every fragment
+passes, so all modes do the same number of rounds (pass --complete-rate and
+--valid-rate to include splits). Reports total and per-objective wall-clock, agent steps,
+validator calls, decompositions and calls answered by single-flight (agents on
+the same model that are in step send identical prompts, which lockstep favours).
+
+Run from the repository root:
+    python -m benchmarks.bench_rounds --agents 6 --objectives 5 \
+        --latency lognormal:0.2,0.3 --model-latency o3-mini=lognormal:1.0,0.3
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+import task_prompt
+from agent import Agent
+from clientPool import aclose_clients
+from config import Config
+from llmClient import LLMClient
+from logPipeline import setup_logging, shutdown_logging
+from mockServer import add_server_args, server_kwargs, start_mock_server
+from singleFlight import get_single_flight
+from taskexecuter import TaskExecuter
+from telemetry import MemoryAggregator, add_sink, call_context, new_run_id, remove_sink
+
+NO_QUORUM = {"ROUND_QUORUM": None, "ROUND_STRAGGLER_FACTOR": None}
+MODES = {
+    "lockstep": {"ROUND_MODE": "lockstep", **NO_QUORUM},
+    "pipeline": {"ROUND_MODE": "pipeline", **NO_QUORUM},
+    # Quorum settings are filled in from the command line
+    "quorum": {"ROUND_MODE": "lockstep", "ROUND_STRAGGLER_POLICY": "cancel"},
+    "quorum+carry": {"ROUND_MODE": "lockstep", "ROUND_STRAGGLER_POLICY": "carry"},
+}
+MODELS = [Config.GPT_MODEL, Config.GPT_MODEL1, Config.GPT_MODEL2]
+OBJECTIVES = [value for name, value in vars(task_prompt).items() if not name.startswith("_") and isinstance(value, str)]
+
+
+async def run_mode(mode: str, args) -> Dict:
+    for attr, value in MODES[mode].items():
+        setattr(Config, attr, value)
+    if mode.startswith("quorum"):
+        Config.ROUND_QUORUM = args.quorum
+        Config.ROUND_STRAGGLER_FACTOR = args.straggler_factor
+    telemetry = add_sink(MemoryAggregator())
+    coalesced = get_single_flight().stats["coalesced"]
+    durations: List[float] = []
+    start = time.perf_counter()
+    for i in range(args.objectives):
+        agents = {
+            i: Agent(LLMClient(provider="openai", api_key="sk-mock", model=MODELS[i % len(MODELS)]), i)
+            for i in range(args.agents)
+        }
+        executor = TaskExecuter(
+            agents=agents,
+            current_task=OBJECTIVES[i % len(OBJECTIVES)],
+            max_rounds=args.max_rounds,
+            max_recursion_depth=args.max_depth,
+        )
+        began = time.perf_counter()
+        with call_context(run_id=new_run_id()):
+            await executor.branching_recursive_execution(agent_ids=list(agents.keys()))
+        durations.append(time.perf_counter() - began)
+    wall = time.perf_counter() - start
+    remove_sink(telemetry)
+    records = telemetry.records
+    return {
+        "wall": wall,
+        "mean": statistics.mean(durations),
+        "steps": sum(1 for r in records if r.phase == "step"),
+        "validations": sum(1 for r in records if r.phase == "validate"),
+        "decompositions": sum(1 for r in records if r.phase == "decompose"),
+        "cost": sum(r.cost for r in records),
+        "coalesced": get_single_flight().stats["coalesced"] - coalesced,
+    }
+
+
+async def main(args) -> None:
+    server = start_mock_server(**server_kwargs(args))
+    Config.OPENAI_BASE_URL = server.base_url
+    Config.FALLBACK_MODELS = {}
+    Config.RATE_LIMIT_DEFAULT = {"rpm": 100_000, "tpm": 100_000_000, "max_concurrency": 256}
+    # Every mode has to ask the decomposer itself
+    Config.DECOMPOSITION_CACHE_ENABLED = False
+
+    results = {}
+    for mode in MODES:
+        server.rng.seed(args.seed)
+        results[mode] = await run_mode(mode, args)
+    await aclose_clients()
+    server.shutdown()
+
+    print(
+        f"agents={args.agents} objectives={args.objectives} max_rounds={args.max_rounds} "
+        f"latency={args.latency} model_latency={args.model_latency} "
+        f"quorum={args.quorum} straggler_factor={args.straggler_factor}"
+    )
+    print(f"{'mode':<13} {'wall s':>8} {'mean s':>8} {'steps':>6} {'validate':>9} {'decomp':>7} {'coalesced':>10} {'cost $':>8}")
+    for mode, r in results.items():
+        print(
+            f"{mode:<13} {r['wall']:>8.2f} {r['mean']:>8.2f} {r['steps']:>6} {r['validations']:>9} "
+            f"{r['decompositions']:>7} {r['coalesced']:>10} {r['cost']:>8.4f}"
+        )
+    base = results["lockstep"]["wall"]
+    for mode in MODES:
+        if mode != "lockstep":
+            print(f"{mode} speedup over lockstep: {base / results[mode]['wall']:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=6)
+    parser.add_argument("--objectives", type=int, default=5)
+    parser.add_argument("--max-rounds", type=int, default=5)
+    parser.add_argument("--max-depth", type=int, default=1)
+    parser.add_argument("--quorum", type=float, default=0.67, help="ROUND_QUORUM for the quorum modes")
+    parser.add_argument("--straggler-factor", type=float, default=3.0, help="ROUND_STRAGGLER_FACTOR for the quorum modes")
+    parser.add_argument("--log-level", default="WARNING")
+    add_server_args(parser)
+    # By default no agent completes early and no fragment is rejected, so every mode runs
+    # exactly --max-rounds rounds per objective and only the scheduling differs
+    parser.set_defaults(seed=0, latency="lognormal:0.2,0.3", complete_rate=0.0, valid_rate=1.0)
+    args = parser.parse_args()
+    # One model several times slower than the others unless given explicitly
+    args.model_latency = args.model_latency or ["o3-mini=lognormal:1.0,0.3"]
+
+    setup_logging(level=args.log_level, path=None)
+    try:
+        asyncio.run(main(args))
+    finally:
+        shutdown_logging()
@@ -0,0 +1,113 @@
+"""
+Compare running decomposed subtasks one after another with running independent
+subtasks concurrently on clones of the agents (Config.SUBTASKS_PARALLEL).
+
+Every objective in task_prompt.py is run once per mode against the stand-in
+server. A low --valid-rate makes the top-level task split, and the stand-in's
+decomposer marks its subtasks independent (--subtask-deps none) or chained.
+Reports wall-clock per mode, the number of long-term entries in the final
+output (the same in both modes when every subtask produced output) and the
+speedup of the parallel mode.
+
+Run from the repository root:
+    python -m benchmarks.bench_subtasks --agents 5 --subtasks 6 --latency lognormal:0.2,0.3
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+import task_prompt
+from agent import Agent
+from clientPool import aclose_clients
+from config import Config
+from llmClient import LLMClient
+from logPipeline import setup_logging, shutdown_logging
+from mockServer import add_server_args, server_kwargs, start_mock_server
+from taskexecuter import TaskExecuter
+from telemetry import MemoryAggregator, add_sink, call_context, new_run_id, remove_sink
+
+MODES = {"sequential": False, "parallel": True}
+MODELS = [Config.GPT_MODEL, Config.GPT_MODEL1, Config.GPT_MODEL2]
+OBJECTIVES = {name: value for name, value in vars(task_prompt).items() if not name.startswith("_") and isinstance(value, str)}
+
+
+async def run_mode(mode: str, args) -> Dict:
+    Config.SUBTASKS_PARALLEL = MODES[mode]
+    telemetry = add_sink(MemoryAggregator())
+    durations: Dict[str, float] = {}
+    entries: List[int] = []
+    start = time.perf_counter()
+    for name, objective in OBJECTIVES.items():
+        agents = {
+            i: Agent(LLMClient(provider="openai", api_key="sk-mock", model=MODELS[i % len(MODELS)]), i)
+            for i in range(args.agents)
+        }
+        executor = TaskExecuter(
+            agents=agents,
+            current_task=objective,
+            max_rounds=args.max_rounds,
+            max_recursion_depth=args.max_depth,
+        )
+        began = time.perf_counter()
+        with call_context(run_id=new_run_id()):
+            await executor.branching_recursive_execution(agent_ids=list(agents.keys()))
+        durations[name] = time.perf_counter() - began
+        entries.append(len(agents[0].memory.long_term))
+    wall = time.perf_counter() - start
+    remove_sink(telemetry)
+    return {
+        "wall": wall,
+        "durations": durations,
+        "entries": statistics.mean(entries),
+        "calls": len(telemetry.records),
+        "decompositions": sum(1 for r in telemetry.records if r.phase == "decompose"),
+    }
+
+
+async def main(args) -> None:
+    server = start_mock_server(**server_kwargs(args))
+    Config.OPENAI_BASE_URL = server.base_url
+    Config.FALLBACK_MODELS = {}
+    Config.RATE_LIMIT_DEFAULT = {"rpm": 100_000, "tpm": 100_000_000, "max_concurrency": 256}
+    # Every mode has to ask the decomposer itself
+    Config.DECOMPOSITION_CACHE_ENABLED = False
+    Config.SUBTASK_MAX_CONCURRENCY = args.max_parallel
+
+    results = {}
+    for mode in MODES:
+        server.rng.seed(args.seed)
+        results[mode] = await run_mode(mode, args)
+    await aclose_clients()
+    server.shutdown()
+
+    print(
+        f"agents={args.agents} subtasks={args.subtasks} subtask_deps={args.subtask_deps} "
+        f"max_parallel={args.max_parallel} latency={args.latency}"
+    )
+    print(f"{'objective':<34} " + " ".join(f"{mode + ' s':>13}" for mode in MODES))
+    for name in OBJECTIVES:
+        print(f"{name:<34} " + " ".join(f"{results[mode]['durations'][name]:>13.2f}" for mode in MODES))
+    print(f"{'mode':<12} {'wall s':>8} {'calls':>6} {'decomp':>7} {'entries':>8}")
+    for mode, r in results.items():
+        print(f"{mode:<12} {r['wall']:>8.2f} {r['calls']:>6} {r['decompositions']:>7} {r['entries']:>8.1f}")
+    print(f"parallel speedup: {results['sequential']['wall'] / results['parallel']['wall']:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=5)
+    parser.add_argument("--max-rounds", type=int, default=2)
+    parser.add_argument("--max-depth", type=int, default=1)
+    parser.add_argument("--max-parallel", type=int, default=Config.SUBTASK_MAX_CONCURRENCY)
+    parser.add_argument("--log-level", default="ERROR")
+    add_server_args(parser)
+    parser.set_defaults(seed=0, latency="lognormal:0.2,0.3", valid_rate=0.3, subtasks=6, subtask_deps="none")
+    args = parser.parse_args()
+
+    setup_logging(level=args.log_level, path=None)
+    try:
+        asyncio.run(main(args))
+    finally:
+        shutdown_logging()
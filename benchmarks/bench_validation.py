@@ -0,0 +1,123 @@
+"""
+Compare cross-validation modes of TaskExecuter.cros_model_val on the stand-in
+server: one call per (validator, fragment), the same with early exit, and
+batched validation (one call per validator for all fragments).
+
+Every round preloads each agent with the same long-term memory (as after
+select_best) plus a fresh fragment of its own and runs one validation phase. The stand-in makes verdicts a function of the fragment
+(flipped with --verdict-noise), so the modes can be compared for agreement on
+the same inputs. Reports wall time, calls, tokens and the share of pass/fail
+decisions that match the single-call mode.
+
+Run from the repository root:
+    python -m benchmarks.bench_validation --agents 7 --rounds 10 --latency lognormal:0.3,0.6
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+from agent import Agent
+from clientPool import aclose_clients
+from config import Config
+from llmClient import LLMClient
+from mockServer import add_server_args, server_kwargs, start_mock_server
+from taskexecuter import TaskExecuter
+from telemetry import MemoryAggregator, add_sink, remove_sink
+
+MODES = {
+    "single": {"VALIDATION_MODE": "single", "VALIDATION_EARLY_EXIT": False},
+    "single+early-exit": {"VALIDATION_MODE": "single", "VALIDATION_EARLY_EXIT": True},
+    "batch": {"VALIDATION_MODE": "batch", "VALIDATION_EARLY_EXIT": False},
+    "batch+early-exit": {"VALIDATION_MODE": "batch", "VALIDATION_EARLY_EXIT": True},
+}
+MODELS = [Config.GPT_MODEL, Config.GPT_MODEL1, Config.GPT_MODEL2]
+OBJECTIVE = "Write a short technical report on maximum likelihood estimation."
+
+
+def fragment(rnd: int, agent_id: int, chars: int) -> str:
+    line = f"round {rnd} agent {agent_id}: derivation step\n"
+    return (line * (chars // len(line) + 1))[:chars]
+
+
+def shared_memory(chars: int) -> list:
+    line = "agreed result of an earlier subtask\n"
+    return [{"task": "earlier subtask", "result": (line * (chars // len(line) + 1))[:chars]}] if chars else []
+
+
+async def run_mode(name: str, args) -> Dict:
+    for attr, value in MODES[name].items():
+        setattr(Config, attr, value)
+    agents = {
+        # No single-flight: identical validator prompts would otherwise be answered once per model
+        i: Agent(LLMClient(provider="openai", api_key="sk-mock", model=MODELS[i % len(MODELS)], coalesce=False), i)
+        for i in range(args.agents)
+    }
+    executor = TaskExecuter(agents=agents, current_task=OBJECTIVE)
+    telemetry = add_sink(MemoryAggregator())
+    decisions: List[bool] = []
+    start = time.perf_counter()
+    for rnd in range(args.rounds):
+        for agent in agents.values():
+            agent.setNewTask(OBJECTIVE)
+            agent.memory.long_term = shared_memory(args.shared_chars)
+            agent.memory.add_short(fragment(rnd, agent.id, args.fragment_chars), "")
+        await executor.cros_model_val(list(agents.values()))
+        passed = executor.last_validation_stats["passed"]
+        decisions.extend(passed[aid] for aid in sorted(passed))
+    wall = time.perf_counter() - start
+    remove_sink(telemetry)
+    records = [r for r in telemetry.records if r.phase == "validate"]
+    return {
+        "wall": wall,
+        "calls": len(records),
+        "cancelled": sum(1 for r in records if r.outcome == "cancelled"),
+        "prompt_tokens": sum(r.prompt_tokens for r in records),
+        "completion_tokens": sum(r.completion_tokens for r in records),
+        "factored_tokens": sum(r.factored_tokens for r in records),
+        "decisions": decisions,
+    }
+
+
+async def main(args) -> None:
+    server = start_mock_server(**{**server_kwargs(args), "seed": args.seed})
+    Config.OPENAI_BASE_URL = server.base_url
+    Config.FALLBACK_MODELS = {}
+    Config.PROMPT_SHARED_PREFIX_ENABLED = not args.no_shared_prefix
+    # Measure the validation modes, not the client-side rate limiter
+    Config.RATE_LIMIT_DEFAULT = {"rpm": 100_000, "tpm": 100_000_000, "max_concurrency": 256}
+
+    results = {}
+    for name in MODES:
+        server.rng.seed(args.seed)
+        results[name] = await run_mode(name, args)
+    await aclose_clients()
+    server.shutdown()
+
+    baseline = results["single"]["decisions"]
+    print(
+        f"agents={args.agents} rounds={args.rounds} fragment_chars={args.fragment_chars} "
+        f"shared_chars={args.shared_chars} shared_prefix={Config.PROMPT_SHARED_PREFIX_ENABLED}"
+    )
+    print(
+        f"{'mode':<20} {'wall s':>8} {'calls':>6} {'cancel':>7} {'prompt tok':>11} "
+        f"{'factored':>9} {'compl tok':>10} {'agree':>7}"
+    )
+    for name, r in results.items():
+        agree = sum(a == b for a, b in zip(r["decisions"], baseline)) / max(1, len(baseline))
+        print(
+            f"{name:<20} {r['wall']:>8.2f} {r['calls']:>6} {r['cancelled']:>7} "
+            f"{r['prompt_tokens']:>11} {r['factored_tokens']:>9} {r['completion_tokens']:>10} {agree:>7.1%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=7)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--fragment-chars", type=int, default=2000)
+    parser.add_argument("--shared-chars", type=int, default=0, help="long-term memory shared by all agents")
+    parser.add_argument("--no-shared-prefix", action="store_true", help="repeat shared text for every candidate")
+    add_server_args(parser)
+    parser.set_defaults(verdict_noise=0.1, seed=0, latency="lognormal:0.3,0.6")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,122 @@
+"""
+Run TaskExecuter at scale against the local stand-in server (mockServer.py)
+to find orchestration bottlenecks without spending API budget.
+
+Every LLMClient (agents and TaskManager) is pointed at the stand-in through
+Config.OPENAI_BASE_URL. Reports wall-clock per objective, requests by prompt
+family, injected faults and event-loop lag (time the loop was blocked by
+synchronous work such as prompt building, logging or memory copies).
+
+Run from the repository root, e.g.:
+    python -m benchmarks.harness --agents 50 --objectives 1 --latency lognormal:0.2,0.5
+    python -m benchmarks.harness --agents 3 --objectives 100 --model-latency o3-mini=1.0 --profile
+"""
+import argparse
+import asyncio
+import cProfile
+import pstats
+import statistics
+import time
+from typing import Dict, List
+
+import task_prompt
+from agent import Agent
+from clientPool import aclose_clients
+from config import Config
+from llmClient import LLMClient
+from logPipeline import setup_logging, shutdown_logging
+from mockServer import add_server_args, server_kwargs, start_mock_server
+from taskexecuter import TaskExecuter
+from telemetry import MemoryAggregator, add_sink, call_context, new_run_id
+
+OBJECTIVES = [value for name, value in vars(task_prompt).items() if not name.startswith("_") and isinstance(value, str)]
+MODELS = [Config.GPT_MODEL, Config.GPT_MODEL1, Config.GPT_MODEL2]
+
+
+async def monitor_loop_lag(samples: List[float], interval: float = 0.01) -> None:
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+
+async def run_objective(objective: str, n_agents: int, args) -> float:
+    agents: Dict[int, Agent] = {
+        i: Agent(LLMClient(provider="openai", api_key="sk-mock", model=MODELS[i % len(MODELS)]), i)
+        for i in range(n_agents)
+    }
+    executor = TaskExecuter(
+        agents=agents,
+        current_task=objective,
+        max_rounds=args.max_rounds,
+        max_recursion_depth=args.max_depth,
+    )
+    start = time.perf_counter()
+    with call_context(run_id=new_run_id()):
+        await executor.branching_recursive_execution(agent_ids=list(agents.keys()))
+    return time.perf_counter() - start
+
+
+async def main(args) -> None:
+    server = start_mock_server(**server_kwargs(args))
+    Config.OPENAI_BASE_URL = server.base_url
+    Config.FALLBACK_MODELS = {}
+    Config.RATE_LIMIT_DEFAULT = {**Config.RATE_LIMIT_DEFAULT, "rpm": args.rpm, "max_concurrency": args.max_concurrency}
+
+    telemetry = add_sink(MemoryAggregator())
+    lag: List[float] = []
+    monitor = asyncio.create_task(monitor_loop_lag(lag))
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(run_objective(OBJECTIVES[i % len(OBJECTIVES)], args.agents, args) for i in range(args.objectives)),
+        return_exceptions=True,
+    )
+    wall = time.perf_counter() - start
+    monitor.cancel()
+    await aclose_clients()
+    server.shutdown()
+
+    durations = [r for r in results if isinstance(r, float)]
+    failures = [r for r in results if isinstance(r, BaseException)]
+    print(f"objectives={args.objectives} agents={args.agents} wall={wall:.2f}s failed={len(failures)}")
+    if durations:
+        print(
+            f"per-objective: mean={statistics.mean(durations):.2f}s "
+            f"max={max(durations):.2f}s min={min(durations):.2f}s"
+        )
+    for e in failures[:3]:
+        print(f"  failure: {type(e).__name__}: {e}")
+    print(f"server: {server.summary()}")
+    print(telemetry.report(by=("depth", "phase")))
+    if lag:
+        ordered = sorted(lag)
+        print(
+            f"event-loop lag: p50={ordered[len(ordered) // 2] * 1000:.1f}ms "
+            f"p99={ordered[int(len(ordered) * 0.99)] * 1000:.1f}ms max={ordered[-1] * 1000:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=5)
+    parser.add_argument("--objectives", type=int, default=1)
+    parser.add_argument("--max-rounds", type=int, default=3)
+    parser.add_argument("--max-depth", type=int, default=1)
+    parser.add_argument("--rpm", type=float, default=100_000)
+    parser.add_argument("--max-concurrency", type=int, default=256)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--log-file", default=None, help="also write the rotating JSON log here")
+    parser.add_argument("--profile", action="store_true", help="print the top functions by cumulative time")
+    add_server_args(parser)
+    args = parser.parse_args()
+
+    setup_logging(level=args.log_level, path=args.log_file)
+    try:
+        if args.profile:
+            profiler = cProfile.Profile()
+            profiler.runcall(asyncio.run, main(args))
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+        else:
+            asyncio.run(main(args))
+    finally:
+        shutdown_logging()
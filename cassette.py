@@ -0,0 +1,99 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class CassetteMiss(LookupError):
+    """Replay was asked for a request that is not on the cassette."""
+
+
+class Cassette:
+    """
+    Record/replay log of LLM calls, one JSON object per line:
+      {"key", "model", "messages", "content", "latency", "recorded_at"}
+
+    Record mode performs the real call and appends it. Replay mode serves
+    recorded responses by request key, in the order they were recorded for
+    identical requests, optionally sleeping for the recorded latency.
+    """
+
+    def __init__(self, path: str, mode: str, replay_latency: bool = False):
+        if mode not in ("record", "replay"):
+            raise ValueError("Cassette mode must be 'record' or 'replay'.")
+        self.path = path
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self._lock = threading.Lock()
+        self._tapes: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self.stats: Dict[str, float] = {"calls": 0, "llm_seconds": 0.0}
+
+        if mode == "replay":
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._tapes[entry["key"]].append(entry)
+            logger.info(f"Replaying {sum(len(t) for t in self._tapes.values())} recorded calls from {path}")
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _next(self, key: str) -> Dict[str, Any]:
+        tape = self._tapes.get(key)
+        if not tape:
+            raise CassetteMiss(f"No recorded response for request {key[:12]}")
+        # The last recording for a key keeps being served once the others are used up
+        return tape.popleft() if len(tape) > 1 else tape[0]
+
+    async def replay(self, key: str) -> str:
+        self.stats["calls"] += 1
+        entry = self._next(key)
+        self.stats["llm_seconds"] += entry["latency"]
+        if self.replay_latency:
+            await asyncio.sleep(entry["latency"])
+        return entry["content"]
+
+    async def record(self, key: str, params: Dict[str, Any], content: str, latency: float) -> None:
+        self.stats["calls"] += 1
+        self.stats["llm_seconds"] += latency
+        entry = {
+            "key": key,
+            "model": params.get("model"),
+            "messages": params.get("messages"),
+            "content": content,
+            "latency": latency,
+            "recorded_at": time.time(),
+        }
+        await asyncio.to_thread(self._append, entry)
+
+    async def play(self, key: str, params: Dict[str, Any], call: Callable[[], Awaitable[str]]) -> str:
+        """Serve `params` from the cassette (replay) or via `call` while recording it."""
+        if self.mode == "replay":
+            return await self.replay(key)
+        start = time.perf_counter()
+        content = await call()
+        await self.record(key, params, content, time.perf_counter() - start)
+        return content
+
+
+_default_cassette: Optional[Cassette] = None
+
+
+def get_default_cassette() -> Optional[Cassette]:
+    """The process-wide cassette configured by Config.CASSETTE_MODE, or None."""
+    global _default_cassette
+    if _default_cassette is None and Config.CASSETTE_MODE:
+        _default_cassette = Cassette(Config.CASSETTE_PATH, Config.CASSETTE_MODE, Config.CASSETTE_REPLAY_LATENCY)
+    return _default_cassette
@@ -0,0 +1,273 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+import weakref
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from config import Config
+from segmentStore import CowList, Snapshot, publish
+
+logger = logging.getLogger(__name__)
+
+# Chain hash of an empty list
+EMPTY_HASH = ""
+
+
+class ResumeMismatch(ValueError):
+    """The run being resumed was started for a different objective or agent set."""
+
+
+class RunJournal:
+    """
+    Durable checkpoints of one run's execution tree in a local SQLite file.
+
+    Every checkpoint is a new row (the journal is append-only); the state of a
+    node of the recursion tree ("0", "0/2", "0/2/1", ...) is its latest row:
+      - "round":       lockstep round finished (round counter, split decision)
+      - "agent_round": pipelined agent round finished (per-agent round counters)
+      - "split":       decomposition obtained, subtasks about to run
+      - "done":        node finished and the winner was given to every agent
+    Rows carry every agent's status and memory. A memory list is referenced by a
+    chain hash over its entries and stored incrementally: each stored list row
+    holds only the entries appended after its parent (an already stored prefix),
+    so a round that adds one segment writes one segment, and lists shared by
+    several agents are written once.
+
+    With resume=True the states committed by earlier attempts of the run are
+    loaded, and TaskExecuter continues each node from them instead of repeating
+    the LLM calls that produced them.
+    """
+
+    def __init__(self, run_id: str, path: str = Config.CHECKPOINT_PATH, resume: bool = False):
+        """
+        :param run_id: Run whose rows are read and written.
+        :param path: SQLite file holding the journals of all runs.
+        :param resume: Load the states committed by earlier attempts of `run_id`.
+        """
+        self.run_id = run_id
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS journal ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT NOT NULL, node TEXT NOT NULL,"
+            " kind TEXT NOT NULL, state TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS journal_run ON journal(run_id, node, seq)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS lists ("
+            " run_id TEXT NOT NULL, hash TEXT NOT NULL, parent TEXT, items TEXT NOT NULL,"
+            " PRIMARY KEY (run_id, hash))"
+        )
+        self._db.commit()
+        # One writer thread keeps rows in commit order and off the event loop
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+        # (chain hash of a prefix, id(entry)) -> (entry, chain hash with the entry appended).
+        # Holding the entry keeps its id from being reused while the journal is open.
+        self._chain: Dict[Tuple[str, int], Tuple[Any, str]] = {}
+        self._versions: Dict[int, str] = {}         # snapshot version -> chain hash
+        # id(CowList) -> (weak reference, edits, length, chain hash, stored prefix hash, its length)
+        self._tracked: Dict[int, Tuple[Any, int, int, str, str, int]] = {}
+        self._snapshots: Dict[str, Snapshot] = {}   # chain hash -> restored snapshot, shared by agents
+        self._pending: List[Tuple[str, Optional[str], str]] = []  # list rows not written yet
+        self._known: Set[str] = {EMPTY_HASH}        # chain hashes stored or pending
+        self._resumed: Dict[str, Dict[str, Any]] = {}
+        self.stats: Dict[str, int] = {"commits": 0, "list_rows": 0, "entries_written": 0, "resumed_nodes": 0}
+        if resume:
+            self._resumed = self._load()
+            if not self._resumed:
+                raise ValueError(f"No checkpoints found for run {run_id} in {path}")
+            logger.info(f"Resuming run {run_id}: {len(self._resumed)} checkpointed nodes in {path}")
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        rows = self._db.execute(
+            "SELECT node, kind, state FROM journal WHERE run_id = ? ORDER BY seq", (self.run_id,)
+        ).fetchall()
+        latest = {}
+        for node, kind, state in rows:
+            latest[node] = {"kind": kind, **json.loads(state)}
+        stored = self._db.execute("SELECT hash FROM lists WHERE run_id = ?", (self.run_id,)).fetchall()
+        self._known.update(digest for digest, in stored)
+        return latest
+
+    def begin(self, meta: Dict[str, Any]) -> None:
+        """
+        Record what the run executes, or on resume check that it is the same
+        (objective, round and depth limits, agent models). A new run also prunes
+        the journal down to the Config.CHECKPOINT_KEEP_RUNS most recent runs.
+        """
+        saved = self._resumed.get("run")
+        if saved is not None:
+            changed = [k for k, v in meta.items() if saved.get(k) != v]
+            if changed:
+                raise ResumeMismatch(f"Run {self.run_id} was started with different {', '.join(changed)}")
+            return
+        self._writer.submit(self._write, "run", "run", json.dumps(meta, ensure_ascii=False), []).result()
+        if Config.CHECKPOINT_KEEP_RUNS is not None:
+            self._writer.submit(self._prune, Config.CHECKPOINT_KEEP_RUNS).result()
+
+    def latest(self, node: str) -> Optional[Dict[str, Any]]:
+        """The last state an earlier attempt committed for `node`, if any."""
+        state = self._resumed.get(node)
+        if state is not None:
+            self.stats["resumed_nodes"] += 1
+        return state
+
+    # -- agent state ---------------------------------------------------------
+
+    def _list(self, entries: Union[CowList, Snapshot]) -> str:
+        """
+        Chain hash of a memory list, queuing a row with the entries after its
+        longest already stored prefix. Reads the list in place: a CowList is not
+        snapshotted, so capturing never makes its next append copy it. A CowList
+        that only grew since its last capture is hashed from where that left off.
+        """
+        version = entries.version
+        items = entries.items if isinstance(entries, Snapshot) else entries
+        digest = self._versions.get(version) if version is not None else None
+        if digest is not None:
+            return digest
+        begin, digest, parent, start = 0, EMPTY_HASH, EMPTY_HASH, 0
+        tracked = self._tracked.get(id(entries)) if isinstance(entries, CowList) else None
+        if tracked is not None and tracked[0]() is entries and tracked[1] == entries.edits and tracked[2] <= len(items):
+            _, _, begin, digest, parent, start = tracked
+        for i in range(begin, len(items)):
+            entry = items[i]
+            link = self._chain.get((digest, id(entry)))
+            if link is None or link[0] is not entry:
+                data = json.dumps(entry, ensure_ascii=False)
+                link = self._chain[(digest, id(entry))] = (
+                    entry, hashlib.sha256(f"{digest}\n{data}".encode("utf-8")).hexdigest()
+                )
+            digest = link[1]
+            if digest in self._known:
+                parent, start = digest, i + 1
+        if digest not in self._known:
+            # Written by the next commit, ahead of the row that refers to it
+            new = json.dumps([items[i] for i in range(start, len(items))], ensure_ascii=False)
+            self._pending.append((digest, None if parent == EMPTY_HASH else parent, new))
+            self._known.add(digest)
+            self.stats["entries_written"] += len(items) - start
+            parent, start = digest, len(items)
+        if version is not None:
+            self._versions[version] = digest
+        if isinstance(entries, CowList):
+            key = id(entries)
+            ref = tracked[0] if tracked is not None and tracked[0]() is entries else \
+                weakref.ref(entries, lambda _, key=key: self._tracked.pop(key, None))
+            self._tracked[key] = (ref, entries.edits, len(items), digest, parent, start)
+        return digest
+
+    def capture_short(self, short: Dict[str, Any]) -> Dict[str, Any]:
+        """Short-term memory (Memory.short_term or a share_short() snapshot) as a journal value."""
+        return {"task": short["task"], "segments": self._list(short["segments"]), "justify": self._list(short["justify"])}
+
+    def capture_agent(self, agent) -> Dict[str, Any]:
+        """Status and memory of `agent` as a journal value."""
+        memory = agent.memory
+        return {
+            "status": agent.status,
+            "long": self._list(memory.long_term),
+            "task": memory.short_term.get("task"),
+            "segments": self._list(memory._short_list("segments")),
+            "justify": self._list(memory._short_list("justify")),
+        }
+
+    def capture_agents(self, agents: Dict[int, Any]) -> Dict[str, Dict[str, Any]]:
+        return {str(aid): self.capture_agent(agent) for aid, agent in agents.items()}
+
+    def _read_list(self, digest: str) -> List[Any]:
+        """Entries of a stored list, following its parents. Runs on the journal thread."""
+        parts = []
+        while digest is not None and digest != EMPTY_HASH:
+            row = self._db.execute(
+                "SELECT parent, items FROM lists WHERE run_id = ? AND hash = ?", (self.run_id, digest)
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"Checkpointed list {digest[:12]} is missing from {self.path}")
+            digest, items = row
+            parts.append(json.loads(items))
+        return [entry for part in reversed(parts) for entry in part]
+
+    def _snapshot(self, digest: str) -> Snapshot:
+        snapshot = self._snapshots.get(digest)
+        if snapshot is None:
+            # Through the journal thread, which owns the connection once writes start
+            items = self._writer.submit(self._read_list, digest).result()
+            snapshot = self._snapshots[digest] = publish(items)
+            self._versions[snapshot.version] = digest
+        return snapshot
+
+    def restore_short(self, saved: Dict[str, Any]) -> Dict[str, Any]:
+        """The Memory.share_short() snapshot captured by capture_short."""
+        return {"task": saved["task"], "segments": self._snapshot(saved["segments"]), "justify": self._snapshot(saved["justify"])}
+
+    def restore_agents(self, agents: Dict[int, Any], saved: Dict[str, Dict[str, Any]]) -> None:
+        """Put back the status and memory capture_agents recorded (keyed by str(agent id))."""
+        for aid, agent in agents.items():
+            state = saved.get(str(aid))
+            if state is None:
+                continue
+            agent.memory.adopt_long(self._snapshot(state["long"]))
+            agent.memory.restore_short(self.restore_short(state))
+            agent.status = state["status"]
+
+    # -- writing -------------------------------------------------------------
+
+    def _write(self, node: str, kind: str, state: str, lists: List[Tuple[str, Optional[str], str]]) -> None:
+        if lists:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO lists (run_id, hash, parent, items) VALUES (?, ?, ?, ?)",
+                [(self.run_id, digest, parent, items) for digest, parent, items in lists],
+            )
+        self._db.execute(
+            "INSERT INTO journal (run_id, node, kind, state, created) VALUES (?, ?, ?, ?, ?)",
+            (self.run_id, node, kind, state, time.time()),
+        )
+        self._db.commit()
+
+    def _prune(self, keep: int) -> None:
+        old = [run_id for run_id, *_ in _runs(self._db)[keep:]]
+        if not old:
+            return
+        marks = ",".join("?" * len(old))
+        self._db.execute(f"DELETE FROM journal WHERE run_id IN ({marks})", old)
+        self._db.execute(f"DELETE FROM lists WHERE run_id IN ({marks})", old)
+        self._db.commit()
+        logger.info(f"Pruned checkpoints of {len(old)} old runs from {self.path}")
+
+    async def commit(self, node: str, kind: str, state: Dict[str, Any]) -> None:
+        """
+        Append a checkpoint for `node`. `state` is JSON-serializable, with agents
+        and memory captured by capture_agents/capture_short just before. The write
+        happens on the journal thread and is durable when this returns.
+        """
+        lists, self._pending = self._pending, []
+        self.stats["commits"] += 1
+        self.stats["list_rows"] += len(lists)
+        data = json.dumps(state, ensure_ascii=False)
+        await asyncio.get_running_loop().run_in_executor(self._writer, self._write, node, kind, data, lists)
+
+    def close(self) -> None:
+        self._writer.shutdown(wait=True)
+        self._db.close()
+
+
+def _runs(db: sqlite3.Connection) -> List[Tuple[str, int, float]]:
+    return db.execute(
+        "SELECT run_id, COUNT(*), MAX(created) FROM journal GROUP BY run_id ORDER BY MAX(created) DESC"
+    ).fetchall()
+
+
+def list_runs(path: str = Config.CHECKPOINT_PATH) -> List[Tuple[str, int, float]]:
+    """(run_id, checkpoints, time of the last one) for every run in the journal, newest first."""
+    if not os.path.exists(path):
+        return []
+    with closing(sqlite3.connect(path)) as db:
+        return _runs(db)
@@ -0,0 +1,92 @@
+import atexit
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import httpx
+from openai import OpenAI, AsyncOpenAI
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ClientPool:
+    """
+    Process-wide registry of OpenAI clients keyed by (provider, base_url, api_key).
+
+    Every registered client shares one sync and one async httpx transport, so all
+    LLMClient instances reuse the same keep-alive connection pool instead of
+    opening a fresh pool (and TLS handshake) per instance.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = Config.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections: int = Config.HTTP_MAX_KEEPALIVE,
+        keepalive_expiry: float = Config.HTTP_KEEPALIVE_EXPIRY,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._lock = threading.Lock()
+        self._http: Optional[httpx.Client] = None
+        self._a_http: Optional[httpx.AsyncClient] = None
+        self._clients: Dict[Tuple[str, Optional[str], str], Tuple[OpenAI, AsyncOpenAI]] = {}
+
+    def _transports(self) -> Tuple[httpx.Client, httpx.AsyncClient]:
+        if self._http is None:
+            self._http = httpx.Client(limits=self.limits, timeout=None)
+        if self._a_http is None:
+            self._a_http = httpx.AsyncClient(limits=self.limits, timeout=None)
+        return self._http, self._a_http
+
+    def get(self, provider: str, base_url: Optional[str], api_key: str) -> Tuple[OpenAI, AsyncOpenAI]:
+        """Return the (sync, async) client pair for this endpoint, creating it once."""
+        key = (provider, base_url, api_key)
+        with self._lock:
+            pair = self._clients.get(key)
+            if pair is None:
+                http, a_http = self._transports()
+                pair = (
+                    OpenAI(api_key=api_key, base_url=base_url, http_client=http),
+                    AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=a_http),
+                )
+                self._clients[key] = pair
+                logger.info(f"Registered shared client for {provider} ({base_url or 'default'})")
+            return pair
+
+    def close(self) -> None:
+        """Close the sync transport and forget all registered clients."""
+        with self._lock:
+            if self._http is not None:
+                self._http.close()
+                self._http = None
+            self._clients.clear()
+
+    async def aclose(self) -> None:
+        """Close both transports. Call from the running event loop before it exits."""
+        a_http = self._a_http
+        self._a_http = None
+        if a_http is not None:
+            await a_http.aclose()
+        self.close()
+
+
+_pool = ClientPool()
+atexit.register(_pool.close)
+
+
+def get_clients(provider: str, base_url: Optional[str], api_key: str) -> Tuple[OpenAI, AsyncOpenAI]:
+    """Look up the shared (sync, async) OpenAI clients for an endpoint."""
+    return _pool.get(provider, base_url, api_key)
+
+
+def get_async_client(provider: str, base_url: Optional[str], api_key: str) -> AsyncOpenAI:
+    return _pool.get(provider, base_url, api_key)[1]
+
+
+async def aclose_clients() -> None:
+    """Close the shared connection pool; safe to call more than once."""
+    await _pool.aclose()
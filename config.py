@@ -1,3 +1,4 @@
+import os
 from prompt import *
 
 class Config:
@@ -13,6 +14,149 @@ class Config:
 
     TEMPERATURE: float = 0
 
+    # Per-call HTTP timeout (seconds) and optional whole-run deadline for main.py
+    LLM_CALL_TIMEOUT: float = 300.0
+    RUN_DEADLINE: float = None
+
+    OPENAI_BASE_URL: str = os.environ.get("OPENAI_BASE_URL") or None  # e.g. a local mockServer
+    OPEN_ROUTER_API_KEY: str = os.environ.get("OPENROUTER_API_KEY", "")
+    OPEN_ROUTER_MODEL: str = "meta-llama/llama-3.1-8b-instruct:free"
+    OPEN_ROUTER_BASE_URL: str = "https://openrouter.ai/api/v1"
+
+    # Equivalent endpoints used for hedging and failover, per primary model (see LLMClient.fallbacks).
+    # Answers from a fallback are credited to the agent's model, so only list the same model served
+    # elsewhere, e.g. {"o4-mini": [{"provider": "openrouter", "model": "openai/o4-mini"}]}
+    FALLBACK_MODELS: dict = {}
+    HEDGE_ENABLED: bool = False
+    HEDGE_PERCENTILE: float = 95
+    HEDGE_WINDOW: int = 200          # latency samples kept per model
+    HEDGE_MIN_SAMPLES: int = 20      # below this, wait HEDGE_INITIAL_DELAY before hedging
+    HEDGE_INITIAL_DELAY: float = 120.0
+    HEDGE_MIN_DELAY: float = 5.0
+
+    # Shared HTTP connection pool used by every LLMClient (see clientPool.py)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+
+    # Response cache for LLMClient.a_chat_completion (see responseCache.py), opt-in
+    RESPONSE_CACHE_ENABLED: bool = False
+    RESPONSE_CACHE_PATH: str = ".cache/responses.sqlite"
+    RESPONSE_CACHE_MEMORY_ENTRIES: int = 1024
+    RESPONSE_CACHE_DISK_MAX_BYTES: int = 512 * 1024 * 1024
+    RESPONSE_CACHE_TTL: float = 7 * 24 * 3600
+
+    # Top-level decompositions reused across runs (see decompositionCache.py). Off by default: a run
+    # splits its top level once, so the cache only pays off with a file that earlier runs or the prewarm
+    # CLI filled. To use it, prewarm and set DECOMPOSITION_CACHE_PATH = ".cache/decompositions.sqlite"
+    DECOMPOSITION_CACHE_ENABLED: bool = False
+    DECOMPOSITION_CACHE_PATH: str = None
+    DECOMPOSITION_CACHE_MEMORY_ENTRIES: int = 256
+    DECOMPOSITION_CACHE_DISK_MAX_BYTES: int = 64 * 1024 * 1024
+    DECOMPOSITION_CACHE_TTL: float = 7 * 24 * 3600
+
+    # Checkpoint journal of main.py runs, resumable with --resume RUN_ID (see checkpoint.py). Written
+    # only for runs started with --checkpoint, or for every run when CHECKPOINT_ENABLED is set.
+    # Starting a run keeps only the CHECKPOINT_KEEP_RUNS most recent journals.
+    CHECKPOINT_ENABLED: bool = False
+    CHECKPOINT_PATH: str = ".cache/checkpoints.sqlite"
+    CHECKPOINT_KEEP_RUNS: int = 10
+
+    # Share one request between identical concurrent deterministic calls (see singleFlight.py)
+    SINGLE_FLIGHT_ENABLED: bool = True
+
+    # Per (provider, model) rate limiting in LLMClient (see rateLimiter.py). Off by default: the
+    # limits below are placeholders, and with the SDK's retries off a TPM limit lower than the
+    # account's throttles the large validator prompts of a run. Set RATE_LIMITS to the deployment's
+    # real limits before enabling it.
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMIT_DEFAULT: dict = {"rpm": 500, "tpm": 200_000, "max_concurrency": 32}
+    RATE_LIMITS: dict = {}  # per-model overrides, e.g. {"o3-mini": {"rpm": 100}}
+    RATE_LIMIT_MAX_RETRIES: int = 5
+    RATE_LIMIT_BASE_BACKOFF: float = 1.0
+    RATE_LIMIT_MAX_BACKOFF: float = 60.0
+    RATE_LIMIT_COMPLETION_ESTIMATE: int = 2048
+    # Retries of connection errors, timeouts and 5xx responses while rate limiting is on
+    # (the SDK's own retries are turned off so that 429s reach the limiter)
+    TRANSIENT_MAX_RETRIES: int = 2
+    TRANSIENT_BASE_BACKOFF: float = 0.5
+    TRANSIENT_MAX_BACKOFF: float = 8.0
+
+    # Prompt token budgets for Agent prompts (see promptBudget.py)
+    PROMPT_BUDGET_ENABLED: bool = True
+    PROMPT_BUDGET_DEFAULT: dict = {"context": 200_000, "output_reserve": 40_000, "max_prompt_tokens": 120_000}
+    PROMPT_BUDGETS: dict = {}  # per-model overrides
+
+    # Record/replay every LLM call to a cassette file (see cassette.py): "record", "replay" or None
+    CASSETTE_MODE: str = os.environ.get("LLM_CASSETTE_MODE") or None
+    CASSETTE_PATH: str = os.environ.get("LLM_CASSETTE_PATH", "cassettes/run.jsonl")
+    CASSETTE_REPLAY_LATENCY: bool = os.environ.get("LLM_CASSETTE_REPLAY_LATENCY", "") == "1"
+
+    # "lockstep": each round waits for every agent before validating; "pipeline": each agent
+    # generates, is validated and moves to its next round on its own (see TaskExecuter._pipelined_rounds)
+    ROUND_MODE: str = "lockstep"
+
+    # Lockstep rounds: continue once ROUND_QUORUM (fraction) of the agents have answered, and/or
+    # cut stragglers off ROUND_STRAGGLER_FACTOR x the first responder's latency into the round.
+    # Stragglers are "cancel"led (retry next round) or "carry" on into the next round. None = wait for all.
+    ROUND_QUORUM: float = None
+    ROUND_STRAGGLER_FACTOR: float = None
+    ROUND_STRAGGLER_POLICY: str = "cancel"
+
+    # Decompose in the background before a split is needed: None (off), "start" (at round 0) or
+    # "threshold" (once this share of a round's fragments failed validation); unused results are discarded
+    SPECULATIVE_DECOMPOSITION: str = None
+    SPECULATIVE_DECOMPOSITION_THRESHOLD: float = 0.5
+
+    # Run subtasks whose depends_on lists allow it concurrently, each on a clone of the agents
+    SUBTASKS_PARALLEL: bool = True
+    SUBTASK_MAX_CONCURRENCY: int = 4
+
+    # Cancel a fragment's outstanding validator calls once its majority is decided
+    VALIDATION_EARLY_EXIT: bool = True
+    # "single": one validator call per (validator, fragment); "batch": one call per validator for all fragments
+    VALIDATION_MODE: str = "single"
+
+    # Send the text shared by all vote/batch-validation candidates once instead of per candidate
+    PROMPT_SHARED_PREFIX_ENABLED: bool = True
+    PROMPT_SHARED_PREFIX_MIN_CHARS: int = 200
+
+    # Local syntax check chosen from the objective's "Output Format:" line (python, html, latex),
+    # run in a process pool before the LLM validators (see preValidation.py)
+    PRE_VALIDATION_ENABLED: bool = True
+    PRE_VALIDATION_WORKERS: int = 2
+
+    # Skip the select_best vote when more than CONSENSUS_MAJORITY of the candidates are identical
+    # or within CONSENSUS_THRESHOLD Jaccard similarity of word CONSENSUS_SHINGLE_SIZE-shingles
+    CONSENSUS_ENABLED: bool = True
+    CONSENSUS_THRESHOLD: float = 0.9
+    CONSENSUS_SHINGLE_SIZE: int = 5
+    CONSENSUS_MAJORITY: float = 0.5
+
+    # Stream Agent.step_async responses and parse fields incrementally
+    STREAM_STEPS: bool = False
+
+    # Logging (see logPipeline.py): JSON lines written by a background thread
+    LOG_LEVEL: str = "INFO"
+    LOG_PATH: str = "app.log"
+    LOG_MAX_BYTES: int = 50 * 1024 * 1024  # rotate, gzip-compressing the old file
+    LOG_BACKUP_COUNT: int = 10
+    LOG_CONSOLE_JSON: bool = False
+    # Prompts/responses logged at INFO are cut to this many characters, except a sampled fraction
+    LOG_PAYLOAD_MAX_CHARS: int = 2000
+    LOG_PAYLOAD_SAMPLE_RATE: float = 0.01
+
+    # Per-call LLM telemetry (see telemetry.py): any of "memory", "jsonl", "prometheus"
+    TELEMETRY_SINKS: list = ["memory"]
+    TELEMETRY_JSONL_PATH: str = "telemetry/calls.jsonl"
+    TELEMETRY_PROMETHEUS_PATH: str = "telemetry/llm.prom"
+    # USD per million tokens, used for cost estimates; unlisted models are reported at $0
+    MODEL_PRICES: dict = {
+        "o4-mini": {"input": 1.10, "cached_input": 0.275, "output": 4.40},
+        "o4-mini-2025-04-16": {"input": 1.10, "cached_input": 0.275, "output": 4.40},
+        "o3-mini": {"input": 1.10, "cached_input": 0.55, "output": 4.40},
+    }
+
 
 
 
@@ -0,0 +1,141 @@
+import hashlib
+import heapq
+import logging
+from collections import defaultdict
+from typing import Dict, FrozenSet, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Process-wide counters: select_best calls seen, and how many were decided locally
+# by identical candidates or by a near-duplicate cluster instead of an LLM vote.
+STATS: Dict[str, int] = {"selections": 0, "exact": 0, "clustered": 0}
+
+# Bottom-k MinHash sketch size, and how far below the threshold a sketch estimate
+# may fall before the exact similarity is no longer worth computing
+SKETCH_SIZE = 128
+SKETCH_MARGIN = 0.15
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def shingles(text: str, k: int) -> FrozenSet[int]:
+    """Hashed word k-shingles of `text` (the whole text as one shingle if it is shorter)."""
+    words = text.split()
+    if len(words) <= k:
+        return frozenset((hash(tuple(words)),))
+    return frozenset(hash(tuple(words[i:i + k])) for i in range(len(words) - k + 1))
+
+
+def jaccard(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def sketch(shingle_set: FrozenSet[int], size: int = SKETCH_SIZE) -> FrozenSet[int]:
+    """Bottom-k MinHash sketch: the `size` smallest shingle hashes."""
+    return frozenset(heapq.nsmallest(size, shingle_set))
+
+
+def estimate_jaccard(a: FrozenSet[int], b: FrozenSet[int], size: int = SKETCH_SIZE) -> float:
+    """Jaccard similarity estimated from two bottom-k sketches."""
+    union = heapq.nsmallest(size, a | b)
+    if not union:
+        return 1.0
+    return sum(1 for h in union if h in a and h in b) / len(union)
+
+
+def local_consensus(
+    candidates: List[str],
+    threshold: float = None,
+    k: int = None,
+    majority: float = None,
+) -> Optional[int]:
+    """
+    Pick a winner among `candidates` without an LLM when most of them agree.
+
+    1. Exact match: candidates are grouped by a hash of their whitespace-normalised
+       text; a group holding more than `majority` of all candidates wins outright.
+    2. Near-duplicates: candidates whose word-shingle Jaccard similarity is at least
+       `threshold` are linked, and linked candidates form clusters. If one cluster
+       holds more than `majority` of all candidates, its medoid (the member most
+       similar to the rest of the cluster) wins. Pairs are first compared by their
+       MinHash sketches; only pairs estimated near the threshold get the exact value.
+
+    Returns the index of the winner, or None when the candidates really diverge
+    and an LLM vote is needed. CPU-bound; select_best runs it in a worker thread.
+    """
+    threshold = Config.CONSENSUS_THRESHOLD if threshold is None else threshold
+    k = Config.CONSENSUS_SHINGLE_SIZE if k is None else k
+    majority = Config.CONSENSUS_MAJORITY if majority is None else majority
+    n = len(candidates)
+    STATS["selections"] += 1
+    if n == 0:
+        return None
+
+    groups: Dict[str, List[int]] = defaultdict(list)
+    for i, text in enumerate(candidates):
+        groups[hashlib.sha1(_normalize(text).encode("utf-8")).hexdigest()].append(i)
+    largest = max(groups.values(), key=len)
+    if len(largest) > majority * n:
+        STATS["exact"] += 1
+        logger.info(f"Consensus: {len(largest)}/{n} candidates identical, skipping vote")
+        return largest[0]
+
+    # Compare one representative per exact group; members share its similarities
+    reps = [members[0] for members in groups.values()]
+    sets = {i: shingles(candidates[i], k) for i in reps}
+    sketches = {i: sketch(sets[i]) for i in reps}
+    sim: Dict[tuple, float] = {}
+    parent = {i: i for i in reps}
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for x, i in enumerate(reps):
+        for j in reps[x + 1:]:
+            s = estimate_jaccard(sketches[i], sketches[j])
+            if s >= threshold - SKETCH_MARGIN:
+                s = jaccard(sets[i], sets[j])
+            sim[i, j] = sim[j, i] = s
+            if s >= threshold:
+                parent[find(i)] = find(j)
+
+    clusters: Dict[int, List[int]] = defaultdict(list)
+    for members in groups.values():
+        clusters[find(members[0])].extend(members)
+    cluster = max(clusters.values(), key=len)
+    if len(cluster) <= majority * n:
+        logger.info(
+            f"Consensus: largest cluster {len(cluster)}/{n} at similarity {threshold}, voting needed"
+        )
+        return None
+
+    rep_of = {i: members[0] for members in groups.values() for i in members}
+
+    def affinity(i: int) -> float:
+        return sum(1.0 if rep_of[i] == rep_of[j] else sim[rep_of[i], rep_of[j]] for j in cluster if j != i)
+
+    medoid = max(sorted(cluster), key=affinity)
+    STATS["clustered"] += 1
+    logger.info(
+        f"Consensus: {len(cluster)}/{n} candidates within similarity {threshold}, "
+        f"picked medoid {medoid} and skipped vote"
+    )
+    return medoid
+
+
+def consensus_summary() -> str:
+    selections = STATS["selections"] or 1
+    skipped = STATS["exact"] + STATS["clustered"]
+    return (
+        f"selections={STATS['selections']} votes skipped={skipped} ({skipped / selections:.1%}): "
+        f"identical={STATS['exact']} near-duplicate={STATS['clustered']}"
+    )
@@ -0,0 +1,68 @@
+import asyncio
+import time
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when work is cut off by a run-level Deadline."""
+
+
+class Deadline:
+    """
+    Absolute point in time by which a whole run must finish.
+
+    Passed down through the executor, agents and task manager; LLM calls clamp
+    their HTTP timeout to what is left, and orchestration phases are cancelled
+    when it expires.
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        """:param seconds: Budget from now, or None for no deadline."""
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), or None if unbounded."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def clamp(self, timeout: Optional[float]) -> Optional[float]:
+        """The tighter of a per-call timeout and the time left on this deadline."""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if timeout is None:
+            return remaining
+        return min(timeout, remaining)
+
+    def check(self) -> None:
+        if self.expired():
+            raise DeadlineExceeded("run deadline exceeded")
+
+
+async def within(deadline: Optional[Deadline], awaitable: Awaitable[T]) -> T:
+    """
+    Await `awaitable`, cancelling it (and everything it gathers) if the deadline
+    expires first. Raises DeadlineExceeded in that case.
+    """
+    if deadline is None or deadline.expires_at is None:
+        return await awaitable
+    if deadline.expired():
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        elif asyncio.isfuture(awaitable):
+            awaitable.cancel()
+        raise DeadlineExceeded("run deadline exceeded")
+    try:
+        return await asyncio.wait_for(awaitable, deadline.remaining())
+    except asyncio.TimeoutError as e:
+        if isinstance(e, DeadlineExceeded):
+            raise
+        if deadline.expired():
+            raise DeadlineExceeded("run deadline exceeded") from e
+        raise
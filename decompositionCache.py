@@ -0,0 +1,218 @@
+"""
+Cache of task decompositions, keyed by the normalized task text, the decomposer
+model and the decomposer prompt. The top-level split of an objective reuses the
+stored subtask list instead of asking the decomposer again; splits below it
+(after a subtask failed) always draw a fresh decomposition.
+
+The cache is off by default: each run splits its top level only once, so
+entries are only ever reused from a disk file shared between runs. Pre-warm it
+for every objective in task_prompt.py from the repository root:
+    python -m decompositionCache --concurrency 4 --path .cache/decompositions.sqlite
+then set Config.DECOMPOSITION_CACHE_ENABLED and point Config.DECOMPOSITION_CACHE_PATH
+at the same file.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from responseCache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_task(text: str) -> str:
+    """Task text with runs of whitespace collapsed, so re-indented prompts share an entry."""
+    return _WHITESPACE.sub(" ", text or "").strip()
+
+
+def prompt_version(system_prompt: str) -> str:
+    """Short fingerprint of the decomposer prompt; editing the prompt invalidates old entries."""
+    return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:12]
+
+
+def decomposition_key(task: str, model: str, system_prompt: str) -> str:
+    payload = json.dumps(
+        {"task": normalize_task(task), "model": model, "prompt": prompt_version(system_prompt)},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DecompositionCache:
+    """
+    Decompositions stored as JSON in a two-tier ResponseCache (memory LRU in
+    front of a SQLite file). Only decompositions with at least one subtask are
+    stored, so a malformed answer is asked for again next time.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = Config.DECOMPOSITION_CACHE_PATH,
+        memory_entries: int = Config.DECOMPOSITION_CACHE_MEMORY_ENTRIES,
+        ttl: Optional[float] = Config.DECOMPOSITION_CACHE_TTL,
+    ):
+        """
+        :param path: SQLite file for the disk tier, or None for memory only.
+        :param memory_entries: Maximum number of decompositions kept in memory.
+        :param ttl: Seconds before an entry expires, or None to never expire.
+        """
+        self.store = ResponseCache(
+            path=path,
+            memory_entries=memory_entries,
+            disk_max_bytes=Config.DECOMPOSITION_CACHE_DISK_MAX_BYTES,
+            ttl=ttl,
+        )
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return self.store.stats
+
+    def hit_rate(self) -> float:
+        return self.store.hit_rate()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """A fresh copy of the cached decomposition for `key`, or None on a miss."""
+        cached = await self.store.aget(key)
+        if cached is None:
+            return None
+        try:
+            return json.loads(cached)
+        except json.JSONDecodeError:
+            logger.warning(f"Dropping unreadable cached decomposition {key[:12]}")
+            return None
+
+    async def put(self, key: str, decomposition: Dict[str, Any]) -> bool:
+        """Store `decomposition` if it has subtasks. Returns whether it was stored."""
+        if not isinstance(decomposition, dict) or not decomposition.get("subtasks"):
+            return False
+        await self.store.aput(key, json.dumps(decomposition, ensure_ascii=False))
+        return True
+
+    def delete(self, key: str) -> None:
+        self.store.delete(key)
+
+    def clear(self) -> None:
+        self.store.clear()
+
+    def close(self) -> None:
+        self.store.close()
+
+
+_default_cache: Optional[DecompositionCache] = None
+
+
+def get_decomposition_cache() -> DecompositionCache:
+    """Process-wide cache used by TaskManager.task_decomposer when enabled in Config."""
+    global _default_cache
+    if _default_cache is None:
+        if Config.DECOMPOSITION_CACHE_PATH is None:
+            logger.warning(
+                "Decomposition cache enabled without DECOMPOSITION_CACHE_PATH: memory only, "
+                "so no split of this run will find a cached decomposition"
+            )
+        # Read Config now rather than at import, so a path set at runtime is honoured
+        _default_cache = DecompositionCache(
+            path=Config.DECOMPOSITION_CACHE_PATH,
+            memory_entries=Config.DECOMPOSITION_CACHE_MEMORY_ENTRIES,
+            ttl=Config.DECOMPOSITION_CACHE_TTL,
+        )
+    return _default_cache
+
+
+def decomposition_cache_summary() -> str:
+    if _default_cache is None:
+        return "unused"
+    cache = _default_cache
+    return f"{cache.stats} (hit rate {cache.hit_rate():.1%})"
+
+
+async def prewarm(
+    objectives: Dict[str, str],
+    concurrency: int = 4,
+    refresh: bool = False,
+    cache: Optional[DecompositionCache] = None,
+) -> Dict[str, int]:
+    """
+    Decompose every objective that is not cached yet and store the result.
+
+    :param objectives: Name -> objective text.
+    :param concurrency: Decompositions requested at the same time.
+    :param refresh: Ask the decomposer again even for cached objectives.
+    :param cache: Cache to fill; defaults to the process-wide one.
+    :return: Number of subtasks per objective (0 if decomposition failed).
+    """
+    from taskManager import TaskManager  # taskManager imports this module
+
+    cache = cache or get_decomposition_cache()
+    if refresh:
+        for objective in objectives.values():
+            cache.delete(TaskManager(objective=objective, current_task=objective).cache_key())
+    semaphore = asyncio.Semaphore(concurrency)
+    results: Dict[str, int] = {}
+
+    async def warm(name: str, objective: str) -> None:
+        async with semaphore:
+            tm = TaskManager(objective=objective, current_task=objective)
+            tm.cache = cache  # even when Config leaves the cache off for runs
+            try:
+                decomposition = await tm.task_decomposer()
+            except Exception as e:
+                logger.error(f"Could not decompose {name}: {e}")
+                results[name] = 0
+                return
+            results[name] = len(decomposition.get("subtasks", []))
+            logger.info(f"{name}: {results[name]} subtasks cached")
+
+    await asyncio.gather(*(warm(name, objective) for name, objective in objectives.items()))
+    return results
+
+
+def _task_prompt_objectives(names: List[str]) -> Dict[str, str]:
+    import task_prompt
+
+    objectives = {name: value for name, value in vars(task_prompt).items() if not name.startswith("_") and isinstance(value, str)}
+    unknown = [name for name in names if name not in objectives]
+    if unknown:
+        raise SystemExit(f"Unknown objectives {unknown}; choose from {sorted(objectives)}")
+    return {name: objectives[name] for name in names} if names else objectives
+
+
+async def _main(args) -> None:
+    from clientPool import aclose_clients
+
+    cache = DecompositionCache(path=args.path)
+    try:
+        results = await prewarm(_task_prompt_objectives(args.objectives), args.concurrency, args.refresh, cache)
+    finally:
+        await aclose_clients()
+        cache.close()
+    for name, count in results.items():
+        print(f"{name:<34} {count:>3} subtasks" if count else f"{name:<34} failed")
+    print(f"cache: {cache.stats} (hit rate {cache.hit_rate():.1%}), stored in {args.path}")
+
+
+if __name__ == "__main__":
+    from logPipeline import setup_logging, shutdown_logging
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("objectives", nargs="*", help="Names from task_prompt.py (default: all)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--refresh", action="store_true", help="Replace entries that are already cached")
+    parser.add_argument("--path", default=".cache/decompositions.sqlite", help="SQLite file to fill")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    setup_logging(level=args.log_level, path=None)
+    try:
+        asyncio.run(_main(args))
+    finally:
+        shutdown_logging()
@@ -1,6 +1,6 @@
 import json
 import asyncio
-from openai import OpenAI, AsyncOpenAI
+from clientPool import get_async_client, aclose_clients
 import os
 
 from tabulate import tabulate  # pip install tabulate
@@ -26,7 +26,7 @@ def build_prompt(chunk):
 async def evaluate_chunk(semaphore: asyncio.Semaphore, chunk: list, model: str):
     async with semaphore:
         prompt = build_prompt(chunk)
-        resp = await AsyncOpenAI(api_key=api_key).chat.completions.create(
+        resp = await get_async_client("openai", None, api_key).chat.completions.create(
             model=model,
             messages=[{"role": "user", "content": prompt}]
         )
@@ -58,7 +58,10 @@ async def evaluate_jsonl(path: str, model: str = "o4-mini"):
     # 3) parallelize up to 10 chunks at once (100 records)
     sem = asyncio.Semaphore(10)
     tasks = [evaluate_chunk(sem, chunk, model) for chunk in chunks]
-    all_results = await asyncio.gather(*tasks)
+    try:
+        all_results = await asyncio.gather(*tasks)
+    finally:
+        await aclose_clients()
     # 4) flatten
     flat = [r for chunk in all_results for r in chunk]
 
@@ -0,0 +1,57 @@
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from config import Config
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies for one (provider, model)."""
+
+    def __init__(self, window: int = Config.HEDGE_WINDOW):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        idx = min(len(ordered) - 1, int(q / 100 * len(ordered)))
+        return ordered[idx]
+
+    def hedge_delay(self) -> float:
+        """
+        How long to wait before hedging: the configured latency percentile once
+        enough samples exist, otherwise Config.HEDGE_INITIAL_DELAY.
+        """
+        if len(self.samples) < Config.HEDGE_MIN_SAMPLES:
+            return Config.HEDGE_INITIAL_DELAY
+        return max(Config.HEDGE_MIN_DELAY, self.percentile(Config.HEDGE_PERCENTILE))
+
+
+_trackers: Dict[Tuple[str, str], LatencyTracker] = {}
+_lock = threading.Lock()
+
+# Process-wide counters: requests sent as hedges and how many of them answered first,
+# fallbacks started because every running model in the chain raised and how many answered.
+STATS: Dict[str, int] = {"calls": 0, "hedges_fired": 0, "hedges_won": 0, "failovers": 0, "failovers_won": 0}
+
+
+def get_latency_tracker(provider: str, model: str) -> LatencyTracker:
+    key = (provider, model)
+    with _lock:
+        tracker = _trackers.get(key)
+        if tracker is None:
+            tracker = _trackers[key] = LatencyTracker()
+        return tracker
+
+
+def hedge_summary() -> str:
+    calls = STATS["calls"] or 1
+    fired = STATS["hedges_fired"]
+    return (
+        f"hedged calls={STATS['calls']} fired={fired} ({fired / calls:.1%}) "
+        f"won={STATS['hedges_won']} failovers={STATS['failovers']} (answered {STATS['failovers_won']})"
+    )
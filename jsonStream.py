@@ -0,0 +1,143 @@
+import json
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class IncrementalJSONFields:
+    """
+    Incremental parser for the top-level fields of a streamed JSON object.
+
+    Feed it raw text as it arrives; it yields events as soon as they are known:
+      - ("chunk", key, text): a decoded piece of a string value whose key is in `stream_keys`
+      - ("field", key, value): a top-level value has been fully read
+
+    Only the outermost object is tracked; nested values are skipped while scanning and
+    decoded with json.loads once complete. Text before the first "{" (e.g. a ```json fence)
+    is ignored.
+    """
+
+    def __init__(self, stream_keys: Optional[Set[str]] = None):
+        self.stream_keys = set(stream_keys or ())
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self._state = "start"
+        self._key: Optional[str] = None
+        self._buf: List[str] = []       # decoded chars of the current string
+        self._raw: List[str] = []       # raw chars of the current non-string value
+        self._escape = ""               # pending escape sequence, e.g. "\\u00"
+        self._depth = 0
+        self._in_str = False            # inside a string nested in a skipped value
+        self._str_escape = False
+        self._streamed: Dict[str, str] = {}  # chunks of a streamed value already emitted
+
+    def feed(self, text: str) -> Iterator[Tuple[str, str, Any]]:
+        for ch in text:
+            if self.done:
+                return
+            yield from self._step(ch)
+        # Flush whatever part of a streamed string value is decoded so far
+        if self._state == "value_str" and self._key in self.stream_keys:
+            # Hold back a lone high surrogate until its pair arrives
+            keep = 1 if self._buf and 0xD800 <= ord(self._buf[-1]) <= 0xDBFF else 0
+            if len(self._buf) > keep:
+                yield self._emit_chunk(keep)
+
+    def _emit_chunk(self, keep: int = 0) -> Tuple[str, str, Any]:
+        piece = "".join(self._buf[:len(self._buf) - keep])
+        self._streamed[self._key] = self._streamed.get(self._key, "") + piece
+        self._buf = self._buf[len(self._buf) - keep:]
+        return ("chunk", self._key, piece)
+
+    def _step(self, ch: str) -> Iterator[Tuple[str, str, Any]]:
+        state = self._state
+        if state == "start":
+            if ch == "{":
+                self._state = "key_or_end"
+        elif state in ("key_or_end", "next"):
+            if ch == '"':
+                self._state, self._buf = "key", []
+            elif ch == "}":
+                self.done = True
+        elif state == "key":
+            if self._read_string_char(ch):
+                self._key, self._buf = "".join(self._buf), []
+                self._state = "colon"
+        elif state == "colon":
+            if ch == ":":
+                self._state = "value"
+        elif state == "value":
+            if ch.isspace():
+                return
+            if ch == '"':
+                self._state, self._buf = "value_str", []
+            else:
+                self._state, self._raw, self._depth = "value_raw", [], 0
+                yield from self._step(ch)
+        elif state == "value_str":
+            if self._read_string_char(ch):
+                if self._key in self.stream_keys and self._buf:
+                    yield self._emit_chunk()
+                self._finish(self._streamed.pop(self._key, "") + "".join(self._buf))
+                yield ("field", self._key, self.fields[self._key])
+        elif state == "value_raw":
+            yield from self._read_raw_char(ch)
+        elif state == "after_value":
+            if ch == ",":
+                self._state = "next"
+            elif ch == "}":
+                self.done = True
+
+    def _read_string_char(self, ch: str) -> bool:
+        """Decode one char of a JSON string into self._buf; True once the closing quote is read."""
+        if self._escape:
+            self._escape += ch
+            if self._escape[1] == "u":
+                if len(self._escape) == 6:
+                    code = int(self._escape[2:], 16)
+                    self._escape = ""
+                    if 0xDC00 <= code <= 0xDFFF and self._buf and 0xD800 <= ord(self._buf[-1]) <= 0xDBFF:
+                        # Join a surrogate pair split across two escapes
+                        code = 0x10000 + ((ord(self._buf.pop()) - 0xD800) << 10) + (code - 0xDC00)
+                    self._buf.append(chr(code))
+            else:
+                self._buf.append(_ESCAPES.get(ch, ch))
+                self._escape = ""
+            return False
+        if ch == "\\":
+            self._escape = ch
+            return False
+        if ch == '"':
+            return True
+        self._buf.append(ch)
+        return False
+
+    def _read_raw_char(self, ch: str) -> Iterator[Tuple[str, str, Any]]:
+        if self._in_str:
+            self._raw.append(ch)
+            if self._str_escape:
+                self._str_escape = False
+            elif ch == "\\":
+                self._str_escape = True
+            elif ch == '"':
+                self._in_str = False
+            return
+        if self._depth == 0 and ch in ",}":
+            self._finish(json.loads("".join(self._raw)))
+            yield ("field", self._key, self.fields[self._key])
+            self._state = "next" if ch == "," else "after_value"
+            if ch == "}":
+                self.done = True
+            return
+        self._raw.append(ch)
+        if ch == '"':
+            self._in_str = True
+        elif ch in "[{":
+            self._depth += 1
+        elif ch in "]}":
+            self._depth -= 1
+
+    def _finish(self, value: Any) -> None:
+        self.fields[self._key] = value
+        self._buf, self._raw = [], []
+        self._state = "after_value"
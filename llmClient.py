@@ -1,8 +1,18 @@
 import asyncio
 import logging
-from typing import Dict, Any, List
-from openai import OpenAI, AsyncOpenAI
+import random
+import time
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
+from openai import APIConnectionError, InternalServerError, RateLimitError
 from config import Config
+from cassette import Cassette, get_default_cassette
+from clientPool import get_clients
+from deadline import Deadline, within
+from hedging import STATS as HEDGE_STATS, LatencyTracker, get_latency_tracker
+from rateLimiter import RateLimiter, get_rate_limiter, parse_retry_after, estimate_request_tokens
+from responseCache import ResponseCache, cache_key, get_default_cache
+from singleFlight import SingleFlight, get_single_flight
+from telemetry import CallRecord, emit as emit_telemetry
 
 logger = logging.getLogger(__name__)
 
@@ -13,40 +23,85 @@ class LLMClient:
         api_key: str = None,
         model: str = None,
         temperature: float = Config.TEMPERATURE,
-        tokens_per_round: int = None
+        tokens_per_round: int = None,
+        base_url: str = None,
+        cache: Optional[ResponseCache] = None,
+        rate_limit: bool = Config.RATE_LIMIT_ENABLED,
+        fallbacks: Optional[List["LLMClient"]] = None,
+        hedge: bool = Config.HEDGE_ENABLED,
+        coalesce: bool = Config.SINGLE_FLIGHT_ENABLED,
+        cassette: Optional[Cassette] = None
     ):
+        """
+        :param fallbacks: Clients for the next models in the chain. They are tried when
+            this model raises, and raced against it when it is slower than usual.
+        :param hedge: Fire the next model once this one passes its hedge delay
+            (see hedging.LatencyTracker.hedge_delay) instead of only on errors.
+        :param coalesce: Share one in-flight request between identical deterministic
+            calls (see singleFlight.py).
+        :param cassette: Record every call to, or replay every call from, a cassette
+            file (see cassette.py). Defaults to the one configured by Config.CASSETTE_MODE.
+        """
         self.provider = provider.lower()
         self.temperature = temperature
         self.tokens_per_round = tokens_per_round
+        if cache is None and Config.RESPONSE_CACHE_ENABLED:
+            cache = get_default_cache()
+        self.cache = cache
+        self.single_flight: Optional[SingleFlight] = get_single_flight() if coalesce else None
+        self.cassette: Optional[Cassette] = cassette or get_default_cassette()
 
         if self.provider == "openai":
             self.api_key = api_key or Config.OPENAI_API_KEY
             self.model = model or Config.GPT_MODEL
-            self.client = OpenAI(api_key=self.api_key)
-            self.a_client = AsyncOpenAI(api_key=self.api_key)
+            self.base_url = base_url or Config.OPENAI_BASE_URL
 
         elif self.provider == "openrouter":
             self.api_key = api_key or Config.OPEN_ROUTER_API_KEY
             self.model = model or Config.OPEN_ROUTER_MODEL
-            base_url = "https://openrouter.ai/api/v1"
-            self.client = OpenAI(api_key=self.api_key, base_url=base_url)
-            self.a_client = AsyncOpenAI(api_key=self.api_key, base_url=base_url)
+            self.base_url = base_url or Config.OPEN_ROUTER_BASE_URL
 
         else:
             raise ValueError("Unsupported provider. Use 'openai' or 'openrouter'.")
 
+        # Clients come from a process-wide registry so all instances share one keep-alive pool
+        self.client, self.a_client = get_clients(self.provider, self.base_url, self.api_key)
+        self.fallbacks: List[LLMClient] = list(fallbacks or [])
+        self.hedge = hedge
+        self.latency: LatencyTracker = get_latency_tracker(self.provider, self.model)
+
+        self.rate_limiter: Optional[RateLimiter] = None
+        if rate_limit:
+            self.rate_limiter = get_rate_limiter(self.provider, self.model)
+            # 429s must reach the limiter instead of being retried blindly inside the SDK;
+            # _create retries them, and the transient errors the SDK used to retry, itself
+            self.a_client = self.a_client.with_options(max_retries=0)
+
+    @property
+    def endpoint(self) -> Tuple[str, str, str]:
+        """(provider, base URL, model): clients with the same endpoint send the same requests."""
+        return self.provider, self.base_url or "", self.model
+
+    def _flight_key(self, key: str, timeout: Optional[float]) -> str:
+        """
+        Single-flight key of a call: its request key plus what decides how the shared
+        request is run (the requested timeout and the fallback chain), so a caller never
+        inherits another caller's shorter timeout or different fallbacks.
+        """
+        chain = [client.endpoint for client in self.fallbacks]
+        return f"{key}|timeout={timeout}|hedge={self.hedge}|chain={chain}"
+
     def _supports_temperature(self) -> bool:
         # Only include temperature for models whose name contains "gpt"
         return "gpt" in self.model.lower()
 
 
-    async def a_chat_completion(
+    def _build_params(
         self,
         messages: List[Dict[str, Any]],
         temperature: float = None,
-        max_tokens: int = None,
-        timeout: float = 60
-    ) -> str:
+        max_tokens: int = None
+    ) -> Dict[str, Any]:
         params: Dict[str, Any] = {
             "model": self.model,
             "messages": messages,
@@ -62,13 +117,309 @@ class LLMClient:
             params["max_tokens"] = max_tokens
         elif self.tokens_per_round is not None:
             params["max_tokens"] = self.tokens_per_round
+        return params
+
+    def _request_key(self, params: Dict[str, Any], cacheable: Optional[bool]) -> Optional[str]:
+        """
+        Content address of this call for caching and coalescing, or None when the
+        call is sampling and not explicitly cacheable. Only a temperature of 0 that
+        is actually sent counts as deterministic: models that are not sent one
+        (see _supports_temperature) sample at the server's default.
+        """
+        if cacheable is None:
+            cacheable = params.get("temperature") == 0
+        if not cacheable:
+            return None
+        return self._tape_key(params)
+
+    async def _create(self, params: Dict[str, Any], timeout: Optional[float] = None) -> Tuple[Any, int]:
+        """
+        Send one request through the (provider, model) rate limiter, retrying rate-limit
+        responses after the server's Retry-After, and connection errors, timeouts and
+        5xx responses with exponential backoff (what the SDK does without a limiter).
+        For streams the permit covers only the opening request. `timeout` is the HTTP
+        timeout of each attempt.
+        Returns the response and the number of retries it took.
+        """
+        if timeout is not None:
+            params = {**params, "timeout": timeout}
+        if self.rate_limiter is None:
+            return await self.a_client.chat.completions.create(**params), 0
+
+        est_tokens = estimate_request_tokens(params["messages"], params.get("max_tokens"))
+        rate_limited = 0
+        transient = 0
+        while True:
+            async with self.rate_limiter.permit(est_tokens) as permit:
+                try:
+                    response = await self.a_client.chat.completions.create(**params)
+                except RateLimitError as e:
+                    retry_after = parse_retry_after(getattr(e.response, "headers", None))
+                    self.rate_limiter.on_rate_limited(retry_after, rate_limited)
+                    if rate_limited == Config.RATE_LIMIT_MAX_RETRIES:
+                        raise
+                    rate_limited += 1
+                    continue
+                except (APIConnectionError, InternalServerError) as e:
+                    # APITimeoutError is an APIConnectionError
+                    if transient == Config.TRANSIENT_MAX_RETRIES:
+                        raise
+                    transient += 1
+                    error = e
+                else:
+                    usage = getattr(response, "usage", None)
+                    if usage is not None:
+                        permit["tokens"] = usage.total_tokens
+                    self.rate_limiter.on_success()
+                    return response, rate_limited + transient
+            # Back off outside the permit so the slot is free for other calls meanwhile
+            backoff = min(Config.TRANSIENT_MAX_BACKOFF, Config.TRANSIENT_BASE_BACKOFF * 2 ** (transient - 1))
+            backoff *= random.uniform(0.75, 1.0)
+            logger.warning(f"{self.model} call failed ({error}), retry {transient} in {backoff:.2f}s")
+            await asyncio.sleep(backoff)
+
+    def _tape_key(self, params: Dict[str, Any]) -> str:
+        """Cassette key: the content address of exactly what is sent to the model."""
+        return cache_key(
+            self.provider, params["model"], params["messages"], params.get("temperature"),
+            params["response_format"], params.get("max_tokens")
+        )
+
+    async def _completion(self, params: Dict[str, Any], timeout: Optional[float] = None) -> str:
+        if self.cassette is not None:
+            if self.cassette.mode == "replay":
+                start = time.perf_counter()
+                content = await self.cassette.replay(self._tape_key(params))
+                emit_telemetry(CallRecord.build(self.provider, self.model, time.perf_counter() - start, source="replay"))
+                return content
+            return await self.cassette.play(
+                self._tape_key(params), params, lambda: self._network_completion(params, timeout)
+            )
+        return await self._network_completion(params, timeout)
+
+    async def _network_completion(self, params: Dict[str, Any], timeout: Optional[float] = None) -> str:
+        start = time.perf_counter()
+        try:
+            response, retries = await self._create(params, timeout)
+        except BaseException as e:
+            outcome = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+            emit_telemetry(CallRecord.build(self.provider, self.model, time.perf_counter() - start, outcome=outcome))
+            raise
+        elapsed = time.perf_counter() - start
+        self.latency.record(elapsed)
+        emit_telemetry(CallRecord.build(
+            self.provider, self.model, elapsed, usage=getattr(response, "usage", None), retries=retries
+        ))
+        return response.choices[0].message.content
+
+    async def _hedged_completion(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: float = None,
+        max_tokens: int = None,
+        timeout: Optional[float] = None
+    ) -> Tuple[str, "LLMClient"]:
+        """
+        Run the request down the chain [self, *fallbacks]. The next model starts when
+        the newest one has been running longer than its hedge delay (a hedge) or when
+        a running one fails (a failover). The first success wins; the rest are cancelled.
+        """
+        chain = [self] + self.fallbacks
+        running: Dict[asyncio.Task, Tuple[LLMClient, str]] = {}
+        errors: List[BaseException] = []
+        HEDGE_STATS["calls"] += 1
+
+        def launch(client: "LLMClient", reason: str) -> None:
+            params = client._build_params(messages, temperature, max_tokens)
+            running[asyncio.create_task(client._completion(params, timeout))] = (client, reason)
+
+        launch(chain[0], "primary")
+        next_idx = 1
+        try:
+            while running:
+                newest = chain[next_idx - 1]
+                delay = newest.latency.hedge_delay() if self.hedge and next_idx < len(chain) else None
+                done, _ = await asyncio.wait(running, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.info(f"Hedging {newest.model} after {delay:.1f}s with {chain[next_idx].model}")
+                    HEDGE_STATS["hedges_fired"] += 1
+                    launch(chain[next_idx], "hedge")
+                    next_idx += 1
+                    continue
+                for task in done:
+                    client, reason = running.pop(task)
+                    if task.exception() is None:
+                        if reason != "primary":
+                            HEDGE_STATS[f"{reason}s_won"] += 1
+                            logger.info(f"{client.model} ({reason}) answered instead of {self.model}")
+                        return task.result(), client
+                    errors.append(task.exception())
+                    logger.warning(f"{client.model} failed: {task.exception()}")
+                if not running and next_idx < len(chain):
+                    HEDGE_STATS["failovers"] += 1
+                    launch(chain[next_idx], "failover")
+                    next_idx += 1
+            raise errors[-1]
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def a_chat_completion(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: float = None,
+        max_tokens: int = None,
+        timeout: float = Config.LLM_CALL_TIMEOUT,
+        cacheable: Optional[bool] = None,
+        deadline: Optional[Deadline] = None
+    ) -> str:
+        """
+        :param timeout: HTTP timeout for this call in seconds.
+        :param cacheable: Serve/store this call through the response cache and coalesce
+            it with identical in-flight calls. Defaults to True only for calls sent with
+            temperature 0; pass True to opt a sampling call in, or False to opt out.
+        :param deadline: Run-level deadline; the call is cut short (DeadlineExceeded)
+            when it expires, and its HTTP timeout never exceeds the time left.
+        """
+        # Coalesce on the requested timeout: callers under the same run deadline are all
+        # clamped to it, and the first caller's clamp is never shorter than a later one's
+        requested_timeout = timeout
+        if deadline is not None:
+            deadline.check()
+            timeout = deadline.clamp(timeout)
+        params = self._build_params(messages, temperature, max_tokens)
+
+        key = self._request_key(params, cacheable)
+        if key is not None and self.cache is not None:
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                logger.debug(f"Cache hit for {self.model} ({key[:12]})")
+                emit_telemetry(CallRecord.build(self.provider, self.model, 0.0, source="cache"))
+                return cached
+
+        async def fetch() -> Tuple[str, LLMClient]:
+            if self.fallbacks:
+                return await self._hedged_completion(messages, temperature, max_tokens, timeout)
+            return await self._completion(params, timeout), self
 
         try:
-            response = await self.a_client.chat.completions.create(**params)
-            return response.choices[0].message.content
+            if key is not None and self.single_flight is not None:
+                flight = self._flight_key(key, requested_timeout)
+                content, source = await within(deadline, self.single_flight.do(flight, fetch))
+            else:
+                content, source = await within(deadline, fetch())
+            # `source` may be another client for the same endpoint that started the shared request
+            answered_here = source.endpoint == self.endpoint
+            if not answered_here:
+                logger.warning(f"Answered by {source.provider}/{source.model} instead of {self.provider}/{self.model}")
+            # Only cache answers from the requested model; the key names it
+            if key is not None and self.cache is not None and content and answered_here:
+                await self.cache.aput(key, content)
+            return content
         except asyncio.TimeoutError:
             logger.error(f"API call timed out after {timeout} seconds")
             raise
         except Exception as e:
             logger.error(f"API call failed: {e}")
             raise
+
+    async def a_chat_completion_stream(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: float = None,
+        max_tokens: int = None,
+        timeout: float = Config.LLM_CALL_TIMEOUT,
+        cacheable: Optional[bool] = None,
+        deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[str]:
+        """
+        Streaming variant of a_chat_completion: yields the response text in
+        pieces as they arrive. A cache hit is yielded as a single piece.
+        """
+        if deadline is not None:
+            deadline.check()
+            timeout = deadline.clamp(timeout)
+        params = self._build_params(messages, temperature, max_tokens)
+
+        key = self._request_key(params, cacheable)
+        if key is not None and self.cache is not None:
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                logger.debug(f"Cache hit for {self.model} ({key[:12]})")
+                emit_telemetry(CallRecord.build(self.provider, self.model, 0.0, source="cache", stream=True))
+                yield cached
+                return
+
+        if self.cassette is not None and self.cassette.mode == "replay":
+            start = time.perf_counter()
+            content = await self.cassette.replay(self._tape_key(params))
+            emit_telemetry(CallRecord.build(
+                self.provider, self.model, time.perf_counter() - start, source="replay", stream=True
+            ))
+            yield content
+            return
+
+        parts: List[str] = []
+        usage = None
+        retries = 0
+        start = time.perf_counter()
+        stream_params = {**params, "stream": True, "stream_options": {"include_usage": True}}
+        try:
+            stream, retries = await within(deadline, self._create(stream_params, timeout))
+            async for chunk in stream:
+                if deadline is not None:
+                    deadline.check()
+                # With include_usage the last chunk carries the token counts and no choices
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        except BaseException as e:
+            outcome = "cancelled" if isinstance(e, (asyncio.CancelledError, GeneratorExit)) else "error"
+            emit_telemetry(CallRecord.build(
+                self.provider, self.model, time.perf_counter() - start,
+                outcome=outcome, retries=retries, stream=True
+            ))
+            if isinstance(e, asyncio.TimeoutError):
+                logger.error(f"API call timed out after {timeout} seconds")
+            elif isinstance(e, Exception):
+                logger.error(f"API call failed: {e}")
+            raise
+        elapsed = time.perf_counter() - start
+        emit_telemetry(CallRecord.build(
+            self.provider, self.model, elapsed, usage=usage, retries=retries, stream=True
+        ))
+        if self.cassette is not None:
+            await self.cassette.record(self._tape_key(params), params, "".join(parts), elapsed)
+        if key is not None and self.cache is not None and parts:
+            await self.cache.aput(key, "".join(parts))
+
+
+def fallback_chain(provider: str, model: str) -> List[Dict[str, str]]:
+    """`model` followed by the equivalent endpoints Config.FALLBACK_MODELS lists for it."""
+    return [{"provider": provider, "model": model}, *Config.FALLBACK_MODELS.get(model, [])]
+
+
+def build_client_chain(configs: List[Dict[str, str]], **kwargs) -> LLMClient:
+    """
+    Build an LLMClient for configs[0] whose fallbacks are the remaining entries
+    ({"provider": ..., "model": ...}). Providers without an API key are skipped.
+    """
+    clients = []
+    for cfg in configs:
+        if cfg["provider"] == "openrouter" and not Config.OPEN_ROUTER_API_KEY:
+            logger.info(f"Skipping fallback {cfg['model']}: no OpenRouter API key configured")
+            continue
+        if clients and cfg["model"].split("/")[-1] != clients[0].model.split("/")[-1]:
+            logger.warning(
+                f"Fallback {cfg['provider']}/{cfg['model']} is a different model than {clients[0].model}; "
+                f"its answers will be credited to {clients[0].model}"
+            )
+        clients.append(LLMClient(provider=cfg["provider"], model=cfg["model"], **kwargs))
+    primary = clients[0]
+    primary.fallbacks = clients[1:]
+    return primary
@@ -0,0 +1,204 @@
+import atexit
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import shutil
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from config import Config
+from telemetry import current_context
+
+CONTEXT_FIELDS = ("run_id", "depth", "agent_id", "phase")
+CONSOLE_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+
+def payload(**fields: Any) -> Dict[str, Any]:
+    """
+    `extra=` for log calls that carry a full prompt or response, so they are
+    sampled/truncated per Config.LOG_PAYLOAD_*. Pass the text as a %-style
+    argument so that it is only formatted on the logging thread, e.g.
+        logger.info("step input: %s", text, extra=payload(agent_id=self.id))
+    """
+    return {"payload": True, **fields}
+
+
+class ContextFilter(logging.Filter):
+    """
+    Stamp records with the run/depth/agent/phase of the calling task. Runs on
+    the logging thread of the caller, before the record crosses the queue.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        ctx = current_context()
+        for name in CONTEXT_FIELDS:
+            if getattr(record, name, None) is None:
+                setattr(record, name, ctx.get(name))
+        return True
+
+
+class PayloadFilter(logging.Filter):
+    """
+    Keep a `sample_rate` fraction of payload records whole and cut the rest to
+    `max_chars`. Runs on the logging thread (see _Listener.prepare).
+    """
+
+    def __init__(self, max_chars: int, sample_rate: float):
+        super().__init__()
+        self.max_chars = max_chars
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "payload", False) or self.max_chars is None:
+            return True
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        message = record.getMessage()
+        if len(message) > self.max_chars:
+            record.msg = f"{message[:self.max_chars]} [... {len(message) - self.max_chars} chars truncated]"
+            record.args = None
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, context fields and exception."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for name in CONTEXT_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+# Arguments that can cross the queue unformatted: immutable, so formatting them later
+# on the logging thread gives the same text as formatting them now
+_LAZY_ARGS = (str, int, float, bool, type(None))
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueue records without formatting them. The stock QueueHandler merges
+    msg % args on the calling thread, which for prompt-sized payloads is most
+    of the cost of logging; here that is left to the listener thread whenever
+    the arguments are immutable.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        args = record.args if isinstance(record.args, tuple) else (record.args,)
+        if record.args and not all(isinstance(a, _LAZY_ARGS) for a in args):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            # Tracebacks reference live frames; render them now
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _Listener(logging.handlers.QueueListener):
+    """QueueListener that samples/truncates payload records on its own thread."""
+
+    def __init__(self, log_queue, *handlers, payload_filter: Optional[PayloadFilter] = None):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.payload_filter = payload_filter
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if self.payload_filter is not None:
+            self.payload_filter.filter(record)
+        return record
+
+
+def _gzip_namer(name: str) -> str:
+    return name + ".gz"
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+def rotating_file_handler(path: str, max_bytes: int, backup_count: int) -> logging.Handler:
+    """Size-rotated JSON log file whose rotated copies are gzip-compressed (app.log.1.gz, ...)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+    handler.namer = _gzip_namer
+    handler.rotator = _gzip_rotator
+    handler.setFormatter(JSONFormatter())
+    return handler
+
+
+_listener: Optional[_Listener] = None
+
+
+def setup_logging(
+    level: str = Config.LOG_LEVEL,
+    path: Optional[str] = Config.LOG_PATH,
+    console: bool = True,
+) -> logging.handlers.QueueListener:
+    """
+    Route all logging through a queue: callers (the event loop included) only
+    enqueue records, and a background thread formats, truncates and writes them
+    to the console and to a rotating, compressed JSON log file.
+
+    :param path: JSON log file, or None for console only.
+    """
+    global _listener
+    shutdown_logging()
+
+    handlers = []
+    if console:
+        stream = logging.StreamHandler()
+        stream.setFormatter(JSONFormatter() if Config.LOG_CONSOLE_JSON else logging.Formatter(CONSOLE_FORMAT))
+        handlers.append(stream)
+    if path:
+        handlers.append(rotating_file_handler(path, Config.LOG_MAX_BYTES, Config.LOG_BACKUP_COUNT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = _Listener(
+        log_queue, *handlers,
+        payload_filter=PayloadFilter(Config.LOG_PAYLOAD_MAX_CHARS, Config.LOG_PAYLOAD_SAMPLE_RATE),
+    )
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Drain the queue and close the handlers. Safe to call more than once."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -1,25 +1,29 @@
+import argparse
 import logging
 import asyncio
-from typing import Dict
+from typing import Dict, Optional
 import sys
 import time
 from taskexecuter import TaskExecuter
 from config import Config
-from llmClient import LLMClient
+from llmClient import LLMClient, build_client_chain, fallback_chain
+from hedging import hedge_summary
+from consensus import consensus_summary
+from preValidation import pre_validation_summary
+from taskManager import speculation_summary
+from decompositionCache import decomposition_cache_summary
+from segmentStore import segment_store_summary
+from singleFlight import get_single_flight
+from cassette import get_default_cassette
+from clientPool import aclose_clients
+from deadline import Deadline
+from checkpoint import RunJournal
+from responseCache import get_default_cache
+from telemetry import call_context, close_sinks, configure_sinks, new_run_id
+from logPipeline import setup_logging, shutdown_logging
 from agent import Agent
 from task_prompt import *
-# -----------------------------------------------------------------------------
-# Logging Configuration
-# -----------------------------------------------------------------------------
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    handlers=[
-        logging.StreamHandler(),  # Console output
-        logging.FileHandler("app2.log", encoding="utf-8")  # Optional file output
-    ]
-)
-logger = logging.getLogger(__name__) 
+logger = logging.getLogger(__name__)
 
 
 def load_agents(memory_capacity: int = None) -> Dict[int, Agent]:
@@ -37,12 +41,7 @@ def load_agents(memory_capacity: int = None) -> Dict[int, Agent]:
     for idx, attr in enumerate(model_attrs):
         model_name = getattr(Config, attr)
         logger.info(f"Initializing Agent {idx} with model '{model_name}'")
-        client = LLMClient(
-            provider="openai",
-            api_key=Config.OPENAI_API_KEY,
-            model=model_name,
-            temperature=Config.TEMPERATURE,
-        )
+        client = build_client_chain(fallback_chain("openai", model_name), temperature=Config.TEMPERATURE)
         agent = Agent(
             llm_client=client,
             id=idx,
@@ -52,7 +51,13 @@ def load_agents(memory_capacity: int = None) -> Dict[int, Agent]:
     return agents
 
 
-async def main():
+async def main(resume: Optional[str] = None, checkpoint: bool = False):
+    """
+    :param resume: Run id of an interrupted run to continue from its checkpoints
+        instead of starting over.
+    :param checkpoint: Journal this run so that it can be resumed, as if
+        Config.CHECKPOINT_ENABLED were set.
+    """
     # Ensure stdout uses UTF-8 encoding
     try:
         sys.stdout.reconfigure(encoding='utf-8')
@@ -65,17 +70,42 @@ async def main():
 
 
 
+    run_id = resume or new_run_id()
+    journal = None
+    if checkpoint or Config.CHECKPOINT_ENABLED or resume:
+        journal = RunJournal(run_id, resume=resume is not None)
+        journal.begin({
+            "objective": quiz_platform_metroidvania,
+            "max_rounds": 30,
+            "max_recursion_depth": 10,
+            "agents": {str(aid): agent.llm.model for aid, agent in agents.items()},
+        })
+
     # Create TaskExecuter with desired parameters
     executor = TaskExecuter(
         agents=agents,
         current_task=quiz_platform_metroidvania,
         max_rounds=30,
-        max_recursion_depth=10
+        max_recursion_depth=10,
+        journal=journal,
     )
 
     # Execute tasks and gather final result
+    telemetry = configure_sinks()
+    logger.info(f"Run id: {run_id}")
     start_time = time.time()
-    await executor.branching_recursive_execution(agent_ids=list(agents.keys()))
+    try:
+        with call_context(run_id=run_id):
+            await executor.branching_recursive_execution(
+                agent_ids=list(agents.keys()),
+                deadline=Deadline(Config.RUN_DEADLINE)
+            )
+    finally:
+        await aclose_clients()
+        close_sinks()
+        if journal is not None:
+            journal.close()
+            logger.info(f"Checkpoints: {journal.stats} (continue an interrupted run with --resume {run_id})")
     result = agents[0].memory.get_long_str()
     # Save the result to file
     output_file = "example2.txt"
@@ -85,7 +115,39 @@ async def main():
 
     elapsed_time = time.time() - start_time
     logger.info(f"Elapsed time: {elapsed_time:.2f} seconds")
+    logger.info(f"Hedging: {hedge_summary()}")
+    logger.info(f"Local consensus: {consensus_summary()}")
+    logger.info(f"Pre-validation: {pre_validation_summary()}")
+    logger.info(f"Speculative decomposition: {speculation_summary()}")
+    logger.info(f"Decomposition cache: {decomposition_cache_summary()}")
+    logger.info(f"Shared memory: {segment_store_summary()}")
+    logger.info(f"Agent step latency: {executor.agent_latency_stats()}")
+    cassette = get_default_cassette()
+    if cassette is not None:
+        # On replay without recorded latencies, elapsed time is pure orchestration overhead
+        logger.info(
+            f"Cassette {cassette.mode} ({cassette.path}): {cassette.stats['calls']} calls, "
+            f"{cassette.stats['llm_seconds']:.2f}s of recorded LLM latency"
+        )
+    flights = get_single_flight().stats
+    logger.info(f"Coalesced {flights['coalesced']} of {flights['calls']} deterministic LLM calls")
+    if Config.RESPONSE_CACHE_ENABLED:
+        cache = get_default_cache()
+        logger.info(f"Response cache: {cache.stats} (hit rate {cache.hit_rate():.1%})")
+    if telemetry is not None:
+        logger.info(f"LLM calls by phase:\n{telemetry.report(by=('phase',))}")
+        logger.info(f"LLM calls by recursion depth:\n{telemetry.report(by=('depth',))}")
+        logger.info(f"LLM calls by depth and phase:\n{telemetry.report(by=('depth', 'phase'))}")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # Console and rotating JSON log file, written from a background thread
+    setup_logging(path="app2.log")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resume", metavar="RUN_ID", help="Continue an interrupted run from its checkpoints")
+    parser.add_argument("--checkpoint", action="store_true", help="Checkpoint this run so that it can be resumed")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(resume=args.resume, checkpoint=args.checkpoint))
+    finally:
+        shutdown_logging()
@@ -1,5 +1,7 @@
 from typing import List, Dict, Any, Optional, Union
 
+from segmentStore import CowList, Snapshot
+
 class Memory:
     """
     General memory structure with separate short-term and long-term storage.
@@ -8,32 +10,96 @@ class Memory:
       - Holds the current task description and accumulated response segments.
     Long-term memory:
       - A list of dicts, each entry saving a completed task's description, segments, and optional result.
+
+    Both are kept in copy-on-write lists (see segmentStore.py), so handing one
+    agent's memory to others (share_long/adopt_long, share_short/restore_short,
+    fork) costs O(1) per agent. Stored entries and segments are never modified
+    in place.
+
+    The string views (get_long_str, get_short_segment_str, get_all, ...) are
+    cached and only re-joined from what was added since the last read, so
+    repeated reads by the agent, its validators and voters cost nothing extra.
+
+    `version` counts the writes made through these methods, so code holding a
+    result computed from this memory can tell whether it was changed since.
     """
 
     def __init__(self, long_term_capacity: Optional[int] = None):
         """
         :param long_term_capacity: Optional maximum number of entries in long-term memory.
         """
-        self.short_term: Dict[str, Any] = {"task": "", "segments": [],"justify":[]}
-        self.long_term: List[Dict[str, Any]] = []
+        self.short_term: Dict[str, Any] = {"task": "", "segments": CowList(),"justify":CowList()}
+        self._long = CowList()
         self.capacity = long_term_capacity
+        self._all: Optional[tuple] = None  # (long text, short text, get_all text)
+        self.version = 0
+
+    @property
+    def long_term(self) -> CowList:
+        return self._long
+
+    @long_term.setter
+    def long_term(self, entries: List[Dict[str, Any]]):
+        self._long = entries if isinstance(entries, CowList) else CowList(entries)
+        self.version += 1
+
+    def share_long(self) -> Snapshot:
+        """Immutable snapshot of long-term memory, for adopt_long on other memories."""
+        return self._long.snapshot()
+
+    def adopt_long(self, snapshot: Snapshot) -> None:
+        """Replace long-term memory with a shared snapshot without copying it."""
+        self._long = CowList.shared(snapshot)
+        self.version += 1
+
+    def share_short(self) -> Dict[str, Any]:
+        """Immutable snapshot of short-term memory, for restore_short on other memories."""
+        return {
+            "task": self.short_term.get("task"),
+            "segments": self._short_list("segments").snapshot(),
+            "justify": self._short_list("justify").snapshot(),
+        }
+
+    def restore_short(self, snapshot: Dict[str, Any]) -> None:
+        """Replace short-term memory with a share_short() snapshot without copying it."""
+        self.short_term = {
+            "task": snapshot["task"],
+            "segments": CowList.shared(snapshot["segments"]),
+            "justify": CowList.shared(snapshot["justify"]),
+        }
+        self.version += 1
+
+    def fork(self) -> "Memory":
+        """An independent memory starting from this one's content, sharing it until written."""
+        twin = Memory(long_term_capacity=self.capacity)
+        twin.adopt_long(self.share_long())
+        twin.restore_short(self.share_short())
+        return twin
+
+    def _short_list(self, key: str) -> CowList:
+        items = self.short_term.get(key)
+        if not isinstance(items, CowList):
+            items = self.short_term[key] = CowList(items or [])
+        return items
 
     def set_task(self, task_description: str):
         """Initialize a new current task, clearing any previous segments."""
         self.clean_short()
         self.short_term["task"] = task_description
+        self.version += 1
 
 
     def add_segment(self, segment: str):
         """Add a new response segment to the current task."""
         self.short_term["segments"].append(segment)
+        self.version += 1
 
     def add_short(self, segment: str, justify:str):
         """Add a new response segment to the current task."""
    
         self.short_term["segments"].append(segment)
-        self.short_term["justify"]=[]
-        self.short_term["justify"].append(justify)
+        self.short_term["justify"]=CowList([justify])
+        self.version += 1
 
     def archive_task(self, result: Any = None):
         """
@@ -57,6 +123,7 @@ class Memory:
         self.long_term.append(entry)
         if self.capacity is not None and len(self.long_term) > self.capacity:
             self.long_term.pop(0)
+        self.version += 1
 
     def query_long(self, **kwargs) -> List[Dict[str, Any]]:
         """
@@ -81,11 +148,11 @@ class Memory:
 
     def get_short_justify_str(self) -> str:
         """Return the raw concatenation of all segments in short-term memory."""
-        return "".join(self.short_term.get("justify", []))
+        return self._short_list("justify").join("")
     
     def get_short_segment_str(self) -> str:
         """Return the raw concatenation of all segments in short-term memory."""
-        return "\n".join(self.short_term.get("segments", []))
+        return self._short_list("segments").join("\n")
 
     def get_lastest_segment_str(self) -> str:
         """Return the raw concatenation of all segments in short-term memory."""
@@ -102,15 +169,21 @@ class Memory:
         Concatenate and return all 'result' strings from long-term memory.
         """
         # Join each result entry, converting to string in case it's not already
-        return "\n".join(str(entry.get("result", "")) for entry in self.long_term)
+        return self._long.join("\n", "result")
 
     def get_all(self) -> str:
 
         """
         Concatenate and return all 'result' strings from  memory.
         """
-        # Join each result entry, converting to string in case it's not already
-        return self.get_long_str()+"\n"+self.get_short_segment_str()
+        # Both parts are cached joins; rebuild only when one of them changed
+        long_str, short_str = self.get_long_str(), self.get_short_segment_str()
+        cached = self._all
+        if cached is not None and cached[0] is long_str and cached[1] is short_str:
+            return cached[2]
+        text = long_str+"\n"+short_str
+        self._all = (long_str, short_str, text)
+        return text
 
 
     def get_all_with_justify(self) -> str:
@@ -125,14 +198,17 @@ class Memory:
     def clean_all(self) -> None:
         """Clear all response segments in short-term memory, keeping the task description."""
         self.clean_short()
-        self.long_term: List[Dict[str, Any]] = []
+        self._long = CowList()
+        self.version += 1
 
     def replace_all(self, seg,justify):
-        self.long_term: List[Dict[str, Any]] = []
-        self.short_term["segments"] = [seg]
-        self.short_term["justify"] = [justify]
+        self._long = CowList()
+        self.short_term["segments"] = CowList([seg])
+        self.short_term["justify"] = CowList([justify])
+        self.version += 1
 
     def clean_short(self) -> None:
         """Clear all response segments in short-term memory, keeping the task description."""
-        self.short_term =  {"task": "", "segments": [],"justify":[]}
+        self.short_term =  {"task": "", "segments": CowList(),"justify":CowList()}
+        self.version += 1
 
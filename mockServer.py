@@ -0,0 +1,413 @@
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyModel:
+    """
+    Response latency distribution, parsed from a spec string:
+      "0.2" or "fixed:0.2"          constant seconds
+      "uniform:0.1,0.5"             uniform between two bounds
+      "lognormal:1.0,0.5"           lognormal with the given median and sigma
+      "bimodal:0.5,5.0,0.1"         fast value, slow value, probability of slow
+    """
+
+    def __init__(self, kind: str, args: List[float]):
+        self.kind = kind
+        self.args = args
+
+    @classmethod
+    def parse(cls, spec: Union[str, float, "LatencyModel", None]) -> "LatencyModel":
+        if isinstance(spec, LatencyModel):
+            return spec
+        if spec is None:
+            return cls("fixed", [0.0])
+        if isinstance(spec, (int, float)):
+            return cls("fixed", [float(spec)])
+        kind, _, rest = spec.partition(":")
+        if not rest:
+            return cls("fixed", [float(kind)])
+        args = [float(a) for a in rest.split(",")]
+        if kind not in ("fixed", "uniform", "lognormal", "bimodal"):
+            raise ValueError(f"Unknown latency distribution '{kind}'")
+        return cls(kind, args)
+
+    def sample(self, rng: random.Random) -> float:
+        a = self.args
+        if self.kind == "fixed":
+            return a[0]
+        if self.kind == "uniform":
+            return rng.uniform(a[0], a[1])
+        if self.kind == "lognormal":
+            return a[0] * math.exp(rng.gauss(0, a[1]))
+        return a[1] if rng.random() < a[2] else a[0]
+
+
+# System prompt markers for the prompt families in prompt.py
+FAMILIES = (
+    ("executor", "Incremental Task Developer"),
+    ("validator", "intermediate-step validator"),
+    ("voter", "rank all of the accumulated"),
+    ("decomposer", "task decomposer"),
+    ("batch_validator", "batch validator"),
+)
+
+
+def prompt_family(messages: List[Dict[str, Any]]) -> str:
+    system = next((str(m.get("content", "")) for m in messages if m.get("role") == "system"), "")
+    for family, marker in FAMILIES:
+        if marker in system:
+            return family
+    return "other"
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """
+    OpenAI-compatible /v1/chat/completions endpoint for local load and regression tests.
+    Keeps connections alive (HTTP/1.1) so client-side pooling is observable, and
+    supports streamed (SSE) responses.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # One handler instance per TCP connection
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _send_json(self, code: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, model: str, content: str, usage: Optional[Dict[str, int]] = None) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        cid = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        def event(delta: Dict[str, Any], finish: Optional[str]) -> None:
+            chunk = {
+                "id": cid, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+
+        event({"role": "assistant", "content": ""}, None)
+        step = self.server.stream_chunk_chars
+        for i in range(0, len(content), step):
+            if self.server.stream_interval:
+                time.sleep(self.server.stream_interval)
+            event({"content": content[i:i + step]}, None)
+        event({}, "stop")
+        if usage is not None:
+            final = {"id": cid, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                     "choices": [], "usage": usage}
+            self._write_chunk(f"data: {json.dumps(final)}\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+
+        server = self.server
+        model = request.get("model", "mock")
+        messages = request.get("messages", [])
+        family = prompt_family(messages)
+        with server.lock:
+            server.requests += 1
+            server.by_family[family] += 1
+            limited = (
+                server.rng.random() < server.rate_limit_rate
+                or (server.max_in_flight is not None and server.in_flight >= server.max_in_flight)
+            )
+            if limited:
+                server.rate_limited += 1
+            else:
+                server.in_flight += 1
+            failed = not limited and server.rng.random() < server.error_rate
+            malformed = not limited and not failed and server.rng.random() < server.malformed_rate
+            delay = server.latency_for(model).sample(server.rng)
+            content = None if limited or failed else server.respond(family, model, messages)
+        if limited:
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached (mock)", "type": "rate_limit_exceeded"}},
+                headers={"Retry-After": str(server.retry_after)},
+            )
+            return
+        try:
+            if delay:
+                time.sleep(delay)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+        if failed:
+            with server.lock:
+                server.errors += 1
+            self._send_json(500, {"error": {"message": "Internal server error (mock)", "type": "server_error"}})
+            return
+        if malformed:
+            with server.lock:
+                server.malformed += 1
+            content = content[: max(1, len(content) // 2)]
+
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+        completion_tokens = len(content) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        if request.get("stream"):
+            include_usage = (request.get("stream_options") or {}).get("include_usage")
+            self._send_stream(model, content, usage if include_usage else None)
+            return
+        self._send_json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        latency: Union[str, float, LatencyModel, None] = 0.0,
+        model_latency: Optional[Dict[str, Union[str, float]]] = None,
+        rate_limit_rate: float = 0.0,
+        max_in_flight: Optional[int] = None,
+        retry_after: float = 1.0,
+        error_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        complete_rate: float = 0.3,
+        valid_rate: float = 0.9,
+        verdict_noise: Optional[float] = None,
+        subtasks: int = 3,
+        subtask_deps: Optional[str] = None,
+        content_chars: int = 400,
+        stream_chunk_chars: int = 32,
+        stream_interval: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        """
+        :param latency: Default latency distribution (see LatencyModel.parse).
+        :param model_latency: Per-model latency distributions, overriding `latency`.
+        :param rate_limit_rate: Probability of answering any request with a 429.
+        :param max_in_flight: Answer 429 while this many requests are already being served.
+        :param retry_after: Value of the Retry-After header sent with 429s.
+        :param error_rate: Probability of a 500 response.
+        :param malformed_rate: Probability of returning truncated (invalid) JSON.
+        :param complete_rate: Probability an executor response reports status "complete".
+        :param valid_rate: Probability a validator response is "true".
+        :param verdict_noise: If set, verdicts are a fixed function of the fragment text
+            (so single and batched validation can be compared), flipped with this probability.
+        :param subtasks: Number of subtasks returned by the decomposer.
+        :param subtask_deps: "none" (all independent) or "chain" (each depends on the
+            previous) adds a depends_on list to every subtask; None leaves it out.
+        :param content_chars: Size of each executor new_content segment.
+        :param stream_chunk_chars: Characters per streamed delta.
+        :param stream_interval: Seconds between streamed deltas.
+        """
+        super().__init__(address, MockLLMHandler)
+        self.latency = LatencyModel.parse(latency)
+        self.model_latency = {m: LatencyModel.parse(s) for m, s in (model_latency or {}).items()}
+        self.rate_limit_rate = rate_limit_rate
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.complete_rate = complete_rate
+        self.valid_rate = valid_rate
+        self.verdict_noise = verdict_noise
+        self.subtasks = subtasks
+        self.subtask_deps = subtask_deps
+        self.content_chars = content_chars
+        self.stream_chunk_chars = stream_chunk_chars
+        self.stream_interval = stream_interval
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.malformed = 0
+        self.in_flight = 0
+        self.by_family: Counter = Counter()
+
+    def handle_error(self, request, client_address) -> None:
+        # Clients hang up on purpose (cancelled hedges, early-exit validation); only log real errors
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def latency_for(self, model: str) -> LatencyModel:
+        return self.model_latency.get(model, self.latency)
+
+    def verdict(self, fragment: str) -> bool:
+        """Validator verdict for one fragment (called with self.lock held)."""
+        if self.verdict_noise is None:
+            return self.rng.random() < self.valid_rate
+        digest = int(hashlib.sha1(fragment.strip().encode("utf-8")).hexdigest()[:8], 16)
+        ok = digest / 0xFFFFFFFF < self.valid_rate
+        return ok != (self.rng.random() < self.verdict_noise)
+
+    def respond(self, family: str, model: str, messages: List[Dict[str, Any]]) -> str:
+        """Schema-valid JSON body for the prompt family (called with self.lock held)."""
+        rng = self.rng
+        user = next((str(m.get("content", "")) for m in messages if m.get("role") == "user"), "")
+        if family == "executor":
+            n = self.by_family["executor"]
+            line = f"# segment {n} from {model}\n"
+            body = (line * (self.content_chars // len(line) + 1))[: self.content_chars]
+            return json.dumps({
+                "justify": f"segment {n}: continued the task",
+                "new_content": body,
+                "status": "complete" if rng.random() < self.complete_rate else "ongoing",
+                "mode": "continue",
+            })
+        if family == "validator":
+            ok = self.verdict(user.split("# generated output fragment so far:\n", 1)[-1])
+            return json.dumps({"justify": "" if ok else "mock rejection", "result": "true" if ok else "false"})
+        if family == "voter":
+            versions = max(1, len(re.findall(r"^## Version \d+", user, re.M)))
+            votes = rng.sample(range(versions), min(2, versions))
+            return json.dumps({"justify": "mock ranking", "votes": votes})
+        if family == "batch_validator":
+            candidates = re.split(r"^## Candidate \d+\n", user, flags=re.M)[1:]
+            # Judge the full fragment, i.e. shared context plus the candidate's own part
+            shared = re.search(r"^# shared context[^\n]*\n(.*?)\n\n---\n\n# candidates:", user, re.S | re.M)
+            prefix = shared.group(1) if shared else ""
+            own = [c.rsplit("\n --- \n", 1)[0].replace("(nothing beyond the shared context)", "") for c in candidates]
+            results = [self.verdict(prefix + part) for part in own]
+            return json.dumps({"justify": "mock batch", "results": ["true" if ok else "false" for ok in results]})
+        if family == "decomposer":
+            subtasks = [{"id": i, "objective": f"Part {i + 1} of the task"} for i in range(self.subtasks)]
+            if self.subtask_deps is not None:
+                for i, sub in enumerate(subtasks):
+                    sub["depends_on"] = [i - 1] if self.subtask_deps == "chain" and i else []
+            return json.dumps({"subtasks": subtasks})
+        return json.dumps({"justify": "", "result": "true"})
+
+    def summary(self) -> str:
+        return (
+            f"requests={self.requests} connections={self.connections} 429s={self.rate_limited} "
+            f"errors={self.errors} malformed={self.malformed} by_family={dict(self.by_family)}"
+        )
+
+
+def start_mock_server(host: str = "127.0.0.1", port: int = 0, **kwargs) -> MockLLMServer:
+    """Start a MockLLMServer on a daemon thread and return it (use .base_url / .shutdown())."""
+    server = MockLLMServer((host, port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Mock LLM server listening on {server.base_url}")
+    return server
+
+
+def add_server_args(parser) -> None:
+    """Command-line options shared by this module and the benchmark harnesses."""
+    parser.add_argument("--latency", default="0", help="latency spec, e.g. 0.2, uniform:0.1,0.5, lognormal:1,0.5")
+    parser.add_argument(
+        "--model-latency", action="append", default=[], metavar="MODEL=SPEC",
+        help="per-model latency spec (repeatable)",
+    )
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="probability of a 429")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="429 above this many concurrent requests")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a 500")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="probability of truncated JSON")
+    parser.add_argument("--complete-rate", type=float, default=0.3)
+    parser.add_argument("--valid-rate", type=float, default=0.9)
+    parser.add_argument(
+        "--verdict-noise", type=float, default=None,
+        help="make verdicts a function of the fragment, flipped with this probability",
+    )
+    parser.add_argument("--subtasks", type=int, default=3)
+    parser.add_argument(
+        "--subtask-deps", choices=("none", "chain"), default=None,
+        help="add depends_on lists to decomposer subtasks",
+    )
+    parser.add_argument("--content-chars", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def server_kwargs(args) -> Dict[str, Any]:
+    return {
+        "latency": args.latency,
+        "model_latency": dict(spec.split("=", 1) for spec in args.model_latency),
+        "rate_limit_rate": args.rate_limit_rate,
+        "max_in_flight": args.max_in_flight,
+        "retry_after": args.retry_after,
+        "error_rate": args.error_rate,
+        "malformed_rate": args.malformed_rate,
+        "complete_rate": args.complete_rate,
+        "valid_rate": args.valid_rate,
+        "verdict_noise": args.verdict_noise,
+        "subtasks": args.subtasks,
+        "subtask_deps": args.subtask_deps,
+        "content_chars": args.content_chars,
+        "seed": args.seed,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    add_server_args(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    server = MockLLMServer((args.host, args.port), **server_kwargs(args))
+    logger.info(f"Mock LLM server listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+        logger.info(server.summary())
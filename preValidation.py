@@ -0,0 +1,356 @@
+import asyncio
+import atexit
+import codeop
+import logging
+import re
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Process-wide counters: fragments checked locally and how many were rejected before
+# any LLM validator call.
+STATS: Dict[str, int] = {"checked": 0, "rejected": 0}
+
+_OUTPUT_FORMAT = re.compile(r"^\s*Output Format\s*:\s*(.+?)\s*$", re.I | re.M)
+# ```lang ... ``` blocks; an unterminated last block runs to the end of the text
+_FENCE = re.compile(r"^[ \t]*```[ \t]*([\w+#.-]*)[^\n]*\n(.*?)(?:^[ \t]*```[ \t]*$|\Z)", re.S | re.M)
+
+
+@dataclass(frozen=True)
+class PreValidator:
+    """
+    A local syntax check for one output format.
+
+    :param check: check(text, complete) -> None if the text is acceptable, else a short
+        reason. With complete=False the text may still be cut off at the end, so only
+        errors that no continuation could fix are reported.
+    :param keywords: Words in the objective's "Output Format:" line that select this check.
+    :param fences: Languages of fenced code blocks to check; unfenced text is checked whole.
+    """
+    kind: str
+    check: Callable[[str, bool], Optional[str]]
+    keywords: Tuple[str, ...]
+    fences: Tuple[str, ...]
+
+
+_validators: Dict[str, PreValidator] = {}
+
+
+def register(kind: str, keywords: Tuple[str, ...], fences: Tuple[str, ...] = ()):
+    """Decorator registering check(text, complete) as the pre-validator for `kind`."""
+    def decorator(check: Callable[[str, bool], Optional[str]]):
+        _validators[kind] = PreValidator(kind, check, tuple(keywords), tuple(fences))
+        return check
+    return decorator
+
+
+def output_kind(objective: str) -> Optional[str]:
+    """The registered kind matching the objective's last "Output Format:" line, if any."""
+    declared = _OUTPUT_FORMAT.findall(objective or "")
+    if not declared:
+        return None
+    words = set(re.findall(r"[a-z0-9]+", declared[-1].lower()))
+    for validator in _validators.values():
+        if words & set(validator.keywords):
+            return validator.kind
+    return None
+
+
+def code_blocks(text: str, fences: Tuple[str, ...]) -> List[str]:
+    """Fenced blocks in one of the `fences` languages (or untagged), else the whole text."""
+    blocks = _FENCE.findall(text)
+    if not blocks:
+        return [text]
+    return [body for lang, body in blocks if not lang or lang.lower() in fences]
+
+
+def run_check(kind: str, text: str, complete: bool) -> Optional[str]:
+    """Run the `kind` check on every relevant block of `text`. Executes in a pool worker."""
+    validator = _validators[kind]
+    blocks = code_blocks(text, validator.fences)
+    for i, block in enumerate(blocks):
+        # Only the last block can still be growing
+        error = validator.check(block, complete or i < len(blocks) - 1)
+        if error is not None:
+            return error if len(blocks) == 1 else f"block {i + 1}: {error}"
+    return None
+
+
+# A line of explanation rather than code: unindented, several words, no assignment or brackets
+_PROSE = re.compile(r"^[^\W\d_][^=\[\]{}]*(?:\s+[^\s=\[\]{}]+){2,}\s*$")
+
+
+def _is_prose(line: str) -> bool:
+    """True for a line such as "Here is the updated game loop:" that is not Python."""
+    if not line.strip():
+        return True
+    if not _PROSE.match(line):
+        return False
+    try:
+        compile(line, "<line>", "exec", dont_inherit=True)
+        return False
+    except (SyntaxError, ValueError):
+        pass
+    try:
+        # An unfinished statement such as "def f(a, b):" is code
+        return codeop.compile_command(line, "<line>", "exec") is not None
+    except (SyntaxError, ValueError, OverflowError):
+        return True
+
+
+@register("python", keywords=("python", "pygame"), fences=("python", "py", "python3"))
+def check_python(text: str, complete: bool) -> Optional[str]:
+    lines = text.split("\n")
+    if not complete and not text.endswith("\n"):
+        # The last line may be cut off mid-token ("else", 'x = "abc'); more text can fix anything in it
+        lines.pop()
+    # Explanations before the code (unfenced answers often start with one) are not checked
+    skipped = 0
+    while skipped < len(lines) and _is_prose(lines[skipped]):
+        skipped += 1
+    code = "\n".join(lines[skipped:]) + "\n"
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            compile(code, "<fragment>", "exec", dont_inherit=True)
+            return None
+        except (SyntaxError, ValueError) as e:
+            error = e
+        if not complete:
+            try:
+                # None means valid so far but unfinished, e.g. an open bracket or block
+                if codeop.compile_command(code, "<fragment>", "exec") is None:
+                    return None
+            except (SyntaxError, ValueError, OverflowError):
+                pass
+    if isinstance(error, SyntaxError):
+        return f"line {(error.lineno or 0) + skipped}: {error.msg}"
+    return str(error)
+
+
+# Elements that never have an end tag, and those whose end tag may be left out
+VOID_ELEMENTS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "param", "source", "track", "wbr", "keygen", "command", "basefont", "frame",
+))
+OPTIONAL_END = frozenset((
+    "html", "head", "body", "p", "li", "dt", "dd", "tr", "td", "th", "thead", "tbody",
+    "tfoot", "option", "optgroup", "colgroup", "caption", "rt", "rp",
+))
+
+
+class _TagBalance(HTMLParser):
+    """Tracks open elements and records the first mis-nested or stray end tag."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.open: List[Tuple[str, int]] = []
+        self.error: Optional[str] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in VOID_ELEMENTS:
+            self.open.append((tag, self.getpos()[0]))
+
+    def handle_endtag(self, tag):
+        if self.error is not None or tag in VOID_ELEMENTS:
+            return
+        line = self.getpos()[0]
+        names = [name for name, _ in self.open]
+        if tag not in names:
+            if tag not in OPTIONAL_END:
+                self.error = f"line {line}: </{tag}> has no matching <{tag}>"
+            return
+        idx = len(names) - 1 - names[::-1].index(tag)
+        unclosed = [(name, ln) for name, ln in self.open[idx + 1:] if name not in OPTIONAL_END]
+        if unclosed:
+            name, ln = unclosed[-1]
+            self.error = f"line {line}: </{tag}> closes <{tag}> while <{name}> from line {ln} is still open"
+        del self.open[idx:]
+
+
+@register("html", keywords=("html", "html5", "xhtml"), fences=("html", "htm", "xhtml"))
+def check_html(text: str, complete: bool) -> Optional[str]:
+    parser = _TagBalance()
+    parser.feed(text)
+    if parser.error is None and complete:
+        parser.close()
+        unclosed = [(name, ln) for name, ln in parser.open if name not in OPTIONAL_END]
+        if unclosed:
+            name, ln = unclosed[-1]
+            return f"<{name}> from line {ln} is never closed"
+    return parser.error
+
+
+# Environments whose body is not TeX, and macros whose arguments may hold unbalanced \begin/\end
+VERBATIM_ENVS = frozenset(("verbatim", "verbatim*", "Verbatim", "lstlisting", "minted", "comment", "filecontents"))
+DEFINITION_ARGS = {
+    "newcommand": 1, "renewcommand": 1, "providecommand": 1, "newcommand*": 1, "renewcommand*": 1,
+    "newenvironment": 2, "renewenvironment": 2, "newenvironment*": 2, "renewenvironment*": 2,
+    "def": 1, "gdef": 1, "edef": 1, "xdef": 1,
+}
+_CONTROL = re.compile(r"\\(?:([A-Za-z@]+\*?)|.)", re.S)
+_ENV_NAME = re.compile(r"\s*\{([^{}]*)\}")
+
+
+def _skip_group(text: str, i: int) -> int:
+    """Index just past the brace group starting at text[i] == '{' (or len(text) if unclosed)."""
+    depth = 0
+    while i < len(text):
+        c = text[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "%":
+            end = text.find("\n", i)
+            i = len(text) if end < 0 else end
+            continue
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+def _skip_definition(text: str, i: int, groups: int) -> int:
+    """Skip the name, optional arguments and `groups` body groups of a definition macro."""
+    n = len(text)
+    while i < n and text[i].isspace():
+        i += 1
+    # The name: {\foo} or {env}, or a bare control sequence
+    if i < n and text[i] == "{":
+        i = _skip_group(text, i)
+    elif i < n and text[i] == "\\":
+        m = _CONTROL.match(text, i)
+        i = n if m is None else m.end()
+    while groups and i < n:
+        c = text[i]
+        if c == "{":
+            i = _skip_group(text, i)
+            groups -= 1
+        elif c == "[":
+            end = text.find("]", i)
+            i = n if end < 0 else end + 1
+        else:
+            # Whitespace, or \def parameter text such as #1#2
+            i += 1
+    return i
+
+
+@register("latex", keywords=("latex", "tex", "beamer"), fences=("latex", "tex"))
+def check_latex(text: str, complete: bool) -> Optional[str]:
+    stack: List[Tuple[str, int]] = []  # ("{", line) or (environment name, line)
+    line = 1
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+        if c == "\n":
+            line += 1
+        elif c == "%":
+            end = text.find("\n", i)
+            i = n if end < 0 else end
+            continue
+        elif c == "{":
+            stack.append(("{", line))
+        elif c == "}":
+            if not stack or stack[-1][0] != "{":
+                if stack:
+                    return f"line {line}: '}}' closes \\begin{{{stack[-1][0]}}} from line {stack[-1][1]}"
+                return f"line {line}: unmatched '}}'"
+            stack.pop()
+        elif c == "\\":
+            m = _CONTROL.match(text, i)
+            if m is None:  # trailing backslash
+                break
+            word = m.group(1)
+            j = m.end()
+            if word in ("begin", "end"):
+                env = _ENV_NAME.match(text, j)
+                if env is None:
+                    if j >= n and not complete:
+                        return None
+                    return f"line {line}: \\{word} without an environment name"
+                name = env.group(1).strip()
+                j = env.end()
+                if word == "begin":
+                    if name in VERBATIM_ENVS:
+                        close = text.find(f"\\end{{{name}}}", j)
+                        if close < 0:
+                            return None if not complete else f"line {line}: \\begin{{{name}}} is never closed"
+                        j = close + len(f"\\end{{{name}}}")
+                    else:
+                        stack.append((name, line))
+                elif not stack:
+                    return f"line {line}: \\end{{{name}}} without \\begin{{{name}}}"
+                elif stack[-1][0] != name:
+                    top, top_line = stack[-1]
+                    opened = "'{'" if top == "{" else f"\\begin{{{top}}}"
+                    return f"line {line}: \\end{{{name}}} while {opened} from line {top_line} is still open"
+                else:
+                    stack.pop()
+            elif word == "verb" and j < n:
+                end = text.find(text[j], j + 1)
+                j = n if end < 0 else end + 1
+            elif word in DEFINITION_ARGS:
+                j = _skip_definition(text, j, DEFINITION_ARGS[word])
+            line += text.count("\n", i + 1, j)
+            i = j
+            continue
+        i += 1
+    if complete and stack:
+        name, ln = stack[-1]
+        return f"'{{' from line {ln} is never closed" if name == "{" else f"\\begin{{{name}}} from line {ln} is never closed"
+    return None
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=Config.PRE_VALIDATION_WORKERS)
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+async def pre_validate(kind: str, text: str, complete: bool) -> Optional[str]:
+    """
+    Check `text` against the `kind` pre-validator in the worker pool, so parsing
+    large fragments never blocks the event loop. Falls back to a thread if the
+    process pool cannot be used. Returns None if the text passes, else the reason.
+    """
+    STATS["checked"] += 1
+    loop = asyncio.get_running_loop()
+    try:
+        error = await loop.run_in_executor(_get_pool(), run_check, kind, text, complete)
+    except (BrokenProcessPool, OSError, RuntimeError) as e:
+        logger.warning(f"Pre-validation pool unavailable ({e}), checking in a thread instead.")
+        shutdown_pool()
+        error = await asyncio.to_thread(run_check, kind, text, complete)
+    if error is not None:
+        STATS["rejected"] += 1
+    return error
+
+
+def pre_validation_summary() -> str:
+    checked = STATS["checked"] or 1
+    return f"fragments checked={STATS['checked']} rejected={STATS['rejected']} ({STATS['rejected'] / checked:.1%})"
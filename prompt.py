@@ -30,6 +30,36 @@ Sample response format:
 '''
 
 
+BATCH_VALIDATOR_PROMPT = '''
+You are a batch validator of intermediate steps. Several candidate outputs were produced independently for the same task. Assess each candidate on its own: does its accumulated output correctly align with the overall task and is it error-free enough to continue generation?
+
+Inputs:
+1. ### overall objective
+2. ### current task description
+3. ### candidates, each headed "## Candidate <index>"
+
+
+Validation Criteria (apply to every candidate separately, do not compare candidates with each other):
+- Does the candidate logically continue the task as described?
+- Is it free from critical errors, omissions, or contradictions?
+- Is it sufficient to serve as the basis for the next iteration?
+
+Output Instructions:
+Return a single JSON object with exactly two keys:
+1. **justify** (str): briefly justify the errors found, naming the candidate index
+2. **results** (list): one entry per candidate, in candidate order, each "true" or "false" only
+
+
+Sample response format for three candidates:
+
+```json
+{
+  "justify": ""
+  "results": ["true", "false", "true"]
+}
+```
+'''
+
 VOTING_PROMPT = '''
 You are an validator. Your task is to rank all of the accumulated previous outputs and deterimine which answer is correct.
 
@@ -119,6 +149,7 @@ You are an **task decomposer**. Your job is to split a task into strictly simple
 - The final result of the task must be a **simple concatenation** of each subtask’s output, in sequence. Design subtasks so their outputs can be directly concatenated and compiled without additional processing.
 - **Do not** include any meta-planning subtasks (e.g., “Plan steps”, “Outline”, “Define framework”). The executor will handle all planning.
 - List each subtask in the **exact order** it must be executed.
+- For each subtask, list in **depends_on** the ids of earlier subtasks whose output must be seen to write it (e.g. code calling functions defined in an earlier subtask). Use an empty list when the subtask can be written from the overall objective alone; such subtasks are executed in parallel. Their outputs are still concatenated in the listed order.
 - All defined subtasks must **strictly consistent with the output format** defined in the overall objective without any additional words. Do not change the format. Within each subtask's objective, the required output format should be explicitly declared as in the last line.
 - the system cannot create any files
 ---
@@ -127,22 +158,25 @@ You are an **task decomposer**. Your job is to split a task into strictly simple
 
 Return a single JSON object with exactly one key:
 
-1. **subtasks** (list): a list of all subtasks
+1. **subtasks** (list): a list of all subtasks, each with an **id**, an **objective** and a **depends_on** list of earlier ids
 
 ```json
 {
   "subtasks": [
     {
       "id": 0,
-      "objective": "..."
+      "objective": "...",
+      "depends_on": []
     },
     {
       "id": 1,
-      "objective": "..."
+      "objective": "...",
+      "depends_on": []
     },
     {
       "id": 2,
-      "objective": "..."
+      "objective": "...",
+      "depends_on": [0, 1]
     }
   ]
 }
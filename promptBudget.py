@@ -0,0 +1,192 @@
+import logging
+import string
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_DROP_PUNCT = str.maketrans("", "", string.punctuation)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast local token estimate without a tokenizer: one token per punctuation mark,
+    at least one per word and about one per 4 word characters. Runs at C speed
+    (str.translate/str.split) and errs slightly high for English and code, which
+    is the safe side for budgeting.
+    """
+    if not text:
+        return 0
+    stripped = text.translate(_DROP_PUNCT)
+    words = stripped.split()
+    word_chars = sum(map(len, words))
+    return (len(text) - len(stripped)) + max(len(words), (word_chars + len(words)) // 4)
+
+
+def elide(text: str, max_tokens: int, marker: str = "\n[... {n} tokens omitted ...]\n") -> str:
+    """Shorten `text` to about `max_tokens` by cutting out its middle, keeping head and tail."""
+    total = estimate_tokens(text)
+    if total <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return marker.format(n=total).strip()
+    # Characters per token for this text, used to convert the budget into a cut
+    ratio = len(text) / total
+    keep = max(0, int((max_tokens - estimate_tokens(marker)) * ratio))
+    head = keep // 3
+    tail = keep - head
+    return text[:head] + marker.format(n=total - max_tokens) + text[len(text) - tail:]
+
+
+def shared_prefix(texts: List[str], min_chars: int = 0) -> Tuple[str, List[str]]:
+    """
+    Split `texts` into the leading lines they all share and the divergent rest of
+    each. Returns ("", texts) when there are fewer than two texts or the shared
+    lines are shorter than `min_chars`.
+    """
+    if len(texts) < 2:
+        return "", texts
+    # The common prefix of the lexicographic min and max is common to all of them
+    first, last = min(texts), max(texts)
+    lo, hi = 0, min(len(first), len(last))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if first[:mid] == last[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    # Cut at a line boundary so no candidate starts mid-line
+    cut = first.rfind("\n", 0, lo) + 1
+    if cut == 0 or cut < min_chars:
+        return "", texts
+    return first[:cut], [t[cut:] for t in texts]
+
+
+class PromptBudget:
+    """
+    Token budget for one model's prompts: the smaller of its context window minus
+    the room reserved for the answer and a per-call cost cap.
+
+    Agent prompts are fitted by trimming memory in this order, stopping as soon
+    as the prompt fits:
+      1. elide the middle of long-term entries, oldest first, down to ENTRY_FLOOR tokens
+      2. drop long-term entries entirely, oldest first (a one-line marker remains)
+      3. elide the justifications
+      4. elide the middle of short-term segments, oldest first (the newest is last to go)
+    """
+
+    ENTRY_FLOOR = 256
+
+    def __init__(self, model: str, context_tokens: int, output_reserve: int, max_prompt_tokens: Optional[int]):
+        self.model = model
+        self.limit = context_tokens - output_reserve
+        if max_prompt_tokens is not None:
+            self.limit = min(self.limit, max_prompt_tokens)
+
+    @classmethod
+    def for_model(cls, model: str) -> "PromptBudget":
+        cfg = {**Config.PROMPT_BUDGET_DEFAULT, **Config.PROMPT_BUDGETS.get(model, {})}
+        return cls(model, cfg["context"], cfg["output_reserve"], cfg.get("max_prompt_tokens"))
+
+    def fits(self, texts: List[str], overhead: str) -> bool:
+        """Whether `texts` fit what is left of the budget after `overhead`, as they are."""
+        return estimate_tokens(overhead) + sum(map(estimate_tokens, texts)) <= self.limit
+
+    def fit_memory(
+        self,
+        long_term: List[Dict[str, Any]],
+        segments: List[str],
+        justify: str,
+        overhead: str,
+        label: str = "",
+    ) -> Tuple[str, str]:
+        """
+        Fit memory into what is left of the budget after `overhead` (system prompt and
+        fixed user text). Returns (prior, justify) rendered like Memory.get_all() and
+        Memory.get_short_justify_str(). Memory itself is never modified. Builds a
+        trimmed copy entry by entry, so callers check fits() on Memory's cached text first.
+        """
+        longs = [str(e.get("result", "")) for e in long_term]
+        segs = list(segments)
+        sizes = {"long": [estimate_tokens(t) for t in longs], "seg": [estimate_tokens(t) for t in segs]}
+        jf_size = estimate_tokens(justify)
+        available = self.limit - estimate_tokens(overhead)
+
+        def total() -> int:
+            return sum(sizes["long"]) + sum(sizes["seg"]) + jf_size
+
+        before = total()
+        trimmed: Counter = Counter()
+
+        for i, text in enumerate(longs):
+            if total() <= available:
+                break
+            if sizes["long"][i] > self.ENTRY_FLOOR:
+                target = max(self.ENTRY_FLOOR, sizes["long"][i] - (total() - available))
+                longs[i] = elide(text, target)
+                sizes["long"][i] = estimate_tokens(longs[i])
+                trimmed["long-term entries truncated"] += 1
+
+        for i in range(len(longs)):
+            if total() <= available:
+                break
+            task = long_term[i].get("task") or ""
+            longs[i] = f"[earlier result omitted: {task[:80]}]"
+            sizes["long"][i] = estimate_tokens(longs[i])
+            trimmed["long-term entries dropped"] += 1
+
+        if total() > available and jf_size:
+            justify = elide(justify, max(0, jf_size - (total() - available)))
+            jf_size = estimate_tokens(justify)
+            trimmed["justifications truncated"] += 1
+
+        for i, text in enumerate(segs):
+            if total() <= available:
+                break
+            segs[i] = elide(text, max(0, sizes["seg"][i] - (total() - available)))
+            sizes["seg"][i] = estimate_tokens(segs[i])
+            trimmed["segments truncated"] += 1
+
+        if trimmed:
+            logger.info(
+                f"{label}prompt budget for {self.model}: memory {before} -> {total()} tokens "
+                f"(limit {available}): " + ", ".join(f"{n} {what}" for what, n in trimmed.items())
+            )
+        prior = "\n".join(longs) + "\n" + "\n".join(segs)
+        return prior, justify
+
+    def fit_texts(self, texts: List[str], overhead: str, label: str = "") -> List[str]:
+        """
+        Fit a list of independent texts (validator fragments, vote candidates) by
+        giving each an equal share of the budget and eliding the middle of any that
+        exceed it.
+        """
+        available = self.limit - estimate_tokens(overhead)
+        sizes = [estimate_tokens(t) for t in texts]
+        if sum(sizes) <= available or not texts:
+            return texts
+        share = max(0, available // len(texts))
+        # Texts under their share donate the slack to the longer ones
+        short = [s for s in sizes if s <= share]
+        long_count = len(texts) - len(short)
+        if long_count:
+            share = max(share, (available - sum(short)) // long_count)
+        fitted = [t if n <= share else elide(t, share) for t, n in zip(texts, sizes)]
+        logger.info(
+            f"{label}prompt budget for {self.model}: {sum(sizes)} -> "
+            f"{sum(estimate_tokens(t) for t in fitted)} tokens (limit {available}), "
+            f"elided {sum(1 for n in sizes if n > share)} of {len(texts)} texts"
+        )
+        return fitted
+
+    def fit_around(self, fixed: str, context: List[str], overhead: str, label: str = "") -> Optional[List[str]]:
+        """
+        Fit `context` (objective, task text) into what is left of the budget after
+        `overhead` and `fixed`, the text under review, which is never trimmed.
+        Returns None when `fixed` does not fit even with no context at all.
+        """
+        if estimate_tokens(overhead) + estimate_tokens(fixed) > self.limit:
+            return None
+        return self.fit_texts(context, overhead + fixed, label=label)
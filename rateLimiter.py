@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from config import Config
+from promptBudget import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute, holding at most one minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float) -> None:
+        """Give back (or, if negative, charge) units after the real cost is known."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits for one (provider, model),
+    plus an adaptive cap on in-flight requests.
+
+    Callers queue FIFO for a permit. A rate-limit response halves the concurrency
+    cap and pauses the queue for the server's Retry-After; each run of successes
+    as long as the current cap raises it by one again (AIMD).
+    """
+
+    def __init__(self, name: str, rpm: float, tpm: float, max_concurrency: int):
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.concurrency = max_concurrency
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._successes = 0
+        self._queue = asyncio.Lock()        # asyncio.Lock wakes waiters in FIFO order
+        self._slots = asyncio.Condition()
+        self.stats: Dict[str, int] = {"requests": 0, "rate_limited": 0, "queued_ms": 0}
+
+    async def _acquire(self, est_tokens: int) -> None:
+        async with self._queue:
+            while True:
+                delay = max(
+                    self.paused_until - time.monotonic(),
+                    self.requests.wait_time(1),
+                    self.tokens.wait_time(est_tokens),
+                )
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+            async with self._slots:
+                await self._slots.wait_for(lambda: self.in_flight < self.concurrency)
+                self.in_flight += 1
+            self.requests.take(1)
+            self.tokens.take(est_tokens)
+
+    async def _release(self) -> None:
+        async with self._slots:
+            self.in_flight -= 1
+            self._slots.notify_all()
+
+    @asynccontextmanager
+    async def permit(self, est_tokens: int) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Hold one request slot. Set permit["tokens"] to the real token count once known
+        so the tokens-per-minute bucket is corrected.
+        """
+        start = time.monotonic()
+        await self._acquire(est_tokens)
+        self.stats["requests"] += 1
+        self.stats["queued_ms"] += int((time.monotonic() - start) * 1000)
+        permit: Dict[str, Any] = {"tokens": None}
+        try:
+            yield permit
+        finally:
+            if permit["tokens"] is not None:
+                self.tokens.refund(est_tokens - permit["tokens"])
+            await self._release()
+
+    def on_success(self) -> None:
+        self._successes += 1
+        if self.concurrency < self.max_concurrency and self._successes >= self.concurrency:
+            self.concurrency += 1
+            self._successes = 0
+
+    def on_rate_limited(self, retry_after: Optional[float], attempt: int) -> float:
+        """Shrink concurrency and pause the queue; returns the pause in seconds."""
+        self.stats["rate_limited"] += 1
+        self._successes = 0
+        now = time.monotonic()
+        # A burst of 429s from the same window only shrinks the cap once
+        if now >= self.paused_until:
+            self.concurrency = max(1, self.concurrency // 2)
+        if retry_after is None:
+            retry_after = min(Config.RATE_LIMIT_MAX_BACKOFF, Config.RATE_LIMIT_BASE_BACKOFF * 2 ** attempt)
+        self.paused_until = max(self.paused_until, now + retry_after)
+        logger.warning(
+            f"Rate limited on {self.name}: concurrency -> {self.concurrency}, pausing {retry_after:.2f}s"
+        )
+        return retry_after
+
+
+def parse_retry_after(headers: Any) -> Optional[float]:
+    """Seconds to wait from Retry-After / retry-after-ms response headers, if present."""
+    if not headers:
+        return None
+    ms = headers.get("retry-after-ms")
+    if ms:
+        try:
+            return float(ms) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def estimate_request_tokens(messages: List[Dict[str, Any]], max_tokens: Optional[int]) -> int:
+    """Rough token cost of a request for tokens-per-minute accounting."""
+    prompt_tokens = sum(estimate_tokens(str(m.get("content", ""))) for m in messages)
+    return prompt_tokens + (max_tokens or Config.RATE_LIMIT_COMPLETION_ESTIMATE)
+
+
+_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+
+
+def get_rate_limiter(provider: str, model: str) -> RateLimiter:
+    """Process-wide limiter for (provider, model), configured from Config.RATE_LIMITS."""
+    key = (provider, model)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        limits = {**Config.RATE_LIMIT_DEFAULT, **Config.RATE_LIMITS.get(model, {})}
+        limiter = RateLimiter(f"{provider}/{model}", limits["rpm"], limits["tpm"], limits["max_concurrency"])
+        _limiters[key] = limiter
+    return limiter
+
+
+def reset_rate_limiters() -> None:
+    """Forget all limiters, e.g. between separate asyncio.run() invocations."""
+    _limiters.clear()
@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(
+    provider: str,
+    model: str,
+    messages: List[Dict[str, Any]],
+    temperature: Optional[float],
+    response_format: Optional[Dict[str, Any]],
+    max_tokens: Optional[int] = None,
+) -> str:
+    """
+    Content address of a chat request: sha256 over its canonical JSON form.
+    max_tokens is part of the address only when set, so keys of requests without
+    a completion limit stay the same.
+    """
+    request = {
+        "provider": provider,
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "response_format": response_format,
+    }
+    if max_tokens is not None:
+        request["max_tokens"] = max_tokens
+    payload = json.dumps(
+        request,
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache of chat completion responses.
+
+    Memory tier:
+      - An LRU of at most `memory_entries` responses.
+    Disk tier:
+      - A SQLite table capped at `disk_max_bytes` of response text, entries
+        older than `ttl` seconds are treated as misses and purged.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = Config.RESPONSE_CACHE_PATH,
+        memory_entries: int = Config.RESPONSE_CACHE_MEMORY_ENTRIES,
+        disk_max_bytes: int = Config.RESPONSE_CACHE_DISK_MAX_BYTES,
+        ttl: Optional[float] = Config.RESPONSE_CACHE_TTL,
+    ):
+        """
+        :param path: SQLite file for the disk tier, or None for memory only.
+        :param memory_entries: Maximum number of responses kept in memory.
+        :param disk_max_bytes: Maximum total size of responses kept on disk.
+        :param ttl: Seconds before an entry expires, or None to never expire.
+        """
+        self.memory_entries = memory_entries
+        self.disk_max_bytes = disk_max_bytes
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+            self._db.commit()
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def _remember(self, key: str, value: str, created: float) -> None:
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for `key`, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                if not self._expired(hit[1], now):
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return hit[0]
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    if not self._expired(row[1], now):
+                        self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember(key, row[0], row[1])
+                        self.stats["disk_hits"] += 1
+                        return row[0]
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        """Store a response in both tiers, evicting expired and least recently used entries."""
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self.stats["stores"] += 1
+            if self._db is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now),
+            )
+            if self.ttl is not None:
+                self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            while total > self.disk_max_bytes:
+                row = self._db.execute("SELECT key, size FROM responses ORDER BY accessed LIMIT 1").fetchone()
+                if row is None or row[0] == key:
+                    break
+                self._db.execute("DELETE FROM responses WHERE key = ?", (row[0],))
+                self.stats["evictions"] += 1
+                total -= row[1]
+            self._db.commit()
+
+    async def aget(self, key: str) -> Optional[str]:
+        # Disk lookups run off the event loop
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self.put, key, value)
+
+    def hit_rate(self) -> float:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def delete(self, key: str) -> None:
+        """Drop `key` from both tiers."""
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_default_cache: Optional[ResponseCache] = None
+
+
+def get_default_cache() -> ResponseCache:
+    """Process-wide cache shared by every LLMClient that opts in via Config."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResponseCache()
+    return _default_cache
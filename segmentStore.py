@@ -0,0 +1,202 @@
+import itertools
+from collections.abc import MutableSequence
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# Process-wide counters: snapshots published, O(1) shares handed to a memory,
+# copy-on-write materializations with the number of entry references they copied,
+# and joined views served from cache, extended with new items, or built from scratch.
+STATS: Dict[str, int] = {
+    "published": 0, "shared": 0, "copies": 0, "entries_copied": 0,
+    "joins_cached": 0, "joins_extended": 0, "joins_built": 0,
+}
+
+# Cached joins: (separator, field) -> (joined text, number of items it covers)
+Joins = Dict[Tuple[str, Optional[str]], Tuple[str, int]]
+
+_versions = itertools.count(1)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    An immutable, versioned list of memory entries (long-term entries or short-term
+    segments). Any number of agents may reference the same snapshot; two memories
+    holding the same version hold the same content.
+    """
+    version: int
+    items: Tuple[Any, ...]
+    # Joined views of `items`, shared by every memory reading this snapshot
+    joins: Joins = field(default_factory=dict, compare=False, repr=False)
+
+
+EMPTY = Snapshot(0, ())
+
+
+def publish(items: Iterable[Any], joins: Optional[Joins] = None) -> Snapshot:
+    STATS["published"] += 1
+    return Snapshot(next(_versions), tuple(items), dict(joins or {}))
+
+
+def _formatter(key: Optional[str]) -> Callable[[Any], str]:
+    if key is None:
+        return str
+    return lambda item: str(item.get(key, ""))
+
+
+class CowList(MutableSequence):
+    """
+    A list backed by a shared Snapshot with a private copy-on-write overlay.
+
+    Reading never copies. The first write after sharing copies the snapshot's
+    entry references (not the entries themselves) into a private list. Entries
+    are treated as immutable once stored: code that changes an entry must replace
+    it rather than mutate it in place, or every agent sharing it would see the change.
+
+    join() caches the concatenated text. Appends only queue new items behind the
+    cached prefix, which the next join folds in; any other write drops the cache.
+    """
+
+    __slots__ = ("_base", "_own", "_joins", "_edits", "__weakref__")
+
+    def __init__(self, items: Iterable[Any] = ()):
+        self._base: Snapshot = EMPTY
+        self._own: Optional[list] = list(items)
+        self._joins: Joins = {}
+        self._edits = 0
+
+    @classmethod
+    def shared(cls, snapshot: Snapshot) -> "CowList":
+        """A list reading `snapshot` until it is first written to. O(1)."""
+        view = cls.__new__(cls)
+        view._base = snapshot
+        view._own = None
+        view._joins = snapshot.joins
+        view._edits = 0
+        STATS["shared"] += 1
+        return view
+
+    def snapshot(self) -> Snapshot:
+        """
+        The current content as a Snapshot. Free while unchanged since the last
+        share or snapshot; otherwise publishes the private list once and reads from
+        the new snapshot until the next write.
+        """
+        if self._own is not None:
+            self._base = publish(self._own, self._joins)
+            self._own = None
+            self._joins = self._base.joins
+        return self._base
+
+    @property
+    def edits(self) -> int:
+        """Writes other than appends so far; while it is unchanged the list has only grown."""
+        return self._edits
+
+    @property
+    def version(self) -> Optional[int]:
+        """Version of the shared snapshot, or None if changed privately since."""
+        return self._base.version if self._own is None else None
+
+    def _view(self):
+        return self._base.items if self._own is None else self._own
+
+    def _writable(self, keep_joins: bool = False) -> list:
+        """The private list, copied from the snapshot on first use. Unless the write
+        only appends (keep_joins), cached joins no longer match and are dropped."""
+        if not keep_joins:
+            self._edits += 1
+        if self._own is None:
+            self._own = list(self._base.items)
+            # The snapshot's cache stays with the snapshot; start a private one
+            self._joins = dict(self._base.joins) if keep_joins else {}
+            STATS["copies"] += 1
+            STATS["entries_copied"] += len(self._own)
+        elif not keep_joins and self._joins:
+            self._joins = {}
+        return self._own
+
+    def join(self, sep: str, key: Optional[str] = None) -> str:
+        """
+        sep.join of the items (or of str(item.get(key, "")) for dict entries).
+        Served from cache when nothing changed since the last call; after appends
+        only the new items are formatted and joined onto the cached text.
+        """
+        items = self._view()
+        cached = self._joins.get((sep, key))
+        if cached is not None and cached[1] == len(items):
+            STATS["joins_cached"] += 1
+            return cached[0]
+        fmt = _formatter(key)
+        if cached is not None and 0 < cached[1] < len(items):
+            text = sep.join([cached[0], *map(fmt, items[cached[1]:])])
+            STATS["joins_extended"] += 1
+        else:
+            text = sep.join(map(fmt, items))
+            STATS["joins_built"] += 1
+        self._joins[(sep, key)] = (text, len(items))
+        return text
+
+    def __len__(self) -> int:
+        return len(self._view())
+
+    def __iter__(self):
+        return iter(self._view())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._view()[index])
+        return self._view()[index]
+
+    def __setitem__(self, index, value) -> None:
+        self._writable()[index] = value
+
+    def __delitem__(self, index) -> None:
+        del self._writable()[index]
+
+    def insert(self, index: int, value: Any) -> None:
+        if index >= len(self):
+            self.append(value)
+        else:
+            self._writable().insert(index, value)
+
+    def append(self, value: Any) -> None:
+        self._writable(keep_joins=True).append(value)
+
+    def extend(self, values: Iterable[Any]) -> None:
+        self._writable(keep_joins=True).extend(values)
+
+    def clear(self) -> None:
+        self._base = EMPTY
+        self._own = []
+        self._joins = {}
+        self._edits += 1
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CowList):
+            if self.version is not None and self.version == other.version:
+                return True
+            other = other._view()
+        if isinstance(other, (list, tuple)):
+            return list(self._view()) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __copy__(self) -> "CowList":
+        return CowList.shared(self.snapshot())
+
+    def __deepcopy__(self, memo) -> "CowList":
+        # Entries are immutable once stored, so a deep copy can share them too
+        return CowList.shared(self.snapshot())
+
+    def __repr__(self) -> str:
+        return f"CowList({list(self._view())!r})"
+
+
+def segment_store_summary() -> str:
+    return (
+        f"snapshots={STATS['published']} shared={STATS['shared']} "
+        f"copies={STATS['copies']} entries_copied={STATS['entries_copied']} "
+        f"joins cached={STATS['joins_cached']} extended={STATS['joins_extended']} built={STATS['joins_built']}"
+    )
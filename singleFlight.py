@@ -0,0 +1,55 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls: the first caller for a key starts the
+    work, later callers with the same key wait for that result instead of
+    issuing their own request.
+
+    The work runs as its own task, so one waiter being cancelled does not
+    cancel it for the others; it is only cancelled once every waiter is gone.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, Tuple[asyncio.Task, list]] = {}
+        self.stats: Dict[str, int] = {"calls": 0, "coalesced": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.stats["calls"] += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            task = asyncio.create_task(fn())
+            flight = self._flights[key] = (task, [0])
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.stats["coalesced"] += 1
+            logger.debug(f"Coalesced in-flight request {key[:12]}")
+
+        task, waiters = flight
+        waiters[0] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            waiters[0] -= 1
+            if waiters[0] == 0 and not task.done():
+                task.cancel()
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if key in self._flights and self._flights[key][0] is task:
+            del self._flights[key]
+
+    def reset_stats(self) -> None:
+        self.stats = {"calls": 0, "coalesced": 0}
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    """Process-wide group shared by every LLMClient, so agents on the same model coalesce."""
+    return _single_flight
@@ -3,15 +3,31 @@ import logging
 import re
 from config import Config
 from task import Task
-from llmClient import LLMClient  # 替换原来的GPTClient
+from llmClient import LLMClient, build_client_chain, fallback_chain  # 替换原来的GPTClient
 import prompt
 import asyncio
+from typing import Optional
+from deadline import Deadline
+from telemetry import call_context
+from logPipeline import payload
+from decompositionCache import DecompositionCache, decomposition_key, get_decomposition_cache
 # -----------------------------------------------------------------------------
 # Configuration and Logging Setup
 # -----------------------------------------------------------------------------
 # 创建 logger
 logger = logging.getLogger(__name__)
 
+# Process-wide counters for speculative decompositions (see TaskExecuter._speculate): started,
+# used at a split, discarded because no split came, and critical-path seconds saved.
+STATS = {"speculative": 0, "used": 0, "wasted": 0, "seconds_saved": 0.0}
+
+
+def speculation_summary() -> str:
+    return (
+        f"started={STATS['speculative']} used={STATS['used']} wasted={STATS['wasted']} "
+        f"saved={STATS['seconds_saved']:.1f}s"
+    )
+
 
 
 # -----------------------------------------------------------------------------
@@ -27,22 +43,26 @@ class TaskManager:
         self.system_prompt = prompt.WORKFLOW_DECOMPOSER_PROMPT
         self.current_task=current_task
         # 定义多个LLM客户端配置
-        self.llm_configs = [
-            {"provider": "openai", "model": Config.GPT_MODEL},  # 主客户端
-            {"provider": "openrouter", "model": "meta-llama/llama-3.1-8b-instruct:free"},
-            {"provider": "openrouter", "model": "mistralai/mistral-7b-instruct:free"}
-        ]
+        self.llm_configs = fallback_chain("openai", "o4-mini")  # 主客户端 + 对冲/故障转移
 
-        self.main_client = LLMClient(
-            provider=self.llm_configs[0]["provider"],
-            model="o4-mini",
-            temperature=Config.TEMPERATURE
+        self.main_client = build_client_chain(self.llm_configs, temperature=Config.TEMPERATURE)
+        # Splits of the same task reuse one decomposition (see decompositionCache.py)
+        self.cache: Optional[DecompositionCache] = (
+            get_decomposition_cache() if Config.DECOMPOSITION_CACHE_ENABLED else None
         )
 
-    async def task_decomposer(self) -> dict:
+    def cache_key(self) -> str:
+        return decomposition_key(self.current_task, self.llm_configs[0]["model"], self.system_prompt)
+
+    async def task_decomposer(self, deadline: Optional[Deadline] = None) -> dict:
         """分解为子任务"""
+        if self.cache is not None:
+            cached = await self.cache.get(self.cache_key())
+            if cached is not None:
+                logger.info(f"Reusing cached decomposition ({len(cached.get('subtasks', []))} subtasks)")
+                return cached
         user_content = f"##  ## The task need to be splited: \n{self.current_task}\n\n"
-        logger.info(f"SPLITING>>>[DEBUG] {user_content}\n\n ")
+        logger.info("SPLITING>>>[DEBUG] %s\n\n ", user_content, extra=payload())
         # 构造消息队列
         messages = [
             {'role': 'system', 'content': self.system_prompt},
@@ -51,16 +71,20 @@ class TaskManager:
 
         # 调用主客户端
         try:
-            response = await self.main_client.a_chat_completion(messages)
+            with call_context(phase="decompose"):
+                response = await self.main_client.a_chat_completion(messages, deadline=deadline)
    
-            logger.info(f"LLM Response: {response}")
+            logger.info("LLM Response: %s", response, extra=payload())
 
             # 验证是否是有效的JSON
             try:
-                return json.loads(response) 
+                decomposition = json.loads(response) 
             except json.JSONDecodeError as e:
-                logger.error(f"Invalid JSON format in response: {e}\nResponse: {response}")
+                logger.error("Invalid JSON format in response: %s\nResponse: %s", e, response, extra=payload())
                 raise ValueError("The response does not contain valid JSON") from e
+            if self.cache is not None:
+                await self.cache.put(self.cache_key(), decomposition)
+            return decomposition
         except Exception as e:
             logger.error(f"Error in task_decomposer: {e}")
             raise
@@ -1,9 +1,15 @@
 import logging
 import asyncio
-from typing import List, Dict, Optional
-from taskManager import TaskManager
+from typing import Any, List, Dict, Optional, Sequence, Tuple
+from taskManager import STATS as DECOMPOSITION_STATS, TaskManager
 from agent import Agent
-import copy
+from checkpoint import RunJournal
+from deadline import Deadline, DeadlineExceeded, within
+from telemetry import call_context
+from consensus import local_consensus
+from preValidation import output_kind, pre_validate
+from config import Config
+import math
 import asyncio
 from collections import Counter
 import time
@@ -11,6 +17,21 @@ import time
 logger = logging.getLogger(__name__)
 
 
+async def _gather_or_cancel(coros) -> List[Any]:
+    """
+    asyncio.gather over `coros`, except that when one raises (or the caller is
+    cancelled) the others are cancelled and awaited instead of being left running.
+    """
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
 class TaskExecuter:
     """
     Orchestrates branching recursive execution of tasks across multiple Agents,
@@ -23,91 +44,407 @@ class TaskExecuter:
         overall_task: Optional[str] = None,
         max_rounds: int = 5,
         max_recursion_depth: int = 3,
+        journal: Optional[RunJournal] = None,
+        node: str = "0",
     ):
+        """
+        :param journal: Checkpoint journal of the run (see checkpoint.py). The executor
+            commits its state after every round, split and finished subtask, and
+            continues from what an earlier attempt committed when resuming.
+        :param node: Position of this task in the recursion tree ("0", "0/2", ...),
+            under which it is checkpointed.
+        """
         self.agents = agents
         self.current_task = current_task
         self.overall_task = overall_task or current_task
         self.max_rounds = max_rounds
         self.max_recursion_depth = max_recursion_depth
+        # Decisions, calls issued/cancelled and time of the last cros_model_val
+        self.last_validation_stats: Dict[str, Any] = {}
+        # Agent rounds, split decision and time of the last pipelined execution
+        self.last_pipeline_stats: Dict[str, Any] = {}
+        # Agents that answered / were cut off in the last step(), and the cut-off time
+        self.last_round_stats: Dict[str, Any] = {}
+        # Steps of stragglers that keep running into the next round (ROUND_STRAGGLER_POLICY "carry"),
+        # by agent id: (step task, agent, memory version the step was started from)
+        self._carried: Dict[int, Tuple[asyncio.Task, Agent, int]] = {}
+        # Background decomposition started before a split was needed, and when it started
+        self._speculation: Optional[asyncio.Task] = None
+        self._speculation_started = self._speculation_finished = 0.0
+        self.journal = journal
+        self.node = node
 
-    async def step(self,rnd, active_agents):
+    async def step(self,rnd, active_agents, deadline: Optional[Deadline] = None):
         """
         Execute the current task using all agents, with a fallback to memory if needed.
+        With Config.ROUND_QUORUM or Config.ROUND_STRAGGLER_FACTOR set, the round ends
+        before the slowest agents answer (see _quorum_step); the agents that answered
+        are left in self.last_round_stats["responders"].
         """
         if not active_agents:
             logger.info(f"No active agents left at round {rnd+1}.")
             return None
         logger.info(f"↻ Round {rnd+1}/{self.max_rounds}, active={[a.id for a in active_agents]}")
 
-        step_tasks = [
-            agent.step_async(self.overall_task, self.current_task)
-            for agent in active_agents
-        ]
-        step_results = await asyncio.gather(*step_tasks, return_exceptions=False)
-    
+        if Config.ROUND_QUORUM is None and Config.ROUND_STRAGGLER_FACTOR is None:
+            # A failed step fails the round; the other agents' steps are cancelled with it
+            step_results = await _gather_or_cancel(
+                agent.step_async(self.overall_task, self.current_task, deadline)
+                for agent in active_agents
+            )
+            self.last_round_stats = {"responders": list(active_agents), "stragglers": [], "cutoff": None}
+        else:
+            step_results = await self._quorum_step(rnd, active_agents, deadline)
+
+        # Time to first useful byte: first streamed new_content, or the full response when not streaming
+        ttfb = {
+            agent.id: agent.last_timings.get("first_content", agent.last_timings.get("total"))
+            for agent in active_agents if agent.last_timings
+        }
+        if ttfb:
+            logger.info(
+                f"Round {rnd+1} time to first content: "
+                + ", ".join(f"agent {aid}={t:.2f}s" for aid, t in ttfb.items() if t is not None)
+            )
 
         return step_results
 
-    async def cros_model_val(self, active_agents):
+    async def _quorum_step(self, rnd, active_agents, deadline: Optional[Deadline] = None):
+        """
+        Run the round's steps until Config.ROUND_QUORUM of the agents have answered,
+        or until the straggler cut-off: Config.ROUND_STRAGGLER_FACTOR times the first
+        responder's latency (or its median step latency, if that is longer, so one
+        lucky fast answer does not cut everyone else off). Stragglers are cancelled
+        and retry next round, or with ROUND_STRAGGLER_POLICY "carry" keep running and
+        are collected in a later round. Returns the responders' step results.
+        """
+        start = time.perf_counter()
+        # Steps run with apply=False and are applied here, only to an agent whose memory is
+        # still the one the step started from: a carried step must not land on memory that was
+        # restored or cleaned while it ran
+        await self._drop_carried(keep=active_agents)
+        tasks: Dict[asyncio.Task, Agent] = {}
+        versions: Dict[asyncio.Task, int] = {}
+        for agent in active_agents:
+            carried = self._carried.pop(agent.id, None)
+            if carried is not None:
+                task, _, version = carried
+            else:
+                version = agent.memory.version
+                task = asyncio.create_task(
+                    agent.step_async(self.overall_task, self.current_task, deadline, apply=False)
+                )
+            tasks[task] = agent
+            versions[task] = version
+        quorum = len(tasks) if Config.ROUND_QUORUM is None else max(1, math.ceil(Config.ROUND_QUORUM * len(tasks)))
+
+        pending = set(tasks)
+        answered = 0
+        first = cutoff = None
+        try:
+            while pending and answered < quorum:
+                timeout = None if cutoff is None else max(0.0, cutoff - (time.perf_counter() - start))
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                answered += len(done)
+                if first is None:
+                    first = time.perf_counter() - start
+                    if Config.ROUND_STRAGGLER_FACTOR is not None:
+                        typical = max(tasks[t].step_latency.percentile(50) or 0.0 for t in done)
+                        cutoff = Config.ROUND_STRAGGLER_FACTOR * max(first, typical)
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            raise
+
+        stragglers = [tasks[t] for t in pending]
+        for task in pending:
+            agent = tasks[task]
+            agent.step_cutoffs += 1
+            if Config.ROUND_STRAGGLER_POLICY == "carry":
+                self._carried[agent.id] = (task, agent, versions[task])
+            else:
+                task.cancel()
+        if Config.ROUND_STRAGGLER_POLICY != "carry":
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        results, responders, error = [], [], None
+        for task, agent in tasks.items():
+            if task in pending:
+                continue
+            if agent.memory.version != versions[task]:
+                logger.info(f"Round {rnd+1}: discarding the step of agent {agent.id}, its memory changed meanwhile")
+                continue
+            if task.exception() is not None:
+                # As step_async would have with apply=True; a deadline is not the agent's failure
+                if not isinstance(task.exception(), DeadlineExceeded):
+                    agent.status = "fail"
+                error = error or task.exception()
+                continue
+            agent.apply_step(task.result())
+            results.append(task.result())
+            responders.append(agent)
+        elapsed = time.perf_counter() - start
+        self.last_round_stats = {"responders": responders, "stragglers": stragglers, "cutoff": cutoff}
+        if stragglers:
+            logger.info(
+                f"Round {rnd+1} quorum: {len(responders)}/{len(tasks)} agents answered in {elapsed:.2f}s "
+                f"(first {first:.2f}s), {'carried over' if Config.ROUND_STRAGGLER_POLICY == 'carry' else 'cancelled'} "
+                f"{[a.id for a in stragglers]}"
+            )
+        # Same as gather(): a failed step fails the round
+        if error is not None:
+            raise error
+        return results
+
+    async def _drop_carried(self, keep: Sequence[Agent] = ()) -> None:
+        """
+        Cancel carried straggler steps, except those of the agents in `keep` whose
+        memory has not changed since the step started. With no `keep` (when the
+        rounds end), cancel them all.
+        """
+        drop = [
+            aid for aid, (_, agent, version) in self._carried.items()
+            if not any(agent is k for k in keep) or agent.memory.version != version
+        ]
+        carried = [self._carried.pop(aid)[0] for aid in drop]
+        for task in carried:
+            task.cancel()
+        await asyncio.gather(*carried, return_exceptions=True)
+
+    def agent_latency_stats(self) -> Dict[int, Dict[str, Any]]:
+        """Per-agent step latency (median, p95, samples) and how often the agent was cut off as a straggler."""
+        return {
+            aid: {
+                "p50": agent.step_latency.percentile(50),
+                "p95": agent.step_latency.percentile(95),
+                "samples": len(agent.step_latency.samples),
+                "cutoffs": agent.step_cutoffs,
+            }
+            for aid, agent in self.agents.items()
+        }
+
+    async def cros_model_val(self, active_agents, deadline: Optional[Deadline] = None):
         """
         Phase 2: cross-model validation by majority vote.
         All agents (excluding the producer) validate each new fragment concurrently.
+        With Config.VALIDATION_EARLY_EXIT, a fragment's remaining validator calls are
+        cancelled as soon as its majority can no longer change. With
+        Config.VALIDATION_MODE = "batch", each validator judges all other agents'
+        fragments in a single call (N calls per round instead of N*(N-1)).
+        Fragments that fail the local syntax check for the objective's output
+        format (see preValidation.py) are rejected before any validator call.
         """
-        # Map each producer agent to its validation task
-        success_count = 0
-        validation_map = []  # list of (agent, validation_task)
+        start = time.perf_counter()
+        producers = []  # list of (agent, fragment)
         for agent in active_agents:
             segs = agent.memory.get_all()
-            if not segs:
-                continue
-            validators = [v for v in self.agents.values() if v.id != agent.id]
-            task = asyncio.gather(
-                *(v.validate_async(self.overall_task, self.current_task, segs)
-                for v in validators),
-                return_exceptions=True
-            )
-            validation_map.append((agent, task))
+            if segs:
+                producers.append((agent, segs))
+        producers, rejected = await self._pre_validate(producers)
 
-        # Run all validations in parallel
-        results = await asyncio.gather(*(task for _, task in validation_map))
+        if Config.VALIDATION_MODE == "batch":
+            passed, stats = await self._validate_batch(producers, deadline)
+        else:
+            # Run all validations in parallel; each applies its decision as soon as it is fixed
+            results = await _gather_or_cancel(
+                self._validate_fragment(agent, [v for v in self.agents.values() if v.id != agent.id], segs, deadline)
+                for agent, segs in producers
+            )
+            passed = [p for p, _ in results]
+            stats = {
+                "issued": sum(r["issued"] for _, r in results),
+                "cancelled": sum(r["cancelled"] for _, r in results),
+                "est_end": max([0.0] + [r["est_end"] for _, r in results]),
+            }
 
-        # Apply majority rule
-        total_validators = len(self.agents) - 1
+        success_count = 0
         winner_mem = None
-        for (agent, _), votes in zip(validation_map, results):
-            valid_votes = sum(1 for r in votes if isinstance(r, bool) and r)
-            if valid_votes <= total_validators / 2:
-                # Remove invalid fragment
-                agent.memory.clean_short()
-                agent.status = "fail"
-                logger.warning(
-                    f"Agent {agent.id} fragment failed cross-validation "
-                    f"({valid_votes}/{total_validators} votes) and was removed."
-                )
-            else:
-                success_count +=1
-                winner_mem = copy.deepcopy(agent.memory.short_term)
-                logger.info(
-                    f"Agent {agent.id} fragment passed cross-validation "
-                    f"({valid_votes}/{total_validators} votes)."
-                )
+        for (agent, _), ok in zip(producers, passed):
+            if ok:
+                success_count += 1
+                winner_mem = agent.memory.share_short()
+
+        elapsed = time.perf_counter() - start
+        # Without early exit the phase would last until the slowest cancelled call returned
+        full = max(elapsed, stats["est_end"])
+        self.last_validation_stats = {
+            "calls": stats["issued"], "cancelled": stats["cancelled"], "seconds": elapsed,
+            "est_seconds_saved": full - elapsed, "pre_rejected": len(rejected),
+            "passed": {**{aid: False for aid in rejected}, **{agent.id: ok for (agent, _), ok in zip(producers, passed)}},
+        }
         self.replace_fail(winner_mem)
         return success_count
 
-    def replace_fail(self, winner_mem):
+    async def _pre_validate(self, producers):
+        """
+        Run the local pre-validator for the objective's "Output Format" on every
+        fragment in the worker pool. Failing fragments are removed and their agents
+        marked failed. Returns (remaining producers, {agent_id: reason} for rejects).
+        """
+        kind = output_kind(self.overall_task) if Config.PRE_VALIDATION_ENABLED else None
+        if kind is None or not producers:
+            return producers, {}
+        # Below the top level a finished subtask is only a piece of the artifact (the decomposer
+        # joins the pieces), so elements it leaves open are not errors: check every fragment there
+        # as unfinished
+        top_level = self.current_task == self.overall_task
+        errors = await asyncio.gather(*(
+            pre_validate(kind, segs, top_level and agent.status == "complete") for agent, segs in producers
+        ))
+        remaining, rejected = [], {}
+        for (agent, segs), error in zip(producers, errors):
+            if error is None:
+                remaining.append((agent, segs))
+                continue
+            agent.memory.clean_short()
+            agent.status = "fail"
+            rejected[agent.id] = error
+            logger.warning(f"Agent {agent.id} fragment failed {kind} pre-validation ({error}) and was removed.")
+        return remaining, rejected
+
+    def _majority_fixed(self, valid_votes: int, invalid_votes: int) -> bool:
+        """True once no outstanding vote can change whether more than half of all validators said valid."""
+        total_validators = len(self.agents) - 1
+        return valid_votes > total_validators / 2 or total_validators - invalid_votes <= total_validators / 2
+
+    def _cancel_pending(self, pending: Dict[asyncio.Task, Agent], n_calls: int, started: float) -> Dict[str, float]:
+        """
+        Cancel validator calls that are no longer needed. Returns how many were cancelled
+        and an estimate of when they would have finished, relative to `started`.
+        """
+        decided_at = time.perf_counter() - started
+        # The slowest of n calls lands around the n/(n+1) quantile of the model's latency
+        q = 100 * n_calls / (n_calls + 1)
+        est_end = 0.0
+        for task, validator in pending.items():
+            task.cancel()
+            expected = validator.llm.latency.percentile(q)
+            if expected is not None:
+                est_end = max(est_end, expected, decided_at)
+        return {"cancelled": len(pending), "est_end": est_end}
+
+    def _apply_validation(self, agent: Agent, valid_votes: int) -> bool:
+        """Apply the majority rule to a producer: keep its fragment or remove it and mark it failed."""
+        total_validators = len(self.agents) - 1
+        if valid_votes <= total_validators / 2:
+            # Remove invalid fragment
+            agent.memory.clean_short()
+            agent.status = "fail"
+            logger.warning(
+                f"Agent {agent.id} fragment failed cross-validation "
+                f"({valid_votes}/{total_validators} votes) and was removed."
+            )
+            return False
+        logger.info(
+            f"Agent {agent.id} fragment passed cross-validation "
+            f"({valid_votes}/{total_validators} votes)."
+        )
+        return True
+
+    async def _validate_fragment(self, agent: Agent, validators: List[Agent], segs: str, deadline: Optional[Deadline] = None):
+        """
+        Collect validator votes on one producer's fragment and apply the majority rule.
+        Returns (passed, stats) where stats counts issued and cancelled validator calls
+        and estimates when the cancelled ones would have finished.
+        """
+        start = time.perf_counter()
+        pending = {
+            asyncio.create_task(v.validate_async(self.overall_task, self.current_task, segs, deadline)): v
+            for v in validators
+        }
+        stats = {"issued": len(pending), "cancelled": 0, "est_end": 0.0}
+        valid_votes = invalid_votes = 0
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.pop(task)
+                    if not task.cancelled() and task.exception() is None and task.result() is True:
+                        valid_votes += 1
+                    else:
+                        invalid_votes += 1
+                if Config.VALIDATION_EARLY_EXIT and self._majority_fixed(valid_votes, invalid_votes):
+                    break
+        finally:
+            stats.update(self._cancel_pending(pending, len(validators), start))
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        return self._apply_validation(agent, valid_votes), stats
 
+    async def _validate_batch(self, producers, deadline: Optional[Deadline] = None):
+        """
+        Batched validation: every agent validates all fragments except its own in one
+        call, returning a verdict per fragment. Each fragment's majority is applied as
+        soon as it is fixed, and with early exit the remaining calls are cancelled once
+        every fragment is decided. Returns (passed per producer, stats).
+        """
+        start = time.perf_counter()
+        pending: Dict[asyncio.Task, Agent] = {}
+        covers: Dict[asyncio.Task, List[int]] = {}
+        for v in self.agents.values():
+            idx = [i for i, (agent, _) in enumerate(producers) if agent.id != v.id]
+            if not idx:
+                continue
+            task = asyncio.create_task(v.validate_batch_async(
+                self.overall_task, self.current_task, [producers[i][1] for i in idx], deadline
+            ))
+            pending[task] = v
+            covers[task] = idx
+        stats = {"issued": len(pending), "cancelled": 0, "est_end": 0.0}
+
+        valid = [0] * len(producers)
+        invalid = [0] * len(producers)
+        passed: List[Optional[bool]] = [None] * len(producers)
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.pop(task)
+                    idx = covers[task]
+                    ok = not task.cancelled() and task.exception() is None
+                    verdicts = task.result() if ok else [False] * len(idx)
+                    for i, verdict in zip(idx, verdicts):
+                        if verdict:
+                            valid[i] += 1
+                        else:
+                            invalid[i] += 1
+                if not Config.VALIDATION_EARLY_EXIT:
+                    continue
+                for i, (agent, _) in enumerate(producers):
+                    if passed[i] is None and self._majority_fixed(valid[i], invalid[i]):
+                        passed[i] = self._apply_validation(agent, valid[i])
+                if all(p is not None for p in passed):
+                    break
+        finally:
+            stats.update(self._cancel_pending(pending, len(covers), start))
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        for i, (agent, _) in enumerate(producers):
+            if passed[i] is None:
+                passed[i] = self._apply_validation(agent, valid[i])
+        return passed, stats
+
+    def replace_fail(self, winner_mem, agents: Optional[List[Agent]] = None):
+        """
+        Give failed agents the winner's short-term memory (a Memory.share_short()
+        snapshot, shared rather than copied) and put them back to work.
+        """
         if winner_mem != None:
-            for agent in self.agents.values():
+            for agent in (self.agents.values() if agents is None else agents):
                 if agent.status == "fail":
                     logger.info(f"replace Agent {agent.id} short term memory.")
-                    agent.memory.short_term = copy.deepcopy(winner_mem)
+                    agent.memory.restore_short(winner_mem)
                     agent.status = "ongoing"
 
-    async def select_best(self, agent_ids: List[int]):
+    async def select_best(self, agent_ids: List[int], deadline: Optional[Deadline] = None):
         """
         Vote to pick the best agent, then copy its entire long-term memory
         into every agent (preserving all past tasks), and clear short-term.
         Returns the winner's full long-term memory as a single string.
+        Once the run deadline has expired the vote is skipped (see local_best), and
+        so is it when a clear majority of candidates agree (see consensus.py).
         """
         # 1) Gather each agent’s full long-term text for voting
         candidates = []
@@ -121,12 +458,25 @@ class TaskExecuter:
             # simple concatenation of short_term
             return ""
 
-        # 3) Vote across agents in parallel
-        vote_tasks = [
-            self.agents[aid].vote_async(self.overall_task, self.current_task, candidates)
-            for aid in agent_ids
-        ]
-        vote_results = await asyncio.gather(*vote_tasks, return_exceptions=True)
+        # 3) Vote across agents in parallel (skipped once the run deadline has passed,
+        #    or when most candidates are the same or nearly the same)
+        consensus_idx = None
+        if Config.CONSENSUS_ENABLED:
+            consensus_idx = await asyncio.to_thread(local_consensus, candidates)
+        vote_results = []
+        if consensus_idx is not None:
+            pass
+        elif deadline is not None and deadline.expired():
+            logger.warning("Run deadline reached, picking best output without voting.")
+        else:
+            vote_tasks = [
+                self.agents[aid].vote_async(self.overall_task, self.current_task, candidates, deadline)
+                for aid in agent_ids
+            ]
+            try:
+                vote_results = await within(deadline, asyncio.gather(*vote_tasks, return_exceptions=True))
+            except DeadlineExceeded:
+                logger.warning("Run deadline reached before voting finished; picking best output locally.")
 
         # 4) tally each agent's top choice (first in its votes list)
         top_choices = []
@@ -135,47 +485,67 @@ class TaskExecuter:
                 top = vr[0]
                 if 0 <= top < len(candidates):
                     top_choices.append(top)
-        if not top_choices:
-            winner_idx = 0
+        if consensus_idx is not None:
+            winner_idx = consensus_idx
+        elif not top_choices:
+            winner_idx = self.local_best(agent_ids, candidates) if deadline is not None and deadline.expired() else 0
         else:
             winner_idx, _ = Counter(top_choices).most_common(1)[0]
         # 5) identify winner’s full long-term memory
         winner_id = agent_ids[winner_idx]
         self.agents[winner_id].memory.archive_task()
-        winner_mem = copy.deepcopy(self.agents[winner_id].memory.long_term)
-        # 6) copy that memory into every agent, clear short-term
+        winner_mem = self.agents[winner_id].memory.share_long()
+        # 6) share that memory with every agent (copied only when one writes to it), clear short-term
         for agent in self.agents.values():
-            agent.memory.long_term = copy.deepcopy(winner_mem)
+            agent.memory.adopt_long(winner_mem)
             agent.memory.clean_short()
 
         return candidates[winner_idx]
 
     
-    async def branching_recursive_execution(
-        self,
-        agent_ids: List[int],
-        recursion_depth: int = 0
-    ) -> str:
-        indent = "  " * recursion_depth
-        logger.info(f"{indent}▶ Depth {recursion_depth}: executing '{self.current_task}'")
+    def local_best(self, agent_ids: List[int], candidates: List[str]) -> int:
+        """
+        Pick a candidate without calling the LLM: prefer complete, then ongoing
+        agents over failed ones, and longer output among equals.
+        """
+        rank = {"complete": 2, "ongoing": 1}
+        return max(
+            range(len(candidates)),
+            key=lambda i: (rank.get(self.agents[agent_ids[i]].status, 0), len(candidates[i]))
+        )
 
-        # Base case: max recursion reached
-        if recursion_depth > self.max_recursion_depth:
-            logger.warning(f"{indent}Max recursion depth reached, retrieving best available memory.")
-            return None
+    async def _lockstep_rounds(
+        self, agent_ids: List[int], indent: str, deadline: Optional[Deadline] = None, start_round: int = 0
+    ) -> bool:
+        """
+        Rounds in lockstep: every round waits for the agent steps (all of them, or a
+        quorum, see step()), then validates the new fragments together. Returns
+        whether the task should be split. Every finished round is checkpointed;
+        start_round skips rounds an earlier attempt already committed.
+        """
+        try:
+            return await self._lockstep_loop(agent_ids, indent, deadline, start_round)
+        finally:
+            await self._drop_carried()
 
-        split_needed = False
-        # reset all agents to "ongoing" status
-        for agent in self.agents.values():
-            agent.setNewTask(self.current_task)
+    async def _lockstep_loop(
+        self, agent_ids: List[int], indent: str, deadline: Optional[Deadline] = None, start_round: int = 0
+    ) -> bool:
         # Iterative rounds of generation
-        for rnd in range(self.max_rounds):
+        for rnd in range(start_round, self.max_rounds):
+            if deadline is not None and deadline.expired():
+                logger.warning(f"{indent}Run deadline reached before round {rnd+1}, keeping best output in memory.")
+                break
 
             active_agents = [agent for agent in self.agents.values() if agent.status == "ongoing"]
 
             # Phase 1: fire off all agent steps concurrently
             start_phase1 = time.time()
-            if await self.step(rnd, active_agents) is None:
+            try:
+                if await within(deadline, self.step(rnd, active_agents, deadline)) is None:
+                    break
+            except DeadlineExceeded:
+                logger.warning(f"{indent}Run deadline reached during round {rnd+1} steps, keeping best output in memory.")
                 break
             end_phase1 = time.time()
             logger.info(f"{indent}Phase 1 (agent steps) completed in {end_phase1 - start_phase1:.2f} seconds")
@@ -184,16 +554,398 @@ class TaskExecuter:
 
             # Phase 2: cross model validation based on the agents status not failed and not complete one need to be vlidated by all others, if majority say fail then it is failed.
             start_phase2 = time.time()
-            success_count = await self.cros_model_val(active_agents) 
+            try:
+                responders = self.last_round_stats["responders"]
+                success_count = await within(deadline, self.cros_model_val(responders, deadline))
+            except DeadlineExceeded:
+                logger.warning(f"{indent}Run deadline reached during round {rnd+1} validation, keeping best output in memory.")
+                break
+            passed = self.last_validation_stats["passed"]
+            self._note_failures(sum(1 for ok in passed.values() if not ok), len(passed), indent, deadline)
             success_count += len([agent for agent in self.agents.values() if agent.status == "complete"])
             end_phase2 = time.time()
             logger.info(f"{indent}Phase 2 (cross validation) completed in {end_phase2 - start_phase2:.2f} seconds")
+            vs = self.last_validation_stats
+            if vs.get("pre_rejected"):
+                logger.info(f"{indent}Round {rnd+1}: {vs['pre_rejected']} fragments rejected by local pre-validation")
+            if vs.get("cancelled"):
+                logger.info(
+                    f"{indent}Round {rnd+1} early exit: cancelled {vs['cancelled']}/{vs['calls']} validator calls "
+                    f"({vs['cancelled'] / vs['calls']:.0%}), ~{vs['est_seconds_saved']:.2f}s saved"
+                )
 
-            if success_count <= len(agent_ids) / 2:
+            # Stragglers still working on this round count neither way
+            split = success_count <= (len(agent_ids) - len(self.last_round_stats["stragglers"])) / 2
+            await self._checkpoint("round", {"round": rnd + 1, "split": split})
+            if split:
                 logger.info(f"{indent}Insufficient successes ({success_count}), splitting task.")
+                return True
+        return False
+
+    async def _checkpoint(self, kind: str, state: Dict[str, Any], agents: Optional[Dict[int, Dict[str, Any]]] = None) -> None:
+        """
+        Commit this node's state to the run journal, if there is one.
+
+        :param agents: Captured agent states to record; by default every agent as it is now.
+        """
+        if self.journal is None:
+            return
+        if agents is None:
+            agents = self.journal.capture_agents(self.agents)
+        await self.journal.commit(self.node, kind, {**state, "agents": agents})
+
+    async def _pipelined_rounds(
+        self, agent_ids: List[int], indent: str, deadline: Optional[Deadline] = None,
+        resume: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """
+        Rounds without a barrier: each agent generates, is validated by the others
+        and starts its next round on its own schedule, so a slow model only delays
+        itself. A failed agent continues from the latest fragment that passed
+        (waiting for one if needed), and the split decision uses every agent's
+        latest validation result. Validation is per fragment (VALIDATION_MODE
+        "batch" needs a round's worth of fragments and does not apply here).
+        Returns whether the task should be split. Every agent round is checkpointed
+        with each agent as of its own last finished round; `resume` is such a
+        checkpoint to continue from.
+        """
+        start = time.perf_counter()
+        latest: Dict[int, bool] = {}       # agent id -> whether its latest fragment passed
+        best: Dict[str, Any] = {"mem": None}  # short-term memory of the latest fragment that passed
+        rounds_done = {aid: 0 for aid in agent_ids}
+        saved: Dict[str, Any] = {"best": None, "agents": {}}  # journal values of the above
+        if self.journal is not None:
+            saved["agents"] = self.journal.capture_agents(self.agents)
+            if resume is not None:
+                rounds_done.update({int(aid): n for aid, n in resume["rounds"].items()})
+                latest.update({int(aid): ok for aid, ok in resume["latest"].items()})
+                if resume["best"] is not None:
+                    saved["best"] = resume["best"]
+                    best["mem"] = self.journal.restore_short(resume["best"])
+        running = set(agent_ids)
+        waiting = set()
+        changed = asyncio.Condition()
+        stop = asyncio.Event()
+        stats = {"agent_rounds": 0, "split": False}
+
+        async def run_agent(agent: Agent) -> None:
+            validators = [v for v in self.agents.values() if v.id != agent.id]
+            try:
+                for rnd in range(rounds_done[agent.id], self.max_rounds):
+                    if agent.status == "fail":
+                        # Continue from the latest passing fragment, unless no one is left to produce one
+                        async with changed:
+                            waiting.add(agent.id)
+                            await changed.wait_for(
+                                lambda: best["mem"] is not None or stop.is_set() or waiting >= running
+                            )
+                            waiting.discard(agent.id)
+                        if best["mem"] is None or stop.is_set():
+                            return
+                        self.replace_fail(best["mem"], [agent])
+                    if agent.status != "ongoing" or stop.is_set():
+                        return
+
+                    round_start = time.perf_counter()
+                    try:
+                        await agent.step_async(self.overall_task, self.current_task, deadline)
+                    except RuntimeError as e:
+                        # step_async has already marked the agent failed
+                        logger.info(f"{indent}Agent {agent.id} round {rnd+1} step failed: {e}")
+                    passed = False
+                    segs = agent.memory.get_all() if agent.status != "fail" else ""
+                    if segs:
+                        remaining, _ = await self._pre_validate([(agent, segs)])
+                        if remaining:
+                            passed, _ = await self._validate_fragment(agent, validators, segs, deadline)
+                    stats["agent_rounds"] += 1
+                    logger.info(
+                        f"{indent}Agent {agent.id} round {rnd+1}: fragment {'passed' if passed else 'failed'} "
+                        f"after {time.perf_counter() - round_start:.2f}s"
+                    )
+
+                    async with changed:
+                        latest[agent.id] = passed
+                        rounds_done[agent.id] = rnd + 1
+                        if passed:
+                            best["mem"] = agent.memory.share_short()
+                        successes = sum(latest.values())
+                        self._note_failures(len(latest) - successes, len(latest), indent, deadline)
+                        split = len(latest) == len(agent_ids) and successes <= len(agent_ids) / 2
+                        if self.journal is not None:
+                            saved["agents"][str(agent.id)] = self.journal.capture_agent(agent)
+                            if passed:
+                                saved["best"] = self.journal.capture_short(best["mem"])
+                            await self._checkpoint("agent_round", {
+                                "rounds": rounds_done, "latest": latest, "best": saved["best"], "split": split,
+                            }, saved["agents"])
+                        if split:
+                            logger.info(f"{indent}Insufficient successes ({successes}), splitting task.")
+                            stats["split"] = True
+                            stop.set()
+                        changed.notify_all()
+            finally:
+                running.discard(agent.id)
+                if not stop.is_set():
+                    async with changed:
+                        changed.notify_all()
+
+        pipelines = [asyncio.create_task(run_agent(self.agents[aid])) for aid in agent_ids]
+        finished = asyncio.ensure_future(asyncio.gather(*pipelines, return_exceptions=True))
+        stopped = asyncio.ensure_future(stop.wait())
+        try:
+            await within(deadline, asyncio.wait({finished, stopped}, return_when=asyncio.FIRST_COMPLETED))
+        except DeadlineExceeded:
+            logger.warning(f"{indent}Run deadline reached during pipelined rounds, keeping best output in memory.")
+        finally:
+            for task in (*pipelines, stopped):
+                task.cancel()
+            results = await asyncio.gather(*pipelines, return_exceptions=True)
+        for aid, result in zip(agent_ids, results):
+            if isinstance(result, Exception) and not isinstance(result, DeadlineExceeded):
+                logger.warning(f"{indent}Agent {aid} pipeline failed: {result}")
+
+        elapsed = time.perf_counter() - start
+        self.last_pipeline_stats = {**stats, "seconds": elapsed}
+        logger.info(f"{indent}Pipelined rounds: {stats['agent_rounds']} agent rounds in {elapsed:.2f}s")
+        return stats["split"]
+
+    def _task_manager(self) -> TaskManager:
+        """
+        Decomposer for a split of this node. Only the top-level split goes through the
+        decomposition cache: a split below it happens because a subtask failed, and
+        reusing the cached subtask list would just repeat the same work one level down.
+        """
+        tm = TaskManager(objective=self.overall_task, current_task=self.overall_task)
+        if self.current_task != self.overall_task:
+            tm.cache = None
+        return tm
+
+    def _speculate(self, indent: str, deadline: Optional[Deadline] = None) -> None:
+        """Start decomposing the task in the background, in case the rounds end in a split."""
+        if self._speculation is not None:
+            return
+        logger.info(f"{indent}Starting speculative decomposition.")
+        tm = self._task_manager()
+        self._speculation = asyncio.create_task(tm.task_decomposer(deadline))
+        self._speculation_started = time.perf_counter()
+        self._speculation.add_done_callback(lambda _: setattr(self, "_speculation_finished", time.perf_counter()))
+        DECOMPOSITION_STATS["speculative"] += 1
+
+    def _note_failures(self, failed: int, total: int, indent: str, deadline: Optional[Deadline] = None) -> None:
+        """Start speculating once the share of failed fragments reaches the configured threshold."""
+        if (
+            Config.SPECULATIVE_DECOMPOSITION == "threshold"
+            and total
+            and failed / total >= Config.SPECULATIVE_DECOMPOSITION_THRESHOLD
+        ):
+            self._speculate(indent, deadline)
+
+    async def _take_speculation(self, indent: str) -> Optional[Dict[str, Any]]:
+        """
+        The speculative decomposition, awaited if it is still running, or None if there
+        is none or it failed. Logs how much of its latency was taken off the critical path.
+        """
+        task, self._speculation = self._speculation, None
+        if task is None:
+            return None
+        split_at = time.perf_counter()
+        try:
+            decomposition = await task
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"{indent}Speculative decomposition failed ({e}), decomposing again.")
+            return None
+        # Without speculation the whole call would have started at the split
+        duration = self._speculation_finished - self._speculation_started
+        saved = min(duration, split_at - self._speculation_started)
+        DECOMPOSITION_STATS["used"] += 1
+        DECOMPOSITION_STATS["seconds_saved"] += saved
+        logger.info(f"{indent}Using speculative decomposition: {saved:.2f}s of {duration:.2f}s off the critical path.")
+        return decomposition
+
+    async def _discard_speculation(self, indent: str) -> None:
+        task, self._speculation = self._speculation, None
+        if task is None:
+            return
+        DECOMPOSITION_STATS["wasted"] += 1
+        logger.info(f"{indent}No split needed, discarding speculative decomposition.")
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    def _subtask_dependencies(self, subtasks: List[Dict[str, Any]]) -> Optional[List[List[int]]]:
+        """
+        Map each subtask's depends_on ids to indices of earlier subtasks. Returns None
+        when the decomposition declares no dependencies at all, or when every subtask
+        depends on the one before it: such subtasks run one after another as before.
+        """
+        if not any("depends_on" in sub for sub in subtasks):
+            return None
+        index = {sub.get("id", i): i for i, sub in enumerate(subtasks)}
+        deps = []
+        for i, sub in enumerate(subtasks):
+            earlier = []
+            for dep in sub.get("depends_on") or []:
+                j = index.get(dep)
+                if j is None or j >= i:
+                    # Only earlier subtasks can be waited for; this also rules out cycles
+                    logger.warning(f"Subtask {sub.get('id', i)} ignores dependency {dep!r}: not an earlier subtask.")
+                    continue
+                earlier.append(j)
+            deps.append(sorted(set(earlier)))
+        if all(i - 1 in d for i, d in enumerate(deps) if i):
+            return None
+        return deps
+
+    async def _run_subtasks_parallel(
+        self,
+        subtasks: List[Dict[str, Any]],
+        deps: List[List[int]],
+        indent: str,
+        recursion_depth: int,
+        deadline: Optional[Deadline] = None,
+    ) -> None:
+        """
+        Run subtasks concurrently (at most Config.SUBTASK_MAX_CONCURRENCY at a time),
+        each as soon as the subtasks it depends on are done. Every subtask gets its
+        own clone of the agents, whose long-term memory also holds the outputs of
+        the subtasks it depends on. Once all are done, their outputs are appended to
+        every agent's long-term memory in declared order, as if run one by one.
+        """
+        start = time.perf_counter()
+        outputs: List[List[Dict[str, Any]]] = [[] for _ in subtasks]
+        durations = [0.0] * len(subtasks)
+        finished = [asyncio.Event() for _ in subtasks]
+        ancestors: List[set] = []
+        for d in deps:
+            ancestors.append(set(d).union(*(ancestors[j] for j in d)))
+        limit = asyncio.Semaphore(Config.SUBTASK_MAX_CONCURRENCY)
+
+        async def run(k: int) -> None:
+            try:
+                for j in deps[k]:
+                    await finished[j].wait()
+                async with limit:
+                    if deadline is not None and deadline.expired():
+                        logger.warning(f"{indent}Run deadline reached, skipping subtask {k + 1}.")
+                        return
+                    desc = subtasks[k]["objective"]
+                    logger.info(f"{indent}↘ Subtask {k + 1}/{len(subtasks)} (after {[j + 1 for j in deps[k]]}): {desc}")
+                    pool = {aid: agent.clone() for aid, agent in self.agents.items()}
+                    for clone in pool.values():
+                        for j in sorted(ancestors[k]):
+                            clone.memory.long_term.extend(outputs[j])
+                    before = {aid: list(clone.memory.long_term) for aid, clone in pool.items()}
+                    sub_exec = TaskExecuter(
+                        agents=pool,
+                        current_task=desc,
+                        overall_task=self.overall_task,
+                        max_rounds=self.max_rounds,
+                        max_recursion_depth=self.max_recursion_depth,
+                        journal=self.journal,
+                        node=f"{self.node}/{k}",
+                    )
+                    began = time.perf_counter()
+                    with call_context(depth=recursion_depth+1):
+                        await sub_exec.branching_recursive_execution(
+                            agent_ids=list(pool.keys()),
+                            recursion_depth=recursion_depth+1,
+                            deadline=deadline
+                        )
+                    durations[k] = time.perf_counter() - began
+                    outputs[k] = self._new_entries(before, pool)
+            finally:
+                finished[k].set()
+
+        tasks = [asyncio.create_task(run(k)) for k in range(len(subtasks))]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        for agent in self.agents.values():
+            for entries in outputs:
+                agent.memory.long_term.extend(entries)
+        elapsed = time.perf_counter() - start
+        sequential = sum(durations)
+        logger.info(
+            f"{indent}Ran {len(subtasks)} subtasks in {elapsed:.2f}s, "
+            f"{sequential:.2f}s one after another (~{sequential / max(elapsed, 1e-9):.2f}x)"
+        )
+
+    @staticmethod
+    def _new_entries(before: Dict[int, List[Dict[str, Any]]], pool: Dict[int, Agent]) -> List[Dict[str, Any]]:
+        """
+        Long-term entries a subtask added. select_best gives every agent the winner's
+        long-term memory, so the winner is an agent whose memory still starts with
+        what it had before.
+        """
+        for aid, agent in pool.items():
+            start = before[aid]
+            if agent.memory.long_term[:len(start)] == start:
+                return agent.memory.long_term[len(start):]
+        logger.warning("Could not tell which long-term entries a subtask added; dropping its output.")
+        return []
+
+    async def branching_recursive_execution(
+        self,
+        agent_ids: List[int],
+        recursion_depth: int = 0,
+        deadline: Optional[Deadline] = None
+    ) -> str:
+        """
+        :param deadline: Run-level deadline shared by the whole recursion tree. When it
+            expires, outstanding LLM calls are cancelled and the best output already
+            in memory is kept.
+
+        With a journal, the node's state is checkpointed as it goes. When resuming,
+        a node an earlier attempt finished only has its result put back into the
+        agents, and an unfinished one continues after its last committed round or
+        with its committed decomposition.
+        """
+        indent = "  " * recursion_depth
+        logger.info(f"{indent}▶ Depth {recursion_depth}: executing '{self.current_task}'")
+
+        # Base case: max recursion reached
+        if recursion_depth > self.max_recursion_depth:
+            logger.warning(f"{indent}Max recursion depth reached, retrieving best available memory.")
+            return None
+
+        saved = self.journal.latest(self.node) if self.journal is not None else None
+        if saved is not None and saved["kind"] == "done":
+            self.journal.restore_agents(self.agents, saved["agents"])
+            logger.info(f"{indent}Node {self.node} finished in an earlier attempt, restored from checkpoint.")
+            return None
+
+        split_needed = False
+        decomposition = None
+        # reset all agents to "ongoing" status
+        for agent in self.agents.values():
+            agent.setNewTask(self.current_task)
+        if saved is not None:
+            self.journal.restore_agents(self.agents, saved["agents"])
+            if saved["kind"] == "split":
                 split_needed = True
-                break
-          
+                decomposition = {"subtasks": saved["subtasks"]}
+            else:
+                split_needed = saved["split"]
+            logger.info(f"{indent}Resuming node {self.node} from its '{saved['kind']}' checkpoint.")
+        if not split_needed:
+            if Config.SPECULATIVE_DECOMPOSITION == "start":
+                self._speculate(indent, deadline)
+            try:
+                if Config.ROUND_MODE == "pipeline":
+                    resume = saved if saved is not None and saved["kind"] == "agent_round" else None
+                    split_needed = await self._pipelined_rounds(agent_ids, indent, deadline, resume)
+                else:
+                    start_round = saved["round"] if saved is not None and saved["kind"] == "round" else 0
+                    split_needed = await self._lockstep_rounds(agent_ids, indent, deadline, start_round)
+            finally:
+                if not split_needed:
+                    await self._discard_speculation(indent)
 
         # Phase 3: Recursive decomposition if needed
         if split_needed:
@@ -201,27 +953,50 @@ class TaskExecuter:
             for agent in self.agents.values():
                 agent.memory.clean_short()
         
-            tm = TaskManager(objective=self.overall_task, current_task=self.overall_task)
-            decomposition = await tm.task_decomposer()
-            for sub in decomposition.get("subtasks", []):
+            tm = self._task_manager()
+            try:
+                if decomposition is None:
+                    decomposition = await within(deadline, self._take_speculation(indent))
+                if decomposition is None:
+                    decomposition = await within(deadline, tm.task_decomposer(deadline))
+            except DeadlineExceeded:
+                logger.warning(f"{indent}Run deadline reached during decomposition, keeping best output in memory.")
+                decomposition = {}
+            subtasks = [sub for sub in decomposition.get("subtasks", []) if sub.get("objective")]
+            if saved is None or saved["kind"] != "split":
+                await self._checkpoint("split", {"subtasks": subtasks})
+            deps = self._subtask_dependencies(subtasks) if Config.SUBTASKS_PARALLEL else None
+            if deps is not None:
+                await self._run_subtasks_parallel(subtasks, deps, indent, recursion_depth, deadline)
+                subtasks = []
+            for k, sub in enumerate(subtasks):
                 desc = sub.get("objective")
-                if not desc:
-                    continue
+                if deadline is not None and deadline.expired():
+                    logger.warning(f"{indent}Run deadline reached, skipping remaining subtasks.")
+                    break
                 logger.info(f"{indent}↘ Subtask: {desc}")
                 sub_exec = TaskExecuter(
                     agents=self.agents,
                     current_task=desc,
                     overall_task=self.overall_task,
                     max_rounds=self.max_rounds,
-                    max_recursion_depth=self.max_recursion_depth
-                )
-                await sub_exec.branching_recursive_execution(
-                    agent_ids=list(self.agents.keys()),
-                    recursion_depth=recursion_depth+1
+                    max_recursion_depth=self.max_recursion_depth,
+                    journal=self.journal,
+                    node=f"{self.node}/{k}",
                 )
+                # LLM calls made by the subtask are reported at its depth
+                with call_context(depth=recursion_depth+1):
+                    await sub_exec.branching_recursive_execution(
+                        agent_ids=list(self.agents.keys()),
+                        recursion_depth=recursion_depth+1,
+                        deadline=deadline
+                    )
     
         # Phase 4: All done or fallback to memory
-        await self.select_best(agent_ids)
+        await self.select_best(agent_ids, deadline)
+        if deadline is None or not deadline.expired():
+            # A node cut short by the deadline is not finished; resuming redoes it
+            await self._checkpoint("done", {})
 
         return None
 
@@ -0,0 +1,280 @@
+import abc
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Who is making the current LLM call. Set by main (run_id), TaskExecuter (depth)
+# and Agent/TaskManager (agent_id, phase); asyncio tasks inherit it when created.
+_call_context: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar(
+    "llm_call_context", default={"run_id": None, "depth": 0, "agent_id": None, "phase": None}
+)
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+@contextlib.contextmanager
+def call_context(**fields: Any) -> Iterator[Dict[str, Any]]:
+    """Attribute LLM calls made inside this block to `fields` (run_id, depth, agent_id, phase)."""
+    token = _call_context.set({**_call_context.get(), **fields})
+    try:
+        yield _call_context.get()
+    finally:
+        _call_context.reset(token)
+
+
+def current_context() -> Dict[str, Any]:
+    return _call_context.get()
+
+
+def call_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    """USD cost of one call from Config.MODEL_PRICES (per million tokens); 0.0 for unpriced models."""
+    prices = Config.MODEL_PRICES.get(model)
+    if not prices:
+        return 0.0
+    cached_price = prices.get("cached_input", prices["input"])
+    return (
+        (prompt_tokens - cached_tokens) * prices["input"]
+        + cached_tokens * cached_price
+        + completion_tokens * prices["output"]
+    ) / 1_000_000
+
+
+@dataclass
+class CallRecord:
+    """
+    One LLM request as seen by LLMClient. `source` is "network" for a real
+    request, "cache" for a response-cache hit and "replay" for a cassette replay;
+    `outcome` is "ok", "error" or "cancelled" (a losing hedge, or a deadline).
+    `factored_tokens` estimates the prompt tokens saved by sending text shared by
+    several candidates only once (see Agent._factor_shared).
+    """
+    provider: str
+    model: str
+    latency: float
+    source: str = "network"
+    outcome: str = "ok"
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    retries: int = 0
+    factored_tokens: int = 0
+    stream: bool = False
+    run_id: Optional[str] = None
+    depth: int = 0
+    agent_id: Optional[int] = None
+    phase: Optional[str] = None
+    cost: float = 0.0
+    ts: float = field(default_factory=time.time)
+
+    @classmethod
+    def build(cls, provider: str, model: str, latency: float, usage: Any = None, **kwargs) -> "CallRecord":
+        """Fill in the call context and token counts from an OpenAI `usage` object."""
+        record = cls(provider=provider, model=model, latency=latency, **{**current_context(), **kwargs})
+        if usage is not None:
+            record.prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+            record.completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+            details = getattr(usage, "prompt_tokens_details", None)
+            record.cached_tokens = getattr(details, "cached_tokens", 0) or 0
+        record.cost = call_cost(model, record.prompt_tokens, record.completion_tokens, record.cached_tokens)
+        return record
+
+
+class TelemetrySink(abc.ABC):
+    """Receives every CallRecord. Subclasses implement emit() and, if they buffer, close()."""
+
+    @abc.abstractmethod
+    def emit(self, record: CallRecord) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryAggregator(TelemetrySink):
+    """Keeps every record in memory and summarises them by any record fields."""
+
+    def __init__(self):
+        self.records: List[CallRecord] = []
+
+    def emit(self, record: CallRecord) -> None:
+        self.records.append(record)
+
+    def summary(self, by: Sequence[str] = ("phase",)) -> Dict[Tuple, Dict[str, float]]:
+        groups: Dict[Tuple, List[CallRecord]] = defaultdict(list)
+        for r in self.records:
+            groups[tuple(getattr(r, k) for k in by)].append(r)
+        result = {}
+        for key, records in groups.items():
+            latencies = sorted(r.latency for r in records if r.source == "network")
+            result[key] = {
+                "calls": len(records),
+                "network": len(latencies),
+                "errors": sum(1 for r in records if r.outcome != "ok"),
+                "retries": sum(r.retries for r in records),
+                "prompt_tokens": sum(r.prompt_tokens for r in records),
+                "completion_tokens": sum(r.completion_tokens for r in records),
+                "cached_tokens": sum(r.cached_tokens for r in records),
+                "factored_tokens": sum(r.factored_tokens for r in records),
+                "cost": sum(r.cost for r in records),
+                "latency_total": sum(latencies),
+                "latency_p50": latencies[len(latencies) // 2] if latencies else 0.0,
+                "latency_max": latencies[-1] if latencies else 0.0,
+            }
+        return dict(sorted(result.items(), key=lambda kv: tuple(str(k) for k in kv[0])))
+
+    def report(self, by: Sequence[str] = ("phase",)) -> str:
+        """Plain-text table of summary(by), one row per group plus a total."""
+        header = (
+            f"{'/'.join(by):<20} {'calls':>6} {'net':>5} {'err':>4} {'retry':>5} "
+            f"{'prompt':>10} {'cached':>9} {'factored':>9} {'complet.':>9} {'cost $':>9} {'llm s':>9} {'p50 s':>7} {'max s':>7}"
+        )
+        rows = [header]
+        total = {"calls": 0, "network": 0, "errors": 0, "retries": 0, "prompt_tokens": 0, "cached_tokens": 0,
+                 "factored_tokens": 0, "completion_tokens": 0, "cost": 0.0, "latency_total": 0.0}
+        for key, s in self.summary(by).items():
+            for k in total:
+                total[k] += s[k]
+            label = "/".join("-" if k is None else str(k) for k in key)
+            rows.append(
+                f"{label:<20} {s['calls']:>6} {s['network']:>5} {s['errors']:>4} {s['retries']:>5} "
+                f"{s['prompt_tokens']:>10} {s['cached_tokens']:>9} {s['factored_tokens']:>9} {s['completion_tokens']:>9} "
+                f"{s['cost']:>9.4f} {s['latency_total']:>9.1f} {s['latency_p50']:>7.2f} {s['latency_max']:>7.2f}"
+            )
+        rows.append(
+            f"{'total':<20} {total['calls']:>6} {total['network']:>5} {total['errors']:>4} {total['retries']:>5} "
+            f"{total['prompt_tokens']:>10} {total['cached_tokens']:>9} {total['factored_tokens']:>9} {total['completion_tokens']:>9} "
+            f"{total['cost']:>9.4f} {total['latency_total']:>9.1f}"
+        )
+        return "\n".join(rows)
+
+
+class JSONLSink(TelemetrySink):
+    """Appends one JSON object per call to a file (buffered; flushed on close)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def emit(self, record: CallRecord) -> None:
+        with self._lock:
+            self._file.write(json.dumps(asdict(record), ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class PrometheusTextfileSink(TelemetrySink):
+    """
+    Counters in the Prometheus text format, for node_exporter's textfile collector.
+    The file is rewritten atomically at most every `interval` seconds and on close.
+    """
+
+    LABELS = ("phase", "depth", "model", "source", "outcome")
+    METRICS = {
+        "llm_calls_total": ("counter", "LLM calls", lambda r: 1),
+        "llm_retries_total": ("counter", "LLM call retries (rate-limit and transient)", lambda r: r.retries),
+        "llm_prompt_tokens_total": ("counter", "Prompt tokens", lambda r: r.prompt_tokens),
+        "llm_cached_tokens_total": ("counter", "Cached prompt tokens", lambda r: r.cached_tokens),
+        "llm_factored_tokens_total": ("counter", "Prompt tokens saved by shared-prefix factoring", lambda r: r.factored_tokens),
+        "llm_completion_tokens_total": ("counter", "Completion tokens", lambda r: r.completion_tokens),
+        "llm_cost_usd_total": ("counter", "Estimated cost in USD", lambda r: r.cost),
+        "llm_latency_seconds_total": ("counter", "Summed call latency", lambda r: r.latency),
+    }
+
+    def __init__(self, path: str, interval: float = 15.0):
+        self.path = path
+        self.interval = interval
+        self._values: Dict[str, Dict[Tuple, float]] = {name: defaultdict(float) for name in self.METRICS}
+        self._lock = threading.Lock()
+        self._written = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def emit(self, record: CallRecord) -> None:
+        labels = tuple("" if getattr(record, k) is None else str(getattr(record, k)) for k in self.LABELS)
+        with self._lock:
+            for name, (_, _, value) in self.METRICS.items():
+                self._values[name][labels] += value(record)
+        if time.monotonic() - self._written >= self.interval:
+            self.write()
+
+    def write(self) -> None:
+        lines = []
+        with self._lock:
+            for name, (kind, help_text, _) in self.METRICS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in self._values[name].items():
+                    label_str = ",".join(f'{k}="{v}"' for k, v in zip(self.LABELS, labels))
+                    lines.append(f"{name}{{{label_str}}} {value}")
+            self._written = time.monotonic()
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.path)
+
+    def close(self) -> None:
+        self.write()
+
+
+_sinks: List[TelemetrySink] = []
+
+
+def add_sink(sink: TelemetrySink) -> TelemetrySink:
+    _sinks.append(sink)
+    return sink
+
+
+def remove_sink(sink: TelemetrySink) -> None:
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+
+def emit(record: CallRecord) -> None:
+    """Send a record to every registered sink. A failing sink never fails the call."""
+    for sink in _sinks:
+        try:
+            sink.emit(record)
+        except Exception as e:
+            logger.warning(f"Telemetry sink {type(sink).__name__} failed: {e}")
+
+
+def configure_sinks() -> Optional[MemoryAggregator]:
+    """
+    Register the sinks named in Config.TELEMETRY_SINKS ("memory", "jsonl",
+    "prometheus"). Returns the in-memory aggregator if one was configured.
+    """
+    aggregator = None
+    for name in Config.TELEMETRY_SINKS:
+        if name == "memory":
+            aggregator = add_sink(MemoryAggregator())
+        elif name == "jsonl":
+            add_sink(JSONLSink(Config.TELEMETRY_JSONL_PATH))
+        elif name == "prometheus":
+            add_sink(PrometheusTextfileSink(Config.TELEMETRY_PROMETHEUS_PATH))
+        else:
+            raise ValueError(f"Unknown telemetry sink '{name}'.")
+    return aggregator
+
+
+def close_sinks() -> None:
+    for sink in list(_sinks):
+        sink.close()
+        _sinks.remove(sink)
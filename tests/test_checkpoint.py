@@ -0,0 +1,98 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import segmentStore
+from checkpoint import RunJournal, list_runs
+from memory import Memory
+
+
+class _Agent:
+    def __init__(self, aid: int):
+        self.id = aid
+        self.status = "ongoing"
+        self.memory = Memory()
+
+
+class RunJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "checkpoints.sqlite")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def _commit(self, journal, agents, node="0", kind="round"):
+        asyncio.run(journal.commit(node, kind, {"agents": journal.capture_agents(agents)}))
+
+    def _restored(self, run_id, node="0"):
+        journal = RunJournal(run_id, path=self.path, resume=True)
+        try:
+            fresh = {0: _Agent(0), 1: _Agent(1)}
+            journal.restore_agents(fresh, journal.latest(node)["agents"])
+            return fresh
+        finally:
+            journal.close()
+
+    def test_each_round_stores_only_the_new_segments(self):
+        journal = RunJournal("r1", path=self.path)
+        agents = {0: _Agent(0), 1: _Agent(1)}
+        for r in range(20):
+            for agent in agents.values():
+                agent.memory.add_segment(f"{agent.id}:{r}")
+            self._commit(journal, agents)
+        journal.close()
+        self.assertEqual(journal.stats["entries_written"], 40)
+        restored = self._restored("r1")
+        for aid, agent in agents.items():
+            self.assertEqual(list(restored[aid].memory.short_term["segments"]), list(agent.memory.short_term["segments"]))
+
+    def test_capturing_does_not_snapshot_or_copy_memory(self):
+        journal = RunJournal("r1", path=self.path)
+        agents = {0: _Agent(0)}
+        before = dict(segmentStore.STATS)
+        for r in range(10):
+            agents[0].memory.add_segment(str(r))
+            self._commit(journal, agents)
+        journal.close()
+        self.assertEqual(segmentStore.STATS["published"], before["published"])
+        self.assertEqual(segmentStore.STATS["entries_copied"], before["entries_copied"])
+
+    def test_edits_other_than_appends_are_captured(self):
+        journal = RunJournal("r1", path=self.path)
+        agents = {0: _Agent(0), 1: _Agent(1)}
+        segments = agents[0].memory.short_term["segments"]
+        segments.extend(["a", "b", "c"])
+        self._commit(journal, agents)
+        segments[1] = "B"
+        del segments[0]
+        segments.append("d")
+        self._commit(journal, agents)
+        journal.close()
+        self.assertEqual(list(self._restored("r1")[0].memory.short_term["segments"]), ["B", "c", "d"])
+
+    def test_lists_shared_by_agents_are_stored_once(self):
+        journal = RunJournal("r1", path=self.path)
+        agents = {0: _Agent(0), 1: _Agent(1)}
+        agents[0].memory.long_term.extend([{"task": "t", "result": "x" * 100}] * 3)
+        agents[1].memory.adopt_long(agents[0].memory.share_long())
+        self._commit(journal, agents)
+        journal.close()
+        self.assertEqual(journal.stats["entries_written"], 3)
+        restored = self._restored("r1")
+        self.assertEqual(len(restored[1].memory.long_term), 3)
+
+    def test_new_runs_keep_only_the_most_recent_journals(self):
+        with mock.patch("config.Config.CHECKPOINT_KEEP_RUNS", 2):
+            for run_id in ("r1", "r2", "r3"):
+                journal = RunJournal(run_id, path=self.path)
+                journal.begin({"objective": run_id})
+                self._commit(journal, {0: _Agent(0)})
+                journal.close()
+        self.assertEqual(sorted(run_id for run_id, *_ in list_runs(self.path)), ["r2", "r3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from consensus import estimate_jaccard, jaccard, local_consensus, shingles, sketch
+
+BASE = " ".join(f"token{i}" for i in range(200))
+
+
+class SimilarityTest(unittest.TestCase):
+    def test_sketch_estimate_tracks_exact_jaccard(self):
+        a = shingles(BASE, 3)
+        b = shingles(BASE.replace("token100", "changed"), 3)
+        exact = jaccard(a, b)
+        self.assertAlmostEqual(estimate_jaccard(sketch(a), sketch(b)), exact, delta=0.1)
+        self.assertEqual(jaccard(a, a), 1.0)
+
+
+class LocalConsensusTest(unittest.TestCase):
+    def decide(self, candidates):
+        with self.assertLogs("consensus", "INFO"):
+            return local_consensus(candidates, threshold=0.8, k=3, majority=0.5)
+
+    def test_identical_majority_wins_ignoring_whitespace(self):
+        self.assertEqual(self.decide(["other answer", BASE, "  " + BASE.replace(" ", "\n")]), 1)
+
+    def test_near_duplicate_cluster_picks_its_medoid(self):
+        variants = [BASE + " end", BASE, BASE + " tail words", "completely different text here"]
+        winner = self.decide(variants)
+        self.assertEqual(winner, 1)
+
+    def test_divergent_candidates_need_a_vote(self):
+        self.assertIsNone(self.decide(["alpha beta gamma", "delta epsilon zeta", "eta theta iota"]))
+
+    def test_no_candidates(self):
+        self.assertIsNone(local_consensus([]))
+
+
+if __name__ == "__main__":
+    unittest.main()
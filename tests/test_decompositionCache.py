@@ -0,0 +1,47 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from decompositionCache import DecompositionCache, decomposition_key
+
+
+class DecompositionKeyTest(unittest.TestCase):
+    def test_whitespace_does_not_change_the_key(self):
+        self.assertEqual(
+            decomposition_key("Build  a\n game ", "o4-mini", "prompt"),
+            decomposition_key("Build a game", "o4-mini", "prompt"),
+        )
+
+    def test_model_and_prompt_change_the_key(self):
+        base = decomposition_key("Build a game", "o4-mini", "prompt")
+        self.assertNotEqual(decomposition_key("Build a game", "o3-mini", "prompt"), base)
+        self.assertNotEqual(decomposition_key("Build a game", "o4-mini", "edited prompt"), base)
+
+
+class DecompositionCacheTest(unittest.TestCase):
+    def test_only_decompositions_with_subtasks_are_stored(self):
+        async def run():
+            cache = DecompositionCache(path=None)
+            stored = await cache.put("a", {"subtasks": []})
+            await cache.put("b", {"subtasks": [{"description": "x"}]})
+            first = await cache.get("b")
+            first["subtasks"].append("mutated")
+            return stored, await cache.get("a"), await cache.get("b")
+
+        stored, missing, cached = asyncio.run(run())
+        self.assertFalse(stored)
+        self.assertIsNone(missing)
+        self.assertEqual(cached, {"subtasks": [{"description": "x"}]})
+
+    def test_only_the_top_level_split_uses_the_cache(self):
+        from taskexecuter import TaskExecuter
+        with mock.patch("config.Config.DECOMPOSITION_CACHE_ENABLED", True), \
+                mock.patch("taskManager.get_decomposition_cache", return_value=DecompositionCache(path=None)):
+            top = TaskExecuter({}, "Build a game")._task_manager()
+            below = TaskExecuter({}, "Draw the map", overall_task="Build a game")._task_manager()
+        self.assertIsNotNone(top.cache)
+        self.assertIsNone(below.cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import json
+import unittest
+
+from jsonStream import IncrementalJSONFields
+
+
+def _feed_in_pieces(text, size, stream_keys=None):
+    parser = IncrementalJSONFields(stream_keys)
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return parser, events
+
+
+class IncrementalJSONFieldsTest(unittest.TestCase):
+    DOC = {
+        "answer": 'print("héllo")\n\tx = "a\\\\b" 😀',
+        "score": 3.5,
+        "nested": {"a": [1, "}", {"b": "\"]"}]},
+        "ok": True,
+        "none": None,
+    }
+
+    def test_fields_match_json_loads_for_any_split(self):
+        text = json.dumps(self.DOC)
+        for size in (1, 2, 3, 7, len(text)):
+            with self.subTest(size=size):
+                parser, events = _feed_in_pieces(text, size)
+                self.assertTrue(parser.done)
+                self.assertEqual(parser.fields, self.DOC)
+                self.assertEqual([key for kind, key, _ in events if kind == "field"], list(self.DOC))
+
+    def test_streamed_chunks_add_up_to_the_value(self):
+        # ensure_ascii escapes the emoji as a surrogate pair, which a 1-char split cuts in half
+        text = json.dumps(self.DOC)
+        for size in (1, 5):
+            with self.subTest(size=size):
+                _, events = _feed_in_pieces(text, size, stream_keys={"answer"})
+                chunks = [value for kind, key, value in events if kind == "chunk"]
+                self.assertGreater(len(chunks), 1)
+                self.assertEqual("".join(chunks), self.DOC["answer"])
+
+    def test_text_around_the_object_is_ignored(self):
+        parser = IncrementalJSONFields()
+        list(parser.feed('```json\n{"a": 1}\n```'))
+        self.assertTrue(parser.done)
+        self.assertEqual(parser.fields, {"a": 1})
+
+    def test_unfinished_values_are_not_reported(self):
+        parser = IncrementalJSONFields({"a"})
+        events = list(parser.feed('{"a": "par'))
+        self.assertEqual(events, [("chunk", "a", "par")])
+        self.assertEqual(parser.fields, {})
+        self.assertFalse(parser.done)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+from preValidation import check_html, check_latex, check_python, code_blocks, output_kind, run_check
+
+
+class OutputKindTest(unittest.TestCase):
+    def test_last_output_format_line_selects_the_check(self):
+        self.assertEqual(output_kind("Build a game.\nOutput Format: a single Python file using pygame"), "python")
+        self.assertEqual(output_kind("Output Format: HTML5 page"), "html")
+        self.assertEqual(output_kind("Output Format: LaTeX beamer slides"), "latex")
+        self.assertIsNone(output_kind("Output Format: plain text"))
+        self.assertIsNone(output_kind("no format line"))
+
+
+class PythonCheckTest(unittest.TestCase):
+    def test_unfinished_fragments_that_more_text_can_fix_pass(self):
+        for text in (
+            "if x:\n    y = 1\nelse",      # cut off before the colon
+            'x = "abc',                   # cut off inside a string
+            "def f(a,\n",                 # open bracket
+            's = """doc\n',               # open triple-quoted string
+            "for i in range(3):\n",       # block without a body yet
+        ):
+            with self.subTest(text=text):
+                self.assertIsNone(check_python(text, complete=False))
+
+    def test_prose_before_unfenced_code_is_skipped(self):
+        text = "Here is the updated game loop:\nimport pygame\npygame.init()\n"
+        self.assertIsNone(check_python(text, complete=False))
+        self.assertIsNone(check_python(text, complete=True))
+
+    def test_errors_no_continuation_can_fix_are_reported(self):
+        self.assertEqual(check_python("x = 1\n)\n", complete=False), "line 2: unmatched ')'")
+        self.assertEqual(check_python("Here is the code:\nx = = 1\n", complete=False), "line 2: invalid syntax")
+
+    def test_complete_fragments_must_compile(self):
+        self.assertIsNone(check_python("x = 1\n", complete=True))
+        self.assertIn("expected ':'", check_python("if x:\n    y = 1\nelse", complete=True))
+        self.assertIn("never closed", check_python("x = (1,\n", complete=True))
+
+
+class HTMLCheckTest(unittest.TestCase):
+    def test_open_elements_only_fail_complete_fragments(self):
+        text = "<html>\n<body>\n<div>\n<p>hi\n"
+        self.assertIsNone(check_html(text, complete=False))
+        self.assertEqual(check_html(text, complete=True), "<div> from line 3 is never closed")
+
+    def test_mis_nesting_fails_unfinished_fragments(self):
+        error = check_html("<div><span>x</div>", complete=False)
+        self.assertIn("while <span>", error)
+
+    def test_void_and_optional_end_tags(self):
+        self.assertIsNone(check_html("<ul><li>a<li>b</ul><br><img src=x>", complete=True))
+
+
+class LatexCheckTest(unittest.TestCase):
+    def test_unclosed_environment(self):
+        text = "\\begin{document}\n\\section{A}\n"
+        self.assertIsNone(check_latex(text, complete=False))
+        self.assertEqual(check_latex(text, complete=True), "\\begin{document} from line 1 is never closed")
+
+    def test_mismatched_end(self):
+        error = check_latex("\\begin{itemize}\n\\end{enumerate}", complete=False)
+        self.assertIn("\\end{enumerate} while \\begin{itemize}", error)
+
+    def test_verbatim_and_definitions_are_not_parsed(self):
+        text = "\\newcommand{\\x}{\\begin{center}}\n\\begin{verbatim}\\end{itemize}\\end{verbatim}\n"
+        self.assertIsNone(check_latex(text, complete=True))
+
+
+class RunCheckTest(unittest.TestCase):
+    def test_only_the_last_fenced_block_may_be_unfinished(self):
+        text = "Intro\n```python\nx = (1,\n```\nMore\n```python\ny = (2,\n"
+        self.assertEqual(code_blocks(text, ("python",)), ["x = (1,\n", "y = (2,\n"])
+        self.assertIn("block 1", run_check("python", text, complete=False))
+        self.assertIsNone(run_check("python", "```python\ny = (2,\n", complete=False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import unittest
+
+import segmentStore
+from promptBudget import PromptBudget, elide, estimate_tokens, shared_prefix
+
+
+class ElideTest(unittest.TestCase):
+    def test_short_text_is_unchanged(self):
+        self.assertEqual(elide("a few words", 100), "a few words")
+
+    def test_long_text_keeps_head_and_tail(self):
+        text = " ".join(f"word{i}" for i in range(1000))
+        cut = elide(text, 100)
+        self.assertLessEqual(estimate_tokens(cut), 110)
+        self.assertTrue(cut.startswith("word0 "))
+        self.assertTrue(cut.endswith("word999"))
+        self.assertIn("tokens omitted", cut)
+
+
+class SharedPrefixTest(unittest.TestCase):
+    def test_splits_at_the_last_shared_line(self):
+        prefix, rest = shared_prefix(["head\nline a\n", "head\nline b\n"])
+        self.assertEqual(prefix, "head\n")
+        self.assertEqual(rest, ["line a\n", "line b\n"])
+
+    def test_no_split_below_min_chars_or_for_one_text(self):
+        self.assertEqual(shared_prefix(["head\na", "head\nb"], min_chars=100), ("", ["head\na", "head\nb"]))
+        self.assertEqual(shared_prefix(["only"]), ("", ["only"]))
+
+
+class FitAroundTest(unittest.TestCase):
+    def setUp(self):
+        self.budget = PromptBudget("test", context_tokens=1000, output_reserve=200, max_prompt_tokens=None)
+
+    def test_context_is_trimmed_and_the_fixed_text_is_not(self):
+        fixed = "fragment " * 300
+        context = ["objective " * 500, "task " * 500]
+        with self.assertLogs("promptBudget", "INFO"):
+            fitted = self.budget.fit_around(fixed, context, overhead="system")
+        used = sum(map(estimate_tokens, fitted)) + estimate_tokens(fixed) + estimate_tokens("system")
+        self.assertLessEqual(used, self.budget.limit)
+        self.assertTrue(all("tokens omitted" in text for text in fitted))
+
+    def test_fitting_context_is_returned_as_is(self):
+        context = ["objective", "task"]
+        self.assertEqual(self.budget.fit_around("fragment", context, overhead="system"), context)
+
+    def test_fixed_text_over_budget_is_refused(self):
+        self.assertIsNone(self.budget.fit_around("fragment " * 900, ["task"], overhead="system"))
+
+
+class FitMemoryTest(unittest.TestCase):
+    def test_newest_segment_is_trimmed_last(self):
+        budget = PromptBudget("test", context_tokens=700, output_reserve=100, max_prompt_tokens=None)
+        long_term = [{"task": "old", "result": "old result " * 300}]
+        segments = ["first " * 200, "latest " * 200]
+        with self.assertLogs("promptBudget", "INFO"):
+            prior, _ = budget.fit_memory(long_term, segments, justify="", overhead="system")
+        self.assertLessEqual(estimate_tokens(prior), budget.limit)
+        self.assertIn("[earlier result omitted: old]", prior)
+        self.assertTrue(prior.endswith("latest " * 200))
+
+
+class _RecordingClient:
+    model = "test"
+
+    def __init__(self):
+        self.prompts = []
+
+    async def a_chat_completion(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return json.dumps({"justify": "j", "new_content": f"segment {len(self.prompts)}", "status": "ongoing"})
+
+
+class StepPromptTest(unittest.TestCase):
+    def test_prompt_under_budget_uses_the_cached_memory_text(self):
+        from agent import Agent
+        client = _RecordingClient()
+        budget = PromptBudget("test", context_tokens=10_000, output_reserve=1000, max_prompt_tokens=None)
+        agent = Agent(llm_client=client, id=0, stream=False, budget=budget)
+        agent.memory.long_term.append({"task": "t", "result": "earlier result"})
+        for _ in range(3):
+            asyncio.run(agent.step_async("objective", "task"))
+        before = dict(segmentStore.STATS)
+        asyncio.run(agent.step_async("objective", "task"))
+        # Memory as it was before the step added "segment 4"
+        sent = agent.memory.get_all().rsplit("\n", 1)[0]
+        self.assertTrue(client.prompts[-1][1]["content"].endswith(f"segments:\n{sent}\n"))
+        self.assertGreater(segmentStore.STATS["joins_extended"], before["joins_extended"])
+        # Only the one-entry justification list, which every step replaces, is joined anew
+        self.assertEqual(segmentStore.STATS["joins_built"] - before["joins_built"], 1)
+
+    def test_prompt_over_budget_is_trimmed(self):
+        from agent import Agent
+        client = _RecordingClient()
+        budget = PromptBudget("test", context_tokens=2000, output_reserve=500, max_prompt_tokens=None)
+        agent = Agent(llm_client=client, id=0, stream=False, budget=budget)
+        agent.memory.long_term.append({"task": "t", "result": "old result " * 2000})
+        with self.assertLogs("promptBudget", "INFO"):
+            asyncio.run(agent.step_async("objective", "task"))
+        self.assertIn("tokens omitted", client.prompts[0][1]["content"])
+
+
+class _VerdictClient:
+    model = "test"
+
+    def __init__(self):
+        self.prompts = []
+
+    async def a_chat_completion(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return json.dumps({"result": "true", "results": ["true"]})
+
+
+class ValidationPromptTest(unittest.TestCase):
+    def test_fragment_over_budget_is_still_sent_whole(self):
+        from agent import Agent
+        client = _VerdictClient()
+        budget = PromptBudget("test", context_tokens=2000, output_reserve=500, max_prompt_tokens=None)
+        agent = Agent(llm_client=client, id=0, stream=False, budget=budget)
+        fragment = "line of code\n" * 2000
+        with self.assertLogs("agent", "WARNING"):
+            ok = asyncio.run(agent.validate_async("objective", "task", fragment))
+        self.assertTrue(ok)
+        self.assertEqual(len(client.prompts), 1)
+        self.assertIn(fragment, client.prompts[0][1]["content"])
+
+
+if __name__ == "__main__":
+    unittest.main()
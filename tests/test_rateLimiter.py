@@ -0,0 +1,76 @@
+import asyncio
+import time
+import unittest
+from email.utils import formatdate
+from unittest import mock
+
+from rateLimiter import RateLimiter, TokenBucket, parse_retry_after
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_waits_for_the_refill_of_what_is_missing(self):
+        with mock.patch("rateLimiter.time.monotonic", return_value=100.0):
+            bucket = TokenBucket(60)            # one unit per second
+            bucket.take(60)
+            self.assertAlmostEqual(bucket.wait_time(5), 5.0)
+        with mock.patch("rateLimiter.time.monotonic", return_value=103.0):
+            self.assertAlmostEqual(bucket.wait_time(5), 2.0)
+        with mock.patch("rateLimiter.time.monotonic", return_value=1000.0):
+            self.assertEqual(bucket.wait_time(5), 0.0)
+            self.assertEqual(bucket.tokens, bucket.capacity)
+
+    def test_refund_corrects_the_estimate(self):
+        with mock.patch("rateLimiter.time.monotonic", return_value=100.0):
+            bucket = TokenBucket(1000)
+            bucket.take(500)
+            bucket.refund(300)
+            self.assertEqual(bucket.tokens, 800)
+            bucket.refund(-100)
+            self.assertEqual(bucket.tokens, 700)
+
+
+class ParseRetryAfterTest(unittest.TestCase):
+    def test_header_forms(self):
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after({}))
+        self.assertEqual(parse_retry_after({"retry-after-ms": "1500"}), 1.5)
+        self.assertEqual(parse_retry_after({"retry-after": "3"}), 3.0)
+        self.assertIsNone(parse_retry_after({"retry-after": "soon"}))
+        delay = parse_retry_after({"retry-after": formatdate(time.time() + 30, usegmt=True)})
+        self.assertTrue(25 <= delay <= 31, delay)
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_rate_limits_halve_concurrency_and_successes_restore_it(self):
+        limiter = RateLimiter("test", rpm=1000, tpm=100000, max_concurrency=8)
+        with self.assertLogs("rateLimiter", "WARNING"):
+            limiter.on_rate_limited(retry_after=0, attempt=0)
+        self.assertEqual(limiter.concurrency, 4)
+        for _ in range(4):
+            limiter.on_success()
+        self.assertEqual(limiter.concurrency, 5)
+
+    def test_permits_respect_the_concurrency_cap(self):
+        async def run():
+            limiter = RateLimiter("test", rpm=1000, tpm=100000, max_concurrency=2)
+            active, peak = 0, 0
+
+            async def call():
+                nonlocal active, peak
+                async with limiter.permit(10):
+                    active += 1
+                    peak = max(peak, active)
+                    await asyncio.sleep(0.01)
+                    active -= 1
+
+            await asyncio.gather(*(call() for _ in range(6)))
+            return limiter, peak
+
+        limiter, peak = asyncio.run(run())
+        self.assertEqual(peak, 2)
+        self.assertEqual(limiter.stats["requests"], 6)
+        self.assertEqual(limiter.in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
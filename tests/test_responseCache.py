@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from responseCache import ResponseCache, cache_key
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+class CacheKeyTest(unittest.TestCase):
+    def test_same_request_same_key(self):
+        self.assertEqual(
+            cache_key("openai", "m", [dict(m) for m in MESSAGES], 0, None),
+            cache_key("openai", "m", MESSAGES, 0, None),
+        )
+
+    def test_every_request_field_is_part_of_the_key(self):
+        base = cache_key("openai", "m", MESSAGES, 0, None)
+        for other in (
+            cache_key("other", "m", MESSAGES, 0, None),
+            cache_key("openai", "m2", MESSAGES, 0, None),
+            cache_key("openai", "m", [{"role": "user", "content": "hello"}], 0, None),
+            cache_key("openai", "m", MESSAGES, 0.5, None),
+            cache_key("openai", "m", MESSAGES, 0, {"type": "json_object"}),
+            cache_key("openai", "m", MESSAGES, 0, None, max_tokens=100),
+        ):
+            self.assertNotEqual(other, base)
+
+    def test_unset_max_tokens_keeps_the_old_key(self):
+        self.assertEqual(
+            cache_key("openai", "m", MESSAGES, 0, None, max_tokens=None),
+            cache_key("openai", "m", MESSAGES, 0, None),
+        )
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "responses.sqlite")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_memory_tier_evicts_least_recently_used(self):
+        cache = ResponseCache(path=None, memory_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "1")
+        self.assertEqual(cache.get("c"), "3")
+        self.assertEqual(cache.stats["evictions"], 1)
+
+    def test_disk_tier_survives_a_new_instance(self):
+        cache = ResponseCache(path=self.path)
+        cache.put("a", "1")
+        cache.close()
+        cache = ResponseCache(path=self.path)
+        self.assertEqual(cache.get("a"), "1")
+        self.assertEqual(cache.stats["disk_hits"], 1)
+        self.assertEqual(cache.get("a"), "1")
+        self.assertEqual(cache.stats["memory_hits"], 1)
+        cache.close()
+
+    def test_disk_tier_is_capped_by_size(self):
+        cache = ResponseCache(path=self.path, memory_entries=1, disk_max_bytes=25)
+        for key in "abc":
+            cache.put(key, key * 10)
+        cache.close()
+        cache = ResponseCache(path=self.path)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("c"), "c" * 10)
+        cache.close()
+
+    def test_expired_entries_are_misses(self):
+        cache = ResponseCache(path=self.path, ttl=60)
+        with mock.patch("responseCache.time.time", return_value=1000.0):
+            cache.put("a", "1")
+        with mock.patch("responseCache.time.time", return_value=1030.0):
+            self.assertEqual(cache.get("a"), "1")
+        with mock.patch("responseCache.time.time", return_value=1100.0):
+            self.assertIsNone(cache.get("a"))
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
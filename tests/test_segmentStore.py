@@ -0,0 +1,95 @@
+import copy
+import unittest
+
+import segmentStore
+from segmentStore import CowList, publish
+
+
+class CowListTest(unittest.TestCase):
+    def setUp(self):
+        self.before = dict(segmentStore.STATS)
+
+    def delta(self, name):
+        return segmentStore.STATS[name] - self.before[name]
+
+    def test_sharing_is_free_and_the_first_write_copies(self):
+        snapshot = publish(["a", "b"])
+        first, second = CowList.shared(snapshot), CowList.shared(snapshot)
+        self.assertEqual(first, second)
+        self.assertEqual(self.delta("copies"), 0)
+        first.append("c")
+        first.append("d")
+        self.assertEqual(list(first), ["a", "b", "c", "d"])
+        self.assertEqual(list(second), ["a", "b"])
+        self.assertEqual(snapshot.items, ("a", "b"))
+        self.assertEqual(self.delta("copies"), 1)
+        self.assertEqual(self.delta("entries_copied"), 2)
+
+    def test_snapshot_is_stable_until_the_next_write(self):
+        entries = CowList(["a"])
+        snapshot = entries.snapshot()
+        self.assertIs(entries.snapshot(), snapshot)
+        self.assertEqual(entries.version, snapshot.version)
+        entries.append("b")
+        self.assertIsNone(entries.version)
+        self.assertEqual(snapshot.items, ("a",))
+        self.assertNotEqual(entries.snapshot().version, snapshot.version)
+
+    def test_copies_share_until_written(self):
+        entries = CowList([{"task": "t"}])
+        clone = copy.deepcopy(entries)
+        self.assertIs(clone[0], entries[0])
+        clone.append({"task": "u"})
+        self.assertEqual(len(entries), 1)
+
+    def test_edits_counts_writes_other_than_appends(self):
+        entries = CowList()
+        entries.append("a")
+        entries.extend(["b", "c"])
+        self.assertEqual(entries.edits, 0)
+        entries[0] = "A"
+        del entries[1]
+        entries.insert(0, "z")
+        self.assertEqual(entries.edits, 3)
+        entries.clear()
+        self.assertEqual(entries.edits, 4)
+        self.assertEqual(list(entries), [])
+
+
+class JoinCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.before = dict(segmentStore.STATS)
+
+    def delta(self, name):
+        return segmentStore.STATS[name] - self.before[name]
+
+    def test_appends_extend_the_cached_join(self):
+        entries = CowList([{"result": "a"}, {"result": "b"}])
+        self.assertEqual(entries.join("\n", "result"), "a\nb")
+        self.assertEqual(entries.join("\n", "result"), "a\nb")
+        entries.append({"result": "c"})
+        self.assertEqual(entries.join("\n", "result"), "a\nb\nc")
+        self.assertEqual((self.delta("joins_built"), self.delta("joins_cached"), self.delta("joins_extended")), (1, 1, 1))
+
+    def test_other_writes_rebuild_the_join(self):
+        entries = CowList(["a", "b", "c"])
+        entries.join("")
+        entries[1] = "B"
+        self.assertEqual(entries.join(""), "aBc")
+        del entries[0]
+        self.assertEqual(entries.join(""), "Bc")
+        self.assertEqual(self.delta("joins_built"), 3)
+
+    def test_shared_snapshots_share_their_join(self):
+        source = CowList(["a", "b"])
+        source.join("-")
+        view = CowList.shared(source.snapshot())
+        self.assertEqual(view.join("-"), "a-b")
+        self.assertEqual(self.delta("joins_cached"), 1)
+        view.append("c")
+        self.assertEqual(view.join("-"), "a-b-c")
+        self.assertEqual(source.join("-"), "a-b")
+
+
+if __name__ == "__main__":
+    unittest.main()
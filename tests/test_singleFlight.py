@@ -0,0 +1,105 @@
+import asyncio
+import unittest
+
+from singleFlight import SingleFlight
+
+
+class SingleFlightTest(unittest.TestCase):
+    def test_identical_concurrent_calls_share_one_run(self):
+        async def run():
+            group, runs = SingleFlight(), []
+
+            async def work(key):
+                runs.append(key)
+                await asyncio.sleep(0.01)
+                return key
+
+            results = await asyncio.gather(
+                group.do("a", lambda: work("a")),
+                group.do("a", lambda: work("a")),
+                group.do("b", lambda: work("b")),
+            )
+            return group, runs, results
+
+        group, runs, results = asyncio.run(run())
+        self.assertEqual(results, ["a", "a", "b"])
+        self.assertEqual(sorted(runs), ["a", "b"])
+        self.assertEqual(group.stats, {"calls": 3, "coalesced": 1})
+
+    def test_errors_reach_every_waiter_and_are_not_remembered(self):
+        async def run():
+            group = SingleFlight()
+
+            async def fail():
+                await asyncio.sleep(0.01)
+                raise ValueError("boom")
+
+            results = await asyncio.gather(group.do("a", fail), group.do("a", fail), return_exceptions=True)
+            again = await group.do("a", lambda: asyncio.sleep(0, result="ok"))
+            return results, again
+
+        results, again = asyncio.run(run())
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(again, "ok")
+
+    def test_work_is_cancelled_only_when_every_waiter_is_gone(self):
+        async def run():
+            group, started = SingleFlight(), asyncio.Event()
+
+            async def work():
+                started.set()
+                await asyncio.sleep(0.05)
+                return "done"
+
+            first = asyncio.create_task(group.do("a", work))
+            second = asyncio.create_task(group.do("a", work))
+            await started.wait()
+            first.cancel()
+            survivor = await second
+
+            lone = asyncio.create_task(group.do("b", work))
+            await asyncio.sleep(0)
+            task = group._flights["b"][0]
+            lone.cancel()
+            await asyncio.gather(lone, return_exceptions=True)
+            await asyncio.sleep(0)
+            return survivor, task
+
+        survivor, task = asyncio.run(run())
+        self.assertEqual(survivor, "done")
+        self.assertTrue(task.cancelled())
+
+
+class LLMClientCoalescingTest(unittest.TestCase):
+    def setUp(self):
+        from mockServer import start_mock_server
+        self.server = start_mock_server(latency=0.1, seed=1)
+
+    def tearDown(self):
+        self.server.shutdown()
+
+    def test_only_calls_sending_the_same_request_are_coalesced(self):
+        from llmClient import LLMClient
+        messages = [{"role": "system", "content": "You are the executor"}, {"role": "user", "content": "go"}]
+
+        async def run():
+            def client():
+                return LLMClient(model="gpt-4o", base_url=self.server.base_url, api_key="x", temperature=0, rate_limit=False)
+
+            a, b = client(), client()
+            await asyncio.gather(a.a_chat_completion(messages), b.a_chat_completion(messages))
+            same = self.server.requests
+            await asyncio.gather(
+                a.a_chat_completion(messages, max_tokens=5),
+                b.a_chat_completion(messages, max_tokens=6),
+                a.a_chat_completion(messages, max_tokens=5, timeout=30),
+            )
+            return same, self.server.requests - same
+
+        same, different = asyncio.run(run())
+        self.assertEqual(same, 1)
+        self.assertEqual(different, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
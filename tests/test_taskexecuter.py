@@ -0,0 +1,74 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+from agent import Agent
+from promptBudget import PromptBudget
+from taskexecuter import TaskExecuter
+
+
+class _SlowClient:
+    model = "test"
+
+    def __init__(self, name: str, latency: float):
+        self.name = name
+        self.latency = latency
+        self.calls = 0
+
+    async def a_chat_completion(self, prompt, **kwargs):
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(self.latency)
+        return json.dumps({"justify": "", "new_content": f"{self.name} step {call}", "status": "ongoing"})
+
+
+def _agents(*latencies):
+    budget = PromptBudget("test", context_tokens=100_000, output_reserve=1000, max_prompt_tokens=None)
+    return {
+        i: Agent(llm_client=_SlowClient(f"agent{i}", latency), id=i, stream=False, budget=budget)
+        for i, latency in enumerate(latencies)
+    }
+
+
+@mock.patch("config.Config.ROUND_STRAGGLER_FACTOR", 2.0)
+@mock.patch("config.Config.ROUND_STRAGGLER_POLICY", "carry")
+class CarriedStepTest(unittest.TestCase):
+    def test_carried_step_never_writes_memory_replaced_while_it_ran(self):
+        async def run():
+            agents = _agents(0.01, 0.2)
+            executor = TaskExecuter(agents, "task")
+            await executor.step(0, list(agents.values()))
+            self.assertEqual([a.id for a in executor.last_round_stats["stragglers"]], [1])
+            # The straggler fails validation and gets the winner's memory while its step still runs
+            agents[1].memory.restore_short(agents[0].memory.share_short())
+            restored = list(agents[1].memory.short_term["segments"])
+            await asyncio.sleep(0.3)
+            self.assertEqual(list(agents[1].memory.short_term["segments"]), restored)
+            # Next round drops the stale step and starts a fresh one from the restored memory
+            agents[1].llm.latency = 0.01
+            await executor.step(1, list(agents.values()))
+            await executor._drop_carried()
+            return agents
+
+        agents = asyncio.run(run())
+        self.assertEqual(list(agents[1].memory.short_term["segments"]), ["agent0 step 1", "agent1 step 2"])
+
+    def test_carried_step_is_applied_when_memory_is_unchanged(self):
+        async def run():
+            agents = _agents(0.01, 0.1)
+            executor = TaskExecuter(agents, "task")
+            await executor.step(0, list(agents.values()))
+            self.assertEqual(agents[1].memory.short_term["segments"], [])
+            agents[0].llm.latency = 0.2
+            await executor.step(1, list(agents.values()))
+            await executor._drop_carried()
+            return agents, executor
+
+        agents, executor = asyncio.run(run())
+        self.assertEqual(list(agents[1].memory.short_term["segments"]), ["agent1 step 1"])
+        self.assertEqual(agents[1].llm.calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
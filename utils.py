@@ -8,25 +8,8 @@ from llmClient import LLMClient
 # -----------------------------------------------------------------------------
 # Configuration and Logging Setup
 # -----------------------------------------------------------------------------
-# Create logger
+# Create logger; handlers are installed by the entry point (see logPipeline.setup_logging)
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)  # Set log level
-
-# Define log format
-formatter = logging.Formatter(
-    "%(asctime)s [%(levelname)s] %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
-
-# Output to console
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
-
-# Output to file
-file_handler = logging.FileHandler("app.log", mode="a", encoding="utf-8")
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
 
 # -----------------------------------------------------------------------------
 # Utils functions